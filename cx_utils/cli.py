@@ -0,0 +1,314 @@
+"""
+Command-line entry point running workflows and fleet operations against the switches of an inventory.
+
+    aoscx run configure_ospf -i inventory.yaml -l leafs     run workflows/configure_ospf.py on every leaf
+    aoscx backup -l spines -o backups                       save the running-config of every spine
+    aoscx diff -l spines -o backups                         compare running-configs with the saved ones
+    aoscx facts --json                                      print hostname, platform and firmware of every switch
+    aoscx run configure_evpn_vxlan -n --snapshot-dir snaps  plan the requests of a workflow without sending writes
+
+Switches are selected from an inventory (see cx_utils.inventory) and processed concurrently in one process.
+Workflows run unmodified: inside a worker thread the workflow's data file is overlaid with the parameters of the
+switch (yaml_ops.overrides()) and its login()/logout() calls are served by a session.SessionPool, so every switch
+is logged in to once and its session is shared by everything run against it. With --dry-run the pool is a
+dryrun.DryRunPool: nothing is written to the switches and each switch reports the requests it would receive.
+"""
+
+from cx_utils import inventory, yaml_ops
+from src import breaker, config, dryrun, fleet, limiter, output, session, system
+
+from os.path import dirname, abspath, join, isfile, basename
+import argparse
+import difflib
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+
+WORKFLOWS_DIR = join(dirname(dirname(abspath(__file__))), "workflows")
+FACT_KEYS = ("hostname", "platform_name", "firmware_version", "software_version", "boot_time")
+
+
+class _Progress(object):
+    def __init__(self, total, enabled):
+        self.total = total
+        self.enabled = enabled
+        self.done = 0
+        self.start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def update(self, switchip, status):
+        with self._lock:
+            self.done += 1
+            if self.enabled:
+                sys.stderr.write("[%d/%d] %s: %s (%.1fs)\n"
+                                 % (self.done, self.total, switchip, status, time.monotonic() - self.start))
+                sys.stderr.flush()
+
+
+def _base_url(params):
+    return "https://{0}/rest/{1}/".format(params['switchip'], params.get('version') or "v10.04")
+
+
+def _session_dict(params):
+    """
+    Log in to the switch of an inventory parameter set; inside _run_on_switches() this returns the pooled session.
+    """
+    base_url = _base_url(params)
+    return dict(s=session.login(base_url, params.get('username'), params.get('password')), url=base_url)
+
+
+def _select(args):
+    switch_inventory = inventory.Inventory(args.inventory)
+    switches = switch_inventory.resolve_all(args.limit, args.workers)
+    if not switches:
+        raise SystemExit("ERROR: No switch in inventory '%s' matches '%s'" % (switch_inventory.path, args.limit))
+    return switches
+
+
+def _run_on_switches(args, switches, task):
+    """
+    Call task(params) for every switch concurrently with pooled sessions, capturing what each switch prints.
+
+    :return: Dictionary keyed by switch IP with a result dictionary with at least the keys 'status', 'elapsed',
+        'output' and 'error', and 'data' holding the return value of task
+    """
+    bypassed = [params['switchip'] for params in switches if params.get('bypassproxy')]
+    if bypassed:
+        # Set once for all switches; workflows setting it per switch would overwrite each other's value
+        os.environ['no_proxy'] = ",".join(bypassed)
+        os.environ['NO_PROXY'] = os.environ['no_proxy']
+
+    session_options = {"timeout": (5, args.timeout)}
+    if args.rate:
+        session_options["rate_limiter"] = limiter.RateLimiter(args.rate)
+    if args.dry_run:
+        pool = dryrun.DryRunPool(args.snapshot_dir, args.live_reads, args.per_switch, **session_options)
+    else:
+        pool = session.SessionPool(per_switch_limit=args.per_switch, **session_options)
+    progress = _Progress(len(switches), args.progress)
+    results = {}
+
+    def _task(params):
+        start = time.monotonic()
+        result = {"status": "ok", "error": None, "data": None}
+        with output.capture() as buffer, pool.activate(), yaml_ops.overrides(dict(params, bypassproxy=False)):
+            try:
+                result["data"] = task(params)
+            except SystemExit as error:
+                # session.login() exits on failure, see the output for the reason
+                result["status"] = "failed"
+                result["error"] = "exited with status %s" % error.code
+            except Exception as error:
+                result["status"] = "failed"
+                result["error"] = str(error) or type(error).__name__
+        result["output"] = "".join(buffer)
+        s = pool.sessions.get(_base_url(params))
+        if args.dry_run:
+            # Reads missing from the snapshot make /src functions report failures; only exceptions count here
+            if result["status"] == "ok":
+                result["status"] = "planned"
+            if s is not None:
+                result["plan"] = s.plan().report(args.rtt)
+        elif result["status"] == "ok" and output.failed(result["output"]):
+            result["status"] = "failed"
+        if getattr(s, "breaker", None) is not None and s.breaker.state != breaker.CLOSED:
+            result["status"] = "unreachable"
+            result["error"] = result["error"] or str(s.breaker.last_error)
+        result["elapsed"] = round(time.monotonic() - start, 3)
+        results[params['switchip']] = result
+        progress.update(params['switchip'], result["status"])
+
+    saved_stdout = sys.stdout
+    # Output not captured for a switch (e.g. logouts) goes to stderr so stdout only carries the results
+    sys.stdout = output.CapturingStream(sys.stderr)
+    try:
+        fleet.run_parallel(_task, {params['switchip']: params for params in switches}, args.workers)
+        pool.logout_all(args.workers)
+        if args.dry_run:
+            pool.save_snapshots()
+    finally:
+        sys.stdout = saved_stdout
+    return results
+
+
+def _load_workflow(name):
+    path = name if isfile(name) else join(WORKFLOWS_DIR, name if name.endswith(".py") else name + ".py")
+    if not isfile(path):
+        raise SystemExit("ERROR: Workflow '%s' not found" % name)
+    spec = importlib.util.spec_from_file_location("aoscx_workflow_" + basename(path)[:-3], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, "main"):
+        raise SystemExit("ERROR: Workflow '%s' has no main() function" % name)
+    return module
+
+
+def _cmd_run(args, switches):
+    workflow = _load_workflow(args.workflow)
+    return _run_on_switches(args, switches, lambda params: workflow.main())
+
+
+def _running_config(params):
+    return config.get_config("running-config", **_session_dict(params))
+
+
+def _config_text(config_data):
+    return json.dumps(config_data, sort_keys=True, indent=4) + "\n"
+
+
+def _cmd_backup(args, switches):
+    results = _run_on_switches(args, switches, _running_config)
+    if args.dry_run:
+        return results
+    os.makedirs(args.output_dir, exist_ok=True)
+    for switchip, result in results.items():
+        if result["status"] == "ok":
+            path = join(args.output_dir, "%s.json" % switchip)
+            with open(path, "w") as backup_file:
+                backup_file.write(_config_text(result["data"]))
+            result["data"] = {"file": path}
+    return results
+
+
+def _cmd_diff(args, switches):
+    def _task(params):
+        if args.startup:
+            session_dict = _session_dict(params)
+            return (config.get_config("startup-config", **session_dict),
+                    config.get_config("running-config", **session_dict))
+        path = join(args.output_dir, "%s.json" % params['switchip'])
+        with open(path) as backup_file:
+            saved = json.load(backup_file)
+        return saved, _running_config(params)
+
+    results = _run_on_switches(args, switches, _task)
+    if args.dry_run:
+        return results
+    for switchip, result in results.items():
+        if result["status"] == "ok":
+            before, after = result["data"]
+            diff = "".join(difflib.unified_diff(
+                _config_text(before).splitlines(True), _config_text(after).splitlines(True),
+                "%s/%s" % (switchip, "startup-config" if args.startup else "backup"),
+                "%s/running-config" % switchip))
+            result["status"] = "changed" if diff else "unchanged"
+            result["data"] = {"diff": diff}
+    return results
+
+
+def _cmd_facts(args, switches):
+    def _task(params):
+        system_info = system.get_system_info(**_session_dict(params))
+        return {key: system_info[key] for key in FACT_KEYS if key in system_info}
+    return _run_on_switches(args, switches, _task)
+
+
+def _print_results(args, results):
+    if args.json:
+        document = {"command": args.command, "results": results}
+        if args.dry_run:
+            document["estimated_seconds"] = _fleet_estimate(args, results)
+        json.dump(document, sys.stdout, sort_keys=True, indent=2)
+        sys.stdout.write("\n")
+        return
+    for switchip, result in sorted(results.items()):
+        print("%s: %s (%.1fs)" % (switchip, result["status"], result["elapsed"]))
+        if result["error"]:
+            print("  error: %s" % result["error"])
+        data = result["data"]
+        if args.dry_run and result.get("plan"):
+            _print_plan(args, result["plan"])
+        elif args.command == "diff" and data:
+            sys.stdout.write(data["diff"])
+        elif args.command in ("facts", "backup") and data:
+            for key, value in sorted(data.items()):
+                print("  %s: %s" % (key, value))
+        elif args.verbose or result["status"] not in ("ok", "unchanged", "changed"):
+            sys.stdout.write(result["output"])
+    if args.dry_run:
+        print("Estimated wall time at %.0f ms RTT with %d worker(s): %.1fs"
+              % (args.rtt * 1000, args.workers, _fleet_estimate(args, results)))
+
+
+def _print_plan(args, plan):
+    print("  %d request(s) (%s), %d write(s), %d read(s) missing from the snapshot"
+          % (plan["requests"], ", ".join("%s %d" % item for item in sorted(plan["counts"].items())),
+             plan["writes"], plan["missing_reads"]))
+    print("  %d bytes sent, %d bytes received, estimated %.1fs"
+          % (plan["request_bytes"], plan["response_bytes"], plan["estimated_seconds"]))
+    if args.verbose:
+        for operation in plan["operations"]:
+            print("    %s" % operation)
+
+
+def _fleet_estimate(args, results):
+    switch_seconds = [result["plan"]["estimated_seconds"] for result in results.values() if result.get("plan")]
+    return round(dryrun.estimate_fleet_seconds(switch_seconds, args.workers), 3)
+
+
+def build_parser():
+    """
+    :return: argparse.ArgumentParser of the aoscx command
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-i", "--inventory", default="inventory.yaml",
+                        help="inventory file name within sampledata, or path (default: %(default)s)")
+    common.add_argument("-l", "--limit", default="all",
+                        help="groups, switch names or patterns to target, e.g. 'leafs,!rack2' (default: all)")
+    common.add_argument("-w", "--workers", type=int, default=16,
+                        help="switches processed concurrently (default: %(default)s)")
+    common.add_argument("--per-switch", type=int, default=8,
+                        help="maximum concurrent requests to one switch (default: %(default)s)")
+    common.add_argument("--rate", type=float, default=None,
+                        help="maximum requests per second across all switches (default: unlimited)")
+    common.add_argument("--timeout", type=float, default=60,
+                        help="read timeout of every request in seconds (default: %(default)s)")
+    common.add_argument("-n", "--dry-run", action="store_true",
+                        help="plan the requests without sending writes and report their count, size and duration")
+    common.add_argument("--snapshot-dir", default=None,
+                        help="with --dry-run, serve reads from the <switch>.json snapshots in this directory")
+    common.add_argument("--live-reads", action="store_true",
+                        help="with --dry-run, send reads missing from the snapshots to the switches and save them")
+    common.add_argument("--rtt", type=float, default=0.05,
+                        help="round trip time in seconds used to estimate dry-run durations (default: %(default)s)")
+    common.add_argument("--json", action="store_true", help="print results as JSON on stdout")
+    common.add_argument("--no-progress", dest="progress", action="store_false",
+                        help="do not report progress on stderr")
+    common.add_argument("-v", "--verbose", action="store_true", help="print the output of every switch")
+
+    parser = argparse.ArgumentParser(prog="aoscx", description="Run AOS-CX workflows across an inventory.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+    run_parser = subparsers.add_parser("run", parents=[common], help="run a workflow on every selected switch")
+    run_parser.add_argument("workflow", help="workflow name in workflows/ (e.g. configure_ospf), or path")
+    backup_parser = subparsers.add_parser("backup", parents=[common], help="save running-configs as JSON")
+    backup_parser.add_argument("-o", "--output-dir", default="backups", help="(default: %(default)s)")
+    diff_parser = subparsers.add_parser("diff", parents=[common], help="compare running-configs")
+    diff_parser.add_argument("-o", "--output-dir", default="backups",
+                             help="directory of the backups to compare with (default: %(default)s)")
+    diff_parser.add_argument("--startup", action="store_true", help="compare with the startup-config instead")
+    subparsers.add_parser("facts", parents=[common], help="print identity and firmware of every switch")
+    return parser
+
+
+def main(argv=None):
+    """
+    Entry point of the aoscx command.
+
+    :param argv: Command-line arguments, defaults to sys.argv[1:]
+    :return: Exit status: 0 if every switch succeeded, 1 otherwise
+    """
+    args = build_parser().parse_args(argv)
+    switches = _select(args)
+    commands = {"run": _cmd_run, "backup": _cmd_backup, "diff": _cmd_diff, "facts": _cmd_facts}
+    results = commands[args.command](args, switches)
+    _print_results(args, results)
+    return 0 if all(result["status"] in ("ok", "unchanged", "changed", "planned")
+                    for result in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
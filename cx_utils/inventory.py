@@ -0,0 +1,204 @@
+"""
+Multi-switch inventory with groups and variable inheritance.
+
+Inventory file format (YAML):
+
+    all:
+      vars:                     # variables of every switch
+        version: v10.04
+        username: admin
+      children:
+        spines:                 # group
+          vars:
+            bgpasn: 65001
+          switches:
+            10.0.0.1:           # switch, with its own variables
+              routerid: 10.2.0.1
+            10.0.0.2:
+        leafs:
+          vars: {...}
+          varsfiles: [leafs_secrets.yaml]   # optional files with more variables, relative to the inventory
+          children:
+            rack1:              # nested group, inherits the variables of 'leafs'
+              switches:
+                10.0.1.1:
+
+A switch's parameters are the variables of 'all', then of every group containing it from the outermost to the
+innermost, then of the switch itself, later definitions overriding earlier ones. 'switchip' defaults to the switch
+name. A switch listed in several groups merges them in the order they appear in the file.
+"""
+
+from cx_utils import yaml_ops
+
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
+from os.path import dirname, join, isabs
+import threading
+
+
+class Inventory(object):
+    """
+    Inventory of switches loaded from a YAML file through yaml_ops.read_yaml().
+
+    Per-switch parameter sets are only resolved when requested and are memoized, so selecting a few switches from a
+    large inventory does not resolve the others; variable files are read concurrently.
+    """
+
+    def __init__(self, filename):
+        """
+        :param filename: File name within the sampledata directory, or path to the inventory YAML file
+        """
+        self.path = yaml_ops._resolve_path(filename)
+        data = yaml_ops.read_yaml(self.path) or {}
+        # group name -> {"vars": {...}, "varsfiles": [...], "parent": name or None, "switches": [...]}
+        self.groups = {}
+        # switch name -> ordered list of (group chain from 'all' down, switch vars)
+        self._memberships = {}
+        self._resolved = {}
+        self._varsfiles = {}
+        self._lock = threading.Lock()
+        self._add_group("all", data.get("all", data), None)
+
+    def _add_group(self, name, group_data, parent):
+        group_data = group_data or {}
+        if name in self.groups:
+            raise Exception("ERROR: Group '%s' is defined more than once in inventory '%s'" % (name, self.path))
+        self.groups[name] = {
+            "vars": group_data.get("vars") or {},
+            "varsfiles": group_data.get("varsfiles") or [],
+            "parent": parent,
+            "switches": [],
+        }
+        switches = group_data.get("switches") or {}
+        if isinstance(switches, list):
+            switches = {switch: None for switch in switches}
+        for switch_name, switch_vars in switches.items():
+            switch_name = str(switch_name)
+            self.groups[name]["switches"].append(switch_name)
+            self._memberships.setdefault(switch_name, []).append((name, switch_vars or {}))
+        for child_name, child_data in (group_data.get("children") or {}).items():
+            self._add_group(str(child_name), child_data, name)
+
+    def _chain(self, group_name):
+        chain = []
+        while group_name is not None:
+            chain.append(group_name)
+            group_name = self.groups[group_name]["parent"]
+        return chain[::-1]
+
+    def _group_descendants(self, group_name):
+        names = [group_name]
+        for name, group in self.groups.items():
+            if group["parent"] == group_name:
+                names.extend(self._group_descendants(name))
+        return names
+
+    def _read_varsfile(self, filename):
+        if not isabs(filename):
+            filename = join(dirname(self.path), filename)
+        with self._lock:
+            if filename in self._varsfiles:
+                return self._varsfiles[filename]
+        data = yaml_ops.read_yaml(filename) or {}
+        with self._lock:
+            self._varsfiles[filename] = data
+        return data
+
+    def _group_vars(self, group_name):
+        group = self.groups[group_name]
+        group_vars = {}
+        for filename in group["varsfiles"]:
+            group_vars.update(self._read_varsfile(filename))
+        group_vars.update(group["vars"])
+        return group_vars
+
+    @property
+    def switches(self):
+        """
+        :return: List of every switch name in the inventory, in file order
+        """
+        return list(self._memberships)
+
+    def select(self, selector="all"):
+        """
+        Return the switch names matching a selector.
+
+        The selector is a comma-separated list of terms, each a group name, a switch name or a glob pattern on
+        switch names (e.g. "10.0.1.*"). Terms add to the selection, terms prefixed with '!' remove from it and terms
+        prefixed with '&' keep only switches that also match them, e.g. "leafs,!rack2" or "all,&spines".
+
+        :param selector: Selector string
+        :return: List of switch names in file order
+        """
+        selected = set()
+        for term in [term.strip() for term in selector.split(",") if term.strip()]:
+            operator = term[0] if term[0] in "!&" else None
+            matched = self._match(term[1:] if operator else term)
+            if operator == "!":
+                selected -= matched
+            elif operator == "&":
+                selected &= matched
+            else:
+                selected |= matched
+        return [switch for switch in self._memberships if switch in selected]
+
+    def _match(self, term):
+        if term in self.groups:
+            group_names = set(self._group_descendants(term))
+            return {switch for switch, memberships in self._memberships.items()
+                    if any(group_name in group_names for group_name, _ in memberships)}
+        return {switch for switch in self._memberships if fnmatchcase(switch, term)}
+
+    def resolve(self, switch_name):
+        """
+        Return the flat parameter set of one switch, resolving and memoizing it on first use.
+
+        :param switch_name: Switch name as listed in the inventory
+        :return: Dictionary of parameters, always including 'switchip'
+        """
+        with self._lock:
+            if switch_name in self._resolved:
+                return dict(self._resolved[switch_name])
+        if switch_name not in self._memberships:
+            raise Exception("ERROR: Switch '%s' is not in inventory '%s'" % (switch_name, self.path))
+
+        params = {}
+        applied = set()
+        for group_name, switch_vars in self._memberships[switch_name]:
+            for chain_group in self._chain(group_name):
+                if chain_group not in applied:
+                    params.update(self._group_vars(chain_group))
+                    applied.add(chain_group)
+        for group_name, switch_vars in self._memberships[switch_name]:
+            params.update(switch_vars)
+        params.setdefault("switchip", switch_name)
+        params["groups"] = sorted(applied)
+
+        with self._lock:
+            self._resolved[switch_name] = params
+        return dict(params)
+
+    def iter_resolved(self, selector="all", max_workers=8):
+        """
+        Resolve the switches matching a selector concurrently, yielding each as soon as it is ready, in file order.
+
+        :param selector: Selector string, see select()
+        :param max_workers: Maximum number of switches resolved concurrently
+        :return: Generator of parameter dictionaries
+        """
+        switch_names = self.select(selector)
+        if not switch_names:
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(switch_names))) as executor:
+            for params in executor.map(self.resolve, switch_names):
+                yield params
+
+    def resolve_all(self, selector="all", max_workers=8):
+        """
+        Resolve the switches matching a selector, e.g. to feed src.fleet.login_all().
+
+        :param selector: Selector string, see select()
+        :param max_workers: Maximum number of switches resolved concurrently
+        :return: List of parameter dictionaries
+        """
+        return list(self.iter_resolved(selector, max_workers))
@@ -1,12 +1,152 @@
-import yaml
-from os.path import dirname, abspath, join
+import contextlib
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+from os.path import dirname, abspath, join, isabs, isfile, expanduser
 
+# Parsed files are only cached when AOSCX_CACHE_DIR names a directory for it, e.g. ~/.cache/aoscx/yaml. The data
+# files hold switch credentials, so the directory is created private (0700) and a directory writable by others is
+# not used.
+CACHE_DIR_VARIABLE = "AOSCX_CACHE_DIR"
 
-def read_yaml(filename):
+_override_state = threading.local()
 
+
+def _resolve_path(filename):
+    """
+    Resolve a data file name: a bare file name refers to the sampledata directory, anything else is a path.
+
+    :param filename: File name within sampledata, or absolute/relative path to a YAML file
+    :return: Absolute path
+    """
     parentdirpath = dirname(dirname(abspath(__file__)))
-    sampledatadir = join(parentdirpath, "sampledata")
+    sampledatapath = join(parentdirpath, "sampledata", filename)
+    if not isabs(filename) and dirname(filename) == "" and isfile(sampledatapath):
+        return abspath(sampledatapath)
+    return abspath(expanduser(filename))
+
+
+def _cache_dir():
+    """
+    :return: Directory of the YAML cache, or None if caching is not enabled or the directory is not private
+    """
+    cache_dir = os.environ.get(CACHE_DIR_VARIABLE)
+    if not cache_dir:
+        return None
+    cache_dir = abspath(expanduser(cache_dir))
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        dir_stat = os.stat(cache_dir)
+    except OSError as error:
+        print("WARNING: Could not create YAML cache directory '%s': %s" % (cache_dir, error))
+        return None
+    if dir_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH) or (hasattr(os, "getuid") and dir_stat.st_uid != os.getuid()):
+        print("WARNING: Not using YAML cache directory '%s' as it is writable by other users" % cache_dir)
+        return None
+    return cache_dir
+
+
+def _parse_yaml(content):
+    """
+    Parse YAML text, using the libyaml C loader when PyYAML was built with it.
+
+    :param content: YAML document as bytes
+    :return: Parsed data
+    """
+    import yaml
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(content, Loader=loader)
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as cache_file:
+            entry = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def _store_cache(cache_path, entry):
+    try:
+        text = json.dumps(entry)
+    except (TypeError, ValueError):
+        return
+    if json.loads(text) != entry:
+        # Data JSON cannot represent as is, e.g. integer keys or dates, is parsed every time
+        return
+    try:
+        # Write to a temporary file (created 0600) and rename it so a concurrent reader never sees a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=dirname(cache_path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as cache_file:
+            cache_file.write(text)
+        os.replace(tmp_path, cache_path)
+    except OSError as error:
+        print("WARNING: Could not write YAML cache '%s': %s" % (cache_path, error))
+
+
+@contextlib.contextmanager
+def overrides(params):
+    """
+    Context manager making read_yaml() in the current thread return data updated with params, e.g. to run a workflow
+    written for the single switch in its data file against a switch of an inventory.
+
+    :param params: Dictionary of values replacing those of every dictionary read, e.g. an inventory switch's
+        parameters with 'switchip', 'username' and 'password'
+    """
+    previous = getattr(_override_state, "params", None)
+    _override_state.params = params
+    try:
+        yield
+    finally:
+        _override_state.params = previous
+
+
+def read_yaml(filename, use_cache=True):
+    """
+    Read and parse a YAML data file.
+
+    If the AOSCX_CACHE_DIR environment variable is set, parsed results are cached there in a JSON file keyed by the
+    path of the YAML file. The cache is used as is while the file's modification time and size are unchanged;
+    otherwise the file's SHA-1 hash decides whether it must be parsed again. Large inventories thus load in
+    milliseconds after the first run.
+
+    :param filename: File name within the sampledata directory (e.g. "vlan_data.yaml"), or path to any YAML file
+    :param use_cache: Set to False to always parse the file, even if caching is enabled
+    :return: Parsed data, e.g. a dictionary
+    """
+    data = _read_yaml(filename, use_cache)
+    params = getattr(_override_state, "params", None)
+    if params and isinstance(data, dict):
+        data = dict(data)
+        data.update(params)
+    return data
+
+
+def _read_yaml(filename, use_cache):
+    path = _resolve_path(filename)
+    cache_dir = _cache_dir() if use_cache else None
+    if not cache_dir:
+        with open(path, 'rb') as yml_file:
+            return _parse_yaml(yml_file.read())
+
+    file_stat = os.stat(path)
+    cache_path = join(cache_dir, hashlib.sha1(path.encode("utf-8")).hexdigest() + ".json")
+    entry = _load_cache(cache_path)
+    if entry is not None and entry.get("mtime_ns") == file_stat.st_mtime_ns and entry.get("size") == file_stat.st_size:
+        return entry["data"]
 
-    with open(abspath(join(sampledatadir, filename)), 'r') as yml_file:
-        data = yaml.safe_load(yml_file)
+    with open(path, 'rb') as yml_file:
+        content = yml_file.read()
+    digest = hashlib.sha1(content).hexdigest()
+    if entry is not None and entry.get("sha1") == digest:
+        # Touched but unchanged: refresh the metadata so the next read takes the fast path
+        data = entry["data"]
+    else:
+        data = _parse_yaml(content)
+    _store_cache(cache_path, {"mtime_ns": file_stat.st_mtime_ns, "size": file_stat.st_size, "sha1": digest,
+                              "data": data})
     return data
@@ -0,0 +1,20 @@
+from setuptools import setup
+
+setup(
+    name="aos-cx-python",
+    version="1.0.0",
+    description="REST API functions and workflows for AOS-CX switches",
+    packages=["src", "cx_utils"],
+    python_requires=">=3.7",
+    install_requires=[
+        "requests==2.20.0",
+        "PyYAML==5.1",
+        "numpy>=1.16",
+        "websocket-client>=0.56",
+    ],
+    entry_points={
+        "console_scripts": [
+            "aoscx = cx_utils.cli:main",
+        ],
+    },
+)
@@ -0,0 +1,68 @@
+"""
+REST API call functions and low-level process functions for AOS-CX switches.
+
+Submodules are loaded lazily: ``from src import vlan`` returns a lightweight stand-in, and the module is only
+imported the first time one of its attributes is used. Modules importing each other (e.g. vlan importing interface,
+port and mac) therefore cost nothing until they are actually called, which keeps short scripts fast to start.
+Attributes set on or deleted from a stand-in apply to the real module.
+Set the environment variable AOSCX_EAGER_IMPORT to any non-empty value to import submodules immediately instead.
+"""
+
+import importlib
+import os
+import threading
+import types
+
+__all__ = ["access_security", "acl", "arp", "bgp", "breaker", "common_ops", "config", "correlate", "counters", "dhcp",
+           "dryrun", "evpn", "fleet", "interface", "journal", "lag", "lazy", "limiter", "loop_protect", "mac",
+           "mac_index", "metrics", "models", "notification", "ospf", "output", "port", "qos", "retry", "session",
+           "singleflight", "system", "vlan", "vrf", "vsx", "vxlan"]
+
+_import_lock = threading.RLock()
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Stand-in for a submodule that imports it on first attribute access and forwards every lookup to it.
+    """
+
+    def _load(self):
+        module = self.__dict__.get("_module")
+        if module is None:
+            with _import_lock:
+                module = self.__dict__.get("_module")
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        # Assignments, e.g. monkeypatching in tests, must reach the real module its functions look names up in
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def __getattr__(name):
+    if name not in __all__:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    if os.environ.get("AOSCX_EAGER_IMPORT"):
+        return importlib.import_module("%s.%s" % (__name__, name))
+    with _import_lock:
+        # Importing the submodule for real sets it as an attribute of the package, which then takes precedence
+        module = globals().get(name)
+        if module is None:
+            module = _LazyModule("%s.%s" % (__name__, name))
+            globals()[name] = module
+    return module
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,10 +4,12 @@ import json
 import random
 
 
-def get_all_acls(**kwargs):
+def get_all_acls(attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get a list of all ACLs
 
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["name", "list_type"]
+    :param filters: Optional filters on attribute values, e.g. ["list_type=ipv4"]; see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
@@ -15,15 +17,15 @@ def get_all_acls(**kwargs):
     """
     target_url = kwargs["url"] + "system/acls"
 
-    response = kwargs["s"].get(target_url, verify=False)
+    response, acls_list = common_ops._get_table(target_url, attributes, filters, **kwargs)
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting list of all ACLs failed with status code %d"
               % response.status_code)
+        acls_list = response.json()
     else:
         print("SUCCESS: Getting list of all ACLs succeeded")
 
-    acls_list = response.json()
     return acls_list
 
 
@@ -119,39 +121,43 @@ def _create_acl(list_name, list_type, **kwargs):
               % (list_type, list_name))
 
 
-def get_all_acl_entries(list_name, list_type, **kwargs):
+def get_all_acl_entries(list_name, list_type, attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get all entries of an ACL
 
     :param list_name: Alphanumeric name of the ACL
     :param list_type: Type should be one of "ipv4," "ipv6," or "mac"
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["action", "src_ip"]
+    :param filters: Optional filters on attribute values, e.g. ["action=deny"]; see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
-    :return: Dictionary containing queue profile entry URIs
+    :return: Dictionary containing queue profile entry URIs, or entry data if attributes or filters are given
     """
     if kwargs["url"].endswith("/v1/"):
-        acl_entries = _get_all_acl_entries_v1(list_name, list_type, **kwargs)
+        acl_entries = _get_all_acl_entries_v1(list_name, list_type, attributes, filters, **kwargs)
     else:   # Updated else for when version is v10.04
-        acl_entries = _get_all_acl_entries(list_name, list_type, **kwargs)
+        acl_entries = _get_all_acl_entries(list_name, list_type, attributes, filters, **kwargs)
 
     return acl_entries
 
 
-def _get_all_acl_entries_v1(list_name, list_type, **kwargs):
+def _get_all_acl_entries_v1(list_name, list_type, attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get all entries of an ACL
 
     :param list_name: Alphanumeric name of the ACL
     :param list_type: Type should be one of "ipv4," "ipv6," or "mac"
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["action", "src_ip"]
+    :param filters: Optional filters on attribute values, e.g. ["action=deny"]; see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
-    :return: Dictionary containing queue profile entry URIs
+    :return: Dictionary containing queue profile entry URIs, or entry data if attributes or filters are given
     """
     target_url = kwargs["url"] + "system/acls/%s/%s/cfg_aces" % (list_name, list_type)
 
-    response = kwargs["s"].get(target_url, verify=False)
+    response, acl_entries = common_ops._get_table(target_url, attributes, filters, **kwargs)
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting dictionary of URIS of entries in %s ACL '%s' failed with status code %d"
@@ -159,7 +165,6 @@ def _get_all_acl_entries_v1(list_name, list_type, **kwargs):
         acl_entries = {}
     else:
         print("SUCCESS: Getting dictionary of URIs of entries in %s ACL '%s' succeeded" % (list_type, list_name))
-        acl_entries = response.json()
 
     # for some reason, this API returns a list when empty, and a dictionary when there is data
     # make this function always return a dictionary,
@@ -169,21 +174,28 @@ def _get_all_acl_entries_v1(list_name, list_type, **kwargs):
         return acl_entries
 
 
-def _get_all_acl_entries(list_name, list_type, **kwargs):
+def _get_all_acl_entries(list_name, list_type, attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get all entries of an ACL
 
     :param list_name: Alphanumeric name of the ACL
     :param list_type: Type should be one of "ipv4," "ipv6," or "mac"
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["action", "src_ip"]
+    :param filters: Optional filters on attribute values, e.g. ["action=deny"]; see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
-    :return: Dictionary containing queue profile entry URIs
+    :return: Dictionary containing queue profile entry URIs, or entry data if attributes or filters are given
     """
 
-    target_url = kwargs["url"] + "system/acls/%s,%s?attributes=cfg_aces" % (list_name, list_type)
-
-    response = kwargs["s"].get(target_url, verify=False)
+    if attributes or filters:
+        # The entries themselves are only selectable and filterable on the cfg_aces collection
+        target_url = kwargs["url"] + "system/acls/%s,%s/cfg_aces" % (list_name, list_type)
+        response, acl_entries = common_ops._get_table(target_url, attributes, filters, **kwargs)
+    else:
+        target_url = kwargs["url"] + "system/acls/%s,%s?attributes=cfg_aces" % (list_name, list_type)
+        response = kwargs["s"].get(target_url, verify=False)
+        acl_entries = response.json()
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting dictionary of URIS of entries in %s ACL '%s' failed with status code %d"
@@ -191,7 +203,8 @@ def _get_all_acl_entries(list_name, list_type, **kwargs):
     else:
         print("SUCCESS: Getting dictionary of URIs of entries in %s ACL '%s' succeeded" % (list_type, list_name))
 
-    acl_entries = response.json()
+    if acl_entries is None:
+        acl_entries = response.json()
 
     # for some reason, this API returns a list when empty, and a dictionary when there is data
     # make this function always return a dictionary,
@@ -1,6 +1,33 @@
 from src import common_ops
 
 
+def get_all_neighbors(vrf_name, depth=1, **kwargs):
+    """
+    Perform a GET call on Neighbors table to get the raw neighbor entries of a VRF
+
+    :param vrf_name: Alphanumeric name of VRF
+    :param depth: Integer deciding how many levels into the API JSON that references will be returned.
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: List (v1) or dictionary (v10.04) of neighbor entries, empty if the call failed
+    """
+    queries = {"depth": depth}
+
+    target_url = kwargs["url"] + "system/vrfs/%s/neighbors" % vrf_name
+    response = kwargs["s"].get(target_url, verify=False, params=queries, timeout=2)
+
+    if not common_ops._response_ok(response, "GET"):
+        print("FAIL: Getting Neighbors table entries of VRF '%s' failed with status code %d"
+              % (vrf_name, response.status_code))
+        neighbors = []
+    else:
+        print("SUCCESS: Getting Neighbors table entries of VRF '%s' succeeded" % vrf_name)
+        neighbors = response.json()
+
+    return neighbors
+
+
 def get_arp_entries(vrf_name, **kwargs):
     """
     Perform a GET call on Neighbors table to get ARP entries
@@ -30,13 +57,12 @@ def get_arp_entries(vrf_name, **kwargs):
         arp_entry = {
             "IPv4 Address": neighbor_info['ip_address'],
             "MAC Address": neighbor_info['mac'],
-            # For port and physical port: split string by '/', take last block, and replace any '%' characters
-            "Port": common_ops._replace_percents((neighbor_info['port'].split('/'))[-1]),
+            "Port": common_ops._uri_key(neighbor_info['port']),
             "State": neighbor_info['state']
         }
 
         if 'phy_port' in neighbor_info:
-            arp_entry['Physical Port'] = common_ops._replace_percents((neighbor_info['phy_port'].split('/'))[-1])
+            arp_entry['Physical Port'] = common_ops._uri_key(neighbor_info['phy_port'])
 
         arp_entries_list.append(arp_entry)
 
@@ -1,5 +1,5 @@
 import json
-from src import common_ops, vrf
+from src import common_ops, fleet, vrf
 
 def get_bgp_routers(vrf_name, **kwargs):
     """
@@ -80,11 +80,13 @@ def delete_bgp_asn(vrf_name, asn, **kwargs):
         print("SUCCESS: No need to Delete BGP ASN '%s' as it does not exists!" % asn)
 
 
-def get_bgp_neighbors_list(vrf_name, asn, **kwargs):
+def get_bgp_neighbors_list(vrf_name, asn, attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get a list of all BGP neighbors for the supplied Autonomous System Number
     :param vrf_name: Alphanumeric name of the VRF that we are retrieving all BGP ASNs from
     :param asn: Integer that represents the Autonomous System Number
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["ip_or_ifname_or_group_name"]
+    :param filters: Optional filters on attribute values, e.g. ["remote_as=65001"]; see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
@@ -92,7 +94,7 @@ def get_bgp_neighbors_list(vrf_name, asn, **kwargs):
     """
     target_url = kwargs["url"] + "system/vrfs/%s/bgp_routers/%s/bgp_neighbors" % (vrf_name, asn)
 
-    response = kwargs["s"].get(target_url, verify=False)
+    response, neighbor_list = common_ops._get_table(target_url, attributes, filters, **kwargs)
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting list of all BGP neighbors for ASN '%s' failed with status code %d"
@@ -100,7 +102,6 @@ def get_bgp_neighbors_list(vrf_name, asn, **kwargs):
         neighbor_list = {}
     else:
         print("SUCCESS: Getting list of all BGP neighbors for ASN '%s' succeeded" % asn)
-        neighbor_list = response.json()
     return neighbor_list
 
 
@@ -131,46 +132,8 @@ def create_bgp_neighbors(vrf_name, asn, group_ip, family_type="l2vpn_evpn", refl
     neighbor_list = get_bgp_neighbors_list(vrf_name, asn, **kwargs)
 
     if group_ip not in neighbor_list:
-        bgp_data = {
-            "ip_or_group_name": group_ip,
-            "is_peer_group": False,
-            "remote_as": asn,
-            "shutdown": False,
-            "activate": {
-                "ipv4-unicast": False,
-                "ipv6-unicast": False,
-                "l2vpn-evpn": False
-            },
-            "next_hop_unchanged": {
-                "l2vpn-evpn": False
-            },
-            "route_reflector_client": {
-                "ipv4-unicast": False,
-                "ipv6-unicast": False,
-                "l2vpn-evpn": False
-            },
-            "send_community": {
-                "ipv4-unicast": "none",
-                "ipv6-unicast": "none",
-                "l2vpn-evpn": "none"
-            }
-        }
-
-        if local_interface:
-            int_percents = common_ops._replace_special_characters(local_interface)
-            if kwargs["url"].endswith("/v1/"):
-                bgp_data.update({'local_interface': "/rest/v1/system/ports/%s" % int_percents})
-            else:
-                # Else logic designed for v10.04 and later
-                bgp_data.update({'local_interface': "/rest/v10.04/system/interfaces/%s" % int_percents})
-
-        bgp_data['activate'][family_type] = True
-
-        if send_community:
-            bgp_data['send_community'][family_type] = "both"
-
-        if reflector:
-            bgp_data['route_reflector_client'][family_type] = reflector
+        bgp_data = _bgp_neighbor_data(group_ip, asn, family_type, reflector, send_community, local_interface,
+                                      **kwargs)
 
         target_url = kwargs["url"] + "system/vrfs/%s/bgp_routers/%s/bgp_neighbors" % (vrf_name, asn)
 
@@ -268,3 +231,204 @@ def delete_bgp_vrf(vrf_name, asn, **kwargs):
             print("SUCCESS: Deleting BGP VRF '%s' for ASN '%s' succeeded" % (vrf_name, asn))
     else:
         print("SUCCESS: No need to Delete BGP VRF '%s' as VRF does not exists." % vrf_name)
+
+
+# Address families a BGP neighbor can be enabled for
+_FAMILY_TYPES = ("l2vpn-evpn", "ipv4-unicast", "ipv6-unicast")
+
+
+def _bgp_neighbor_data(group_ip, asn, family_type="l2vpn-evpn", reflector=False, send_community=False,
+                       local_interface="", remote_as=None, **kwargs):
+    """
+    Build the POST body of a BGP neighbor, see create_bgp_neighbors() for the parameters.
+
+    :param family_type: Address family to enable, or list of address families to enable
+    :param remote_as: Optional integer ASN of the neighbor. Defaults to asn (iBGP) if not specified.
+    :return: Dictionary of the BGP neighbor entry
+    """
+    families = [family_type] if isinstance(family_type, str) else family_type
+    bgp_data = {
+        "ip_or_group_name": group_ip,
+        "is_peer_group": False,
+        "remote_as": asn if remote_as is None else remote_as,
+        "shutdown": False,
+        "activate": {
+            "ipv4-unicast": False,
+            "ipv6-unicast": False,
+            "l2vpn-evpn": False
+        },
+        "next_hop_unchanged": {
+            "l2vpn-evpn": False
+        },
+        "route_reflector_client": {
+            "ipv4-unicast": False,
+            "ipv6-unicast": False,
+            "l2vpn-evpn": False
+        },
+        "send_community": {
+            "ipv4-unicast": "none",
+            "ipv6-unicast": "none",
+            "l2vpn-evpn": "none"
+        }
+    }
+
+    if local_interface:
+        int_percents = common_ops._replace_special_characters(local_interface)
+        if kwargs["url"].endswith("/v1/"):
+            bgp_data.update({'local_interface': "/rest/v1/system/ports/%s" % int_percents})
+        else:
+            # Else logic designed for v10.04 and later
+            bgp_data.update({'local_interface': "/rest/v10.04/system/interfaces/%s" % int_percents})
+
+    for family in families:
+        bgp_data['activate'][family] = True
+
+        if send_community:
+            bgp_data['send_community'][family] = "both"
+
+        if reflector:
+            bgp_data['route_reflector_client'][family] = reflector
+
+    return bgp_data
+
+
+def _neighbor_differs(desired, current, families):
+    """
+    Check whether a BGP neighbor entry differs from its desired body in any attribute the body sets, looking only at
+    the given address families in the per-family attributes (activate, send_community...).
+    References (local_interface) are compared by the name they point to.
+    """
+    for attribute, value in desired.items():
+        if attribute in ("ip_or_group_name", "is_peer_group"):
+            continue
+        actual = current.get(attribute)
+        if attribute == "local_interface":
+            if common_ops._ref_key(value) != common_ops._ref_key(actual):
+                return True
+        elif isinstance(value, dict):
+            if any((actual or {}).get(key) != item for key, item in value.items() if key in families):
+                return True
+        elif actual != value:
+            return True
+    return False
+
+
+def _neighbor_put_data(desired, current, families):
+    """
+    Build the PUT body updating a BGP neighbor entry to its desired body, keeping the settings of the address
+    families not given as they are.
+    """
+    put_data = dict(current)
+    for attribute, value in desired.items():
+        if isinstance(value, dict):
+            put_data[attribute] = dict(current.get(attribute) or {})
+            put_data[attribute].update((key, item) for key, item in value.items() if key in families)
+        else:
+            put_data[attribute] = value
+    # The keys of the neighbor can't be modified
+    put_data.pop("ip_or_group_name", None)
+    put_data.pop("is_peer_group", None)
+    return put_data
+
+
+def sync_bgp_neighbors(neighbors, prune=False, max_workers=8, **kwargs):
+    """
+    Make the BGP neighbors of one or more BGP routers (VRF and ASN) match a complete peer set. The neighbors of all
+    the routers are fetched in parallel, one GET per router, then only the needed POST (new neighbor),
+    PUT (changed settings) and DELETE (with prune, neighbors not in the peer set) calls are sent, concurrently.
+    Note that this functions has logic that works for both v1 and v10.04
+
+    :param neighbors: Dictionary keyed by (VRF name, ASN) tuples, with as value a dictionary keyed by neighbor IPv4
+        address or group name, whose value is a dictionary of the other parameters of create_bgp_neighbors()
+        ('family_type', 'reflector', 'send_community', 'local_interface') plus optionally 'remote_as' for eBGP
+        neighbors, or None for the defaults. E.g.
+        {("default", 65001): {"10.0.0.1": {"family_type": "l2vpn-evpn", "reflector": True}}}
+        A single 'family_type' only manages that address family: the other families of an existing neighbor are
+        left as they are. A list, e.g. ["ipv4-unicast", "l2vpn-evpn"], is the complete set of families of the
+        neighbor: the families listed are enabled and the others disabled.
+    :param prune: If True, also delete the neighbors of the routers that are not in the peer set
+    :param max_workers: Maximum number of concurrent calls to the switch
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by (VRF name, ASN, neighbor) tuples, True if the neighbor is as requested (created,
+        updated, deleted or unchanged), False otherwise
+    """
+    desired = {}
+    for (vrf_name, asn), peers in neighbors.items():
+        for group_ip, options in peers.items():
+            options = dict(options or {})
+            options.setdefault("family_type", "l2vpn-evpn")
+            if isinstance(options["family_type"], str):
+                families = [options["family_type"]]
+                managed = set(families)
+            else:
+                families = list(options["family_type"])
+                managed = set(_FAMILY_TYPES)
+            if not families or any(family not in _FAMILY_TYPES for family in families):
+                raise Exception("ERROR: family_type of BGP neighbor '%s' should be 'l2vpn-evpn', 'ipv4-unicast', "
+                                "or 'ipv6-unicast', or a list of them" % group_ip)
+            desired[(vrf_name, asn, group_ip)] = (_bgp_neighbor_data(group_ip, asn, **dict(options, **kwargs)),
+                                                  managed)
+
+    def _neighbors_url(router):
+        return kwargs["url"] + "system/vrfs/%s/bgp_routers/%s/bgp_neighbors" % router
+
+    def _get_neighbors(router):
+        selector = "configuration" if kwargs["url"].endswith("/v1/") else "writable"
+        response = kwargs["s"].get(_neighbors_url(router), verify=False, params={"depth": 1, "selector": selector})
+        if not common_ops._response_ok(response, "GET"):
+            print("FAIL: Getting list of all BGP neighbors for ASN '%s' failed with status code %d"
+                  % (router[1], response.status_code))
+            return None
+        print("SUCCESS: Getting list of all BGP neighbors for ASN '%s' succeeded" % router[1])
+        table = response.json()
+        if isinstance(table, dict):
+            return dict((common_ops._replace_percents(key), entry) for key, entry in table.items())
+        return dict((entry["ip_or_group_name"], entry) for entry in table if isinstance(entry, dict))
+
+    routers = list(neighbors)
+    current = fleet.run_parallel(_get_neighbors, dict((router, router) for router in routers), max_workers)
+
+    results = {}
+    operations = {}
+    for (vrf_name, asn, group_ip), (bgp_data, managed) in desired.items():
+        router_neighbors = current[(vrf_name, asn)]
+        if router_neighbors is None:
+            results[(vrf_name, asn, group_ip)] = False
+        elif group_ip not in router_neighbors:
+            operations[(vrf_name, asn, group_ip)] = ("POST", _neighbors_url((vrf_name, asn)), bgp_data)
+        elif _neighbor_differs(bgp_data, router_neighbors[group_ip], managed):
+            operations[(vrf_name, asn, group_ip)] = (
+                "PUT", _neighbors_url((vrf_name, asn)) + "/" + common_ops._replace_special_characters(group_ip),
+                _neighbor_put_data(bgp_data, router_neighbors[group_ip], managed))
+        else:
+            print("SUCCESS: BGP Neighbor '%s' already exists for ASN '%s'." % (group_ip, asn))
+            results[(vrf_name, asn, group_ip)] = True
+    if prune:
+        for (vrf_name, asn), router_neighbors in current.items():
+            for group_ip in router_neighbors or {}:
+                if (vrf_name, asn, group_ip) not in desired:
+                    operations[(vrf_name, asn, group_ip)] = (
+                        "DELETE",
+                        _neighbors_url((vrf_name, asn)) + "/" + common_ops._replace_special_characters(group_ip), None)
+
+    def _apply(neighbor_key):
+        method, target_url, bgp_data = operations[neighbor_key]
+        vrf_name, asn, group_ip = neighbor_key
+        if method == "DELETE":
+            response = kwargs["s"].delete(target_url, verify=False)
+        else:
+            data = json.dumps(bgp_data, sort_keys=True, indent=4)
+            response = kwargs["s"].request(method, target_url, data=data, verify=False)
+
+        action = {"POST": "Creating", "PUT": "Updating", "DELETE": "Deleting"}[method]
+        if not common_ops._response_ok(response, method):
+            print("FAIL: %s BGP Neighbor '%s' for ASN '%s' in VRF '%s' failed with status code %d"
+                  % (action, group_ip, asn, vrf_name, response.status_code))
+            return False
+        print("SUCCESS: %s BGP Neighbor '%s' for ASN '%s' in VRF '%s' succeeded" % (action, group_ip, asn, vrf_name))
+        return True
+
+    results.update(fleet.run_parallel(_apply, dict((key, key) for key in operations), max_workers))
+    return dict((key, bool(result)) for key, result in results.items())
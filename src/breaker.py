@@ -0,0 +1,105 @@
+import threading
+import time
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """
+    Raised instead of sending a request to a switch whose circuit breaker is open.
+    """
+
+
+class CircuitBreaker(object):
+    """
+    Fast-fail guard for one switch.
+
+    After 'failure_threshold' consecutive failures (connection errors, timeouts or 502/503/504 responses) the breaker
+    opens and every request fails immediately with CircuitOpenError, so a dead switch costs no more wall time.
+    After 'reset_timeout' seconds a single trial request is let through (half-open): success closes the breaker,
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0, failure_status_codes=(502, 503, 504)):
+        """
+        :param failure_threshold: Number of consecutive failures that opens the breaker
+        :param reset_timeout: Seconds the breaker stays open before a trial request is allowed
+        :param failure_status_codes: Status codes counted as failures of the switch
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_status_codes = frozenset(failure_status_codes)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.rejected = 0
+        self.last_error = None
+        self._opened_at = 0.0
+        self._trial_inflight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """
+        Check whether a request may be sent.
+
+        :return: True if the request is the trial request of a half-open breaker, which must be followed by
+            end_trial() once the request is over
+        :raises CircuitOpenError: if the breaker is open, or half-open with a trial request already in flight
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_inflight = False
+            if self.state == CLOSED:
+                return False
+            if self.state == HALF_OPEN and not self._trial_inflight:
+                self._trial_inflight = True
+                return True
+            self.rejected += 1
+            raise CircuitOpenError("Circuit breaker is %s after %d consecutive failures (last error: %s)"
+                                   % (self.state, self.consecutive_failures, self.last_error))
+
+    def end_trial(self):
+        """
+        Mark the trial request as over. If it ended without a response or failure being recorded, e.g. because it
+        raised an exception unrelated to the switch, the breaker stays half-open and lets the next request through.
+
+        :return: Nothing
+        """
+        with self._lock:
+            self._trial_inflight = False
+
+    def record_response(self, status_code):
+        """
+        Record a response received from the switch.
+
+        :param status_code: Status code of the response
+        :return: Nothing
+        """
+        if status_code in self.failure_status_codes:
+            self.record_failure("status code %d" % status_code)
+        else:
+            with self._lock:
+                self.state = CLOSED
+                self.consecutive_failures = 0
+                self._trial_inflight = False
+
+    def record_failure(self, error):
+        """
+        Record a failed request.
+
+        :param error: Exception or description of the failure
+        :return: Nothing
+        """
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_inflight = False
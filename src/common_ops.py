@@ -1,3 +1,6 @@
+import functools
+
+
 def _list_remove_duplicates(list_with_dup):
     """
     Return a copy of a list without duplicated items.
@@ -10,22 +13,33 @@ def _list_remove_duplicates(list_with_dup):
     return list_no_dup
 
 
+# Characters percent-encoded in the keys of REST API URIs, and their encoding
+_SPECIAL_CHARACTERS = {":": "%3A", "/": "%2F", ",": "%2C"}
+_ENCODE_TABLE = str.maketrans(_SPECIAL_CHARACTERS)
+# Tables whose entries have several keys in separate segments of v1 URIs, e.g. /rest/v1/system/acls/<name>/<type>;
+# v10.04 joins them with commas in one segment
+_V1_KEY_SEGMENTS = {"acls": 2, "macs": 2}
+
+
+@functools.lru_cache(maxsize=8192)
 def _replace_percents(str_percents):
     """
     Replaces percent-encoded pieces in a string with their special-character counterparts
         '%3A' -> ':'
         '%2F' -> '/'
         '%2C' -> ','
-    (e.g. "1/1/9" -> "1%2F1%2F9")
+    (e.g. "1%2F1%2F9" -> "1/1/9")
+    Results are cached, since the same interface names are decoded over and over.
 
     :param str_percents: string in which to substitute characters
     :return: new string with percent phrases replaced by their special-character counterparts
     """
-    str_special_chars = str_percents.replace("%3A", ":").replace("%2F", "/").replace(
-        "%2C", ",")
-    return str_special_chars
+    if "%" not in str_percents:
+        return str_percents
+    return str_percents.replace("%3A", ":").replace("%2F", "/").replace("%2C", ",")
 
 
+@functools.lru_cache(maxsize=8192)
 def _replace_special_characters(str_special_chars):
     """
     Replaces special characters in a string with their percent-encoded counterparts
@@ -33,13 +47,143 @@ def _replace_special_characters(str_special_chars):
         '/' -> '%2F'
         ',' -> '%2C'
     (e.g. "1/1/9" -> "1%2F1%2F9")
+    Results are cached, since the same interface names are encoded over and over.
 
     :param str_special_chars: string in which to substitute characters
     :return: new string with characters replaced by their percent-encoded counterparts
     """
-    str_percents = str_special_chars.replace(":", "%3A").replace("/", "%2F").replace(
-        ",", "%2C")
-    return str_percents
+    return str_special_chars.translate(_ENCODE_TABLE)
+
+
+def _uri_key(uri):
+    """
+    Return the decoded last segment of a reference URI, i.e. the key of the entry it points to.
+    Example input:
+        "/rest/v10.04/system/interfaces/1%2F1%2F21"
+    Example output:
+        "1/1/21"
+
+    :param uri: Reference URI
+    :return: Entry key
+    """
+    return _replace_percents(uri.rstrip('/').rpartition('/')[2])
+
+
+def _ref_key(ref):
+    """
+    Return the key of the entry a reference attribute points to, whatever form the reference takes: a URI (depth 0
+    or v1) or a dictionary {key: URI} (v10.04 at depth 1).
+
+    :param ref: Reference URI, dictionary {key: URI}, or None
+    :return: Entry key, or None
+    """
+    if isinstance(ref, dict):
+        key = next(iter(ref), None)
+        return _replace_percents(key) if key is not None else None
+    return _uri_key(ref) if ref else None
+
+
+def _parse_uri(uri):
+    """
+    Split a reference URI into the path of its table and the keys of the entry.
+    Example inputs:
+        "/rest/v10.04/system/interfaces/1%2F1%2F21"
+        "/rest/v10.04/system/vlans/1/macs/dynamic,00%3A50%3A56%3A96%3Aa4%3A5b"
+        "/rest/v1/system/vlans/1/macs/dynamic/00%3A50%3A56%3A96%3Aa4%3A5b"
+    Example outputs:
+        ("interfaces", ("1/1/21",))
+        ("vlans/macs", ("1", "dynamic", "00:50:56:96:a4:5b"))
+        ("vlans/macs", ("1", "dynamic", "00:50:56:96:a4:5b"))
+
+    :param uri: Reference URI, with or without the "/rest/<version>/system/" prefix
+    :return: Tuple of the table path (table names joined by '/') and the tuple of decoded keys
+    """
+    segments = uri.strip('/').split('/')
+    start = 0
+    v1 = False
+    if segments[0] == "rest" and len(segments) > 1:
+        v1 = segments[1] == "v1"
+        start = 2
+    if start < len(segments) and segments[start] == "system":
+        start += 1
+
+    tables = []
+    keys = []
+    index = start
+    count = len(segments)
+    while index < count:
+        table = segments[index]
+        tables.append(table)
+        key_segments = _V1_KEY_SEGMENTS.get(table, 1) if v1 else 1
+        for segment in segments[index + 1:index + 1 + key_segments]:
+            # v10.04 joins the keys of multi-key entries with commas before percent-encoding them
+            for key in segment.split(',') if ',' in segment else (segment,):
+                keys.append(_replace_percents(key) if '%' in key else key)
+        index += 1 + key_segments
+    return "/".join(tables), tuple(keys)
+
+
+def _expand_interface_ranges(names_or_ranges):
+    """
+    Expand interface names and ranges into a list of interface names, without duplicates.
+    Example input:
+        "1/1/1-1/1/4,1/1/10-12,lag1"
+    Example output:
+        ["1/1/1", "1/1/2", "1/1/3", "1/1/4", "1/1/10", "1/1/11", "1/1/12", "lag1"]
+
+    :param names_or_ranges: Comma-separated string or list of interface names and ranges "<first>-<last>", where
+        <last> is either a full interface name or the last port number
+    :return: List of interface names
+    """
+    if isinstance(names_or_ranges, str):
+        names_or_ranges = names_or_ranges.split(",")
+    names = []
+    for item in names_or_ranges:
+        item = item.strip()
+        if "-" not in item:
+            if item:
+                names.append(item)
+            continue
+        first, last = (part.strip() for part in item.split("-", 1))
+        prefix, _, first_port = first.rpartition("/")
+        last_prefix, _, last_port = last.rpartition("/")
+        if (last_prefix and last_prefix != prefix) or not first_port.isdigit() or not last_port.isdigit():
+            raise Exception("ERROR: Interface range '%s' should be of the form '1/1/1-1/1/48' or '1/1/1-48'" % item)
+        names.extend("%s/%d" % (prefix, port_number) if prefix else str(port_number)
+                     for port_number in range(int(first_port), int(last_port) + 1))
+    return list(dict.fromkeys(names))
+
+
+def _expand_vlan_ranges(vlans):
+    """
+    Expand VLAN IDs and ranges into a set of integer VLAN IDs.
+    Example input:
+        "10-13,20" or [10, "11-13", 20]
+    Example output:
+        {10, 11, 12, 13, 20}
+
+    :param vlans: Integer, comma-separated string or list of VLAN IDs and ranges "<first>-<last>"
+    :return: Set of integer VLAN IDs
+    """
+    if vlans is None:
+        return set()
+    if isinstance(vlans, (int, str)):
+        vlans = [vlans]
+    vlan_ids = set()
+    for item in vlans:
+        for part in str(item).split(","):
+            part = part.strip()
+            if not part:
+                continue
+            first, _, last = part.partition("-")
+            if not first.strip().isdigit() or (last and not last.strip().isdigit()):
+                raise Exception("ERROR: VLAN range '%s' should be of the form '10' or '10-20'" % part)
+            first = int(first)
+            last = int(last) if last else first
+            if not 1 <= first <= last <= 4094:
+                raise Exception("ERROR: VLAN range '%s' should be within 1-4094" % part)
+            vlan_ids.update(range(first, last + 1))
+    return vlan_ids
 
 
 def _response_ok(response, call_type):
@@ -80,3 +224,142 @@ def _dictionary_to_list_values(dictionary):
     for x in dictionary:
         new_list.append(dictionary[x])
     return new_list
+
+
+def _table_keys(table):
+    """
+    Return the percent-decoded entry keys of a table returned by a 'get_all' function: the keys of a v10.04
+    dictionary, or the last segment of each reference URI of a v1 list.
+    Example input:
+        ["/rest/v1/system/interfaces/1%2F1%2F21", "/rest/v1/system/interfaces/1%2F1%2F22"]
+    Example output:
+        ["1/1/21", "1/1/22"]
+
+    :param table: Dictionary or list returned by the REST API
+    :return: List of entry keys
+    """
+    if isinstance(table, dict):
+        return [_replace_percents(key) for key in table]
+    return [_uri_key(uri) for uri in table]
+
+
+# Base URLs of switches whose firmware rejected the 'filter' query parameter; filters are applied locally for them
+_filter_unsupported = set()
+# Phrases of the 400 response of firmware that does not know a query parameter, as opposed to a bad filter value
+_UNSUPPORTED_PARAMETER_MARKERS = ("unknown query parameter", "invalid query parameter", "unsupported query parameter",
+                                  "unrecognized query parameter", "not supported")
+
+
+def _parse_filters(filters):
+    """
+    Normalize filter expressions into a dictionary of attribute -> expected value.
+    Example input:
+        ["admin=up", "type=vlan"]   or   {"admin": "up", "type": "vlan"}   or   "admin=up,type=vlan"
+    Example output:
+        {"admin": "up", "type": "vlan"}
+
+    :param filters: Dictionary, list of "attribute=value" strings, or comma-separated string of them
+    :return: Dictionary of attribute -> value
+    """
+    if not filters:
+        return {}
+    if isinstance(filters, dict):
+        return dict(filters)
+    if isinstance(filters, str):
+        filters = filters.split(",")
+    parsed = {}
+    for expression in filters:
+        if "=" not in expression:
+            raise Exception("ERROR: Filter '%s' should be of the form 'attribute=value'" % expression)
+        attribute, value = expression.split("=", 1)
+        parsed[attribute.strip()] = value.strip()
+    return parsed
+
+
+def _entry_matches(entry, filters):
+    """
+    Check an entry returned at depth 1 or more against parsed filters. A value matches an attribute equal to it
+    (compared as strings), a reference to the entry it names, or a dictionary or list containing it
+    (e.g. vlan_trunks).
+
+    :param entry: Dictionary of the entry
+    :param filters: Dictionary returned by _parse_filters()
+    :return: True if every filter matches
+    """
+    for attribute, value in filters.items():
+        actual = entry.get(attribute)
+        if isinstance(actual, str) and actual.startswith("/rest/"):
+            # Single reference such as "vrf": "/rest/v10.04/system/vrfs/default" matches the referenced key
+            actual = _uri_key(actual)
+        if isinstance(actual, (dict, list)):
+            if str(value) not in actual and value not in actual:
+                return False
+        elif str(actual) != str(value) and not (isinstance(actual, bool) and str(actual).lower() == str(value)):
+            return False
+    return True
+
+
+def _filter_table(table, filters):
+    """
+    Keep the entries of a table (dictionary keyed by entry key, or list) that match parsed filters.
+    """
+    if not filters:
+        return table
+    if isinstance(table, dict):
+        return {key: entry for key, entry in table.items()
+                if isinstance(entry, dict) and _entry_matches(entry, filters)}
+    return [entry for entry in table if isinstance(entry, dict) and _entry_matches(entry, filters)]
+
+
+def _get_table(target_url, attributes=None, filters=None, **kwargs):
+    """
+    Perform a GET call on a table, pushing attribute selection and filters down to the switch.
+
+    Without attributes or filters, the table is fetched as before (references only). Otherwise it is fetched at
+    depth 1 with only the requested attributes (plus those the filters need), and the filters are sent as the
+    'filter' query parameter. A 400 response makes the call be repeated without 'filter'; if the response said the
+    parameter itself is not supported, the firmware is remembered and only gets the attribute selection from then
+    on. The filters are always applied to the result as well, so firmware silently ignoring them is also covered.
+
+    :param target_url: URL of the table
+    :param attributes: Optional list of attribute names to return
+    :param filters: Optional filter expressions, see _parse_filters()
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Tuple of the Response object and the (filtered) table, None if the call failed
+    """
+    filters = _parse_filters(filters)
+    if not attributes and not filters:
+        response = kwargs["s"].get(target_url, verify=False)
+        return response, response.json() if _response_ok(response, "GET") else None
+
+    params = {"depth": 1}
+    if attributes:
+        params["attributes"] = ",".join(sorted(set(attributes) | set(filters)))
+    if filters and kwargs["url"] not in _filter_unsupported:
+        params["filter"] = ",".join("%s:%s" % (attribute, value) for attribute, value in filters.items())
+        response = kwargs["s"].get(target_url, verify=False, params=params)
+        if response.status_code != 400:
+            return response, _filter_table(response.json(), filters) if _response_ok(response, "GET") else None
+        del params["filter"]
+        rejected = response
+        response = kwargs["s"].get(target_url, verify=False, params=params)
+        if _response_ok(response, "GET") and _rejects_parameter(rejected, "filter"):
+            _filter_unsupported.add(kwargs["url"])
+    else:
+        response = kwargs["s"].get(target_url, verify=False, params=params)
+    return response, _filter_table(response.json(), filters) if _response_ok(response, "GET") else None
+
+
+def _rejects_parameter(response, parameter):
+    """
+    Check whether a 400 response says a query parameter is not supported, rather than e.g. that one of its values
+    names an unknown attribute.
+
+    :param response: Response object
+    :param parameter: Name of the query parameter
+    :return: True if the response rejects the parameter itself
+    """
+    text = response.text.lower()
+    return parameter in text and any(marker in text for marker in _UNSUPPORTED_PARAMETER_MARKERS)
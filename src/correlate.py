@@ -0,0 +1,186 @@
+from src import arp, common_ops, fleet, mac_index, output, vrf
+
+import ipaddress
+import threading
+
+
+def _normalize_ip(ip):
+    return str(ipaddress.ip_address(ip.split('/')[0] if isinstance(ip, str) else ip))
+
+
+def parse_neighbors(neighbor_data):
+    """
+    Convert the output of arp.get_all_neighbors() into (IP address, MAC integer, port, physical port) tuples.
+
+    :param neighbor_data: List/dict returned by arp.get_all_neighbors() at depth 1
+    :return: List of (IP address, MAC integer, port name, physical port name) tuples
+    """
+    neighbors = []
+    items = neighbor_data.values() if isinstance(neighbor_data, dict) else neighbor_data
+    for neighbor in items:
+        if not isinstance(neighbor, dict) or not neighbor.get('ip_address') or not neighbor.get('mac'):
+            continue
+        neighbors.append((_normalize_ip(neighbor['ip_address']),
+                          mac_index.mac_to_int(neighbor['mac']),
+                          mac_index._port_name(neighbor.get('port')),
+                          mac_index._port_name(neighbor.get('phy_port'))))
+    return neighbors
+
+
+class Correlator(object):
+    """
+    In-memory join of the Neighbors (ARP/ND) tables of every VRF with the MAC tables of every switch in a fleet,
+    answering "which access port is IP x on" without touching the switches.
+
+    The access port of a MAC is the location where it is learned on the port with the fewest MAC addresses,
+    since uplinks and inter-switch links learn the MACs of everything behind them. Ports listed as uplinks are
+    never reported.
+    """
+
+    def __init__(self, uplinks=None):
+        """
+        :param uplinks: Optional iterable of (switch, port name) pairs that must never be reported as access ports
+        """
+        self.macs = mac_index.MacIndex()
+        self.uplinks = set(uplinks or ())
+        # IP address -> {(switch, vrf): (mac_int, port name, physical port name)}
+        self._neighbors = {}
+        # (switch, vrf) -> set of IP addresses resolved there, so a refresh only touches its own entries
+        self._slices = {}
+        self._port_counts = {}
+        self._lock = threading.Lock()
+
+    def refresh_neighbors(self, switch, vrf_name, neighbors):
+        """
+        Replace the neighbor entries of one VRF on one switch.
+
+        :param switch: Switch identifier, e.g. its IP address
+        :param vrf_name: Alphanumeric name of VRF
+        :param neighbors: Iterable of tuples as returned by parse_neighbors()
+        :return: Nothing
+        """
+        key = (switch, vrf_name)
+        with self._lock:
+            self._drop_slice(key)
+            ips = set()
+            for ip, mac_int, port_name, phy_port_name in neighbors:
+                self._neighbors.setdefault(ip, {})[key] = (mac_int, port_name, phy_port_name)
+                ips.add(ip)
+            if ips:
+                self._slices[key] = ips
+
+    def _drop_slice(self, key):
+        for ip in self._slices.pop(key, ()):
+            locations = self._neighbors[ip]
+            del locations[key]
+            if not locations:
+                del self._neighbors[ip]
+
+    def forget_vrfs(self, switch, vrf_names=None):
+        """
+        Remove the neighbor entries of VRFs of one switch, e.g. VRFs deleted from the switch.
+
+        :param switch: Switch identifier
+        :param vrf_names: Iterable of VRF names to keep, or None to remove every VRF of the switch
+        :return: Nothing
+        """
+        keep = set(vrf_names or ())
+        with self._lock:
+            for key in [key for key in self._slices if key[0] == switch and key[1] not in keep]:
+                self._drop_slice(key)
+
+    def collect(self, switch, max_workers=4, **kwargs):
+        """
+        Perform GET calls to refresh the neighbor entries of every VRF and the MAC table of one switch.
+        The entries of a VRF whose GET fails are kept as they were; VRFs no longer on the switch are removed.
+
+        :param switch: Switch identifier
+        :param max_workers: Maximum number of concurrent calls to the switch
+        :param kwargs:
+            keyword s: requests.session object with loaded cookie jar
+            keyword url: URL in main() function
+        :return: Nothing
+        """
+        # The getters print a failure and return an empty table rather than raising; run_checked() raises instead,
+        # so that a failed GET is not mistaken for an empty table and does not wipe the known entries
+        try:
+            vrf_names = common_ops._table_keys(output.run_checked(vrf.get_all_vrfs, **kwargs))
+        except Exception:
+            vrf_names = None
+        if vrf_names is not None:
+            results = fleet.run_parallel(
+                lambda vrf_name: output.run_checked(arp.get_all_neighbors, vrf_name, **kwargs),
+                {vrf_name: vrf_name for vrf_name in vrf_names}, max_workers)
+            for vrf_name, neighbor_data in results.items():
+                if neighbor_data is not None:
+                    self.refresh_neighbors(switch, vrf_name, parse_neighbors(neighbor_data))
+            self.forget_vrfs(switch, vrf_names)
+        self.macs.collect(switch, max_workers=max_workers, **kwargs)
+
+    def collect_fleet(self, session_dicts, max_workers=16):
+        """
+        Refresh the neighbor and MAC tables of many switches concurrently, then rebuild the join.
+
+        :param session_dicts: Dictionary keyed by switch IP with a session dictionary (keys 's' and 'url') as value
+        :param max_workers: Maximum number of switches refreshed concurrently
+        :return: Nothing
+        """
+        fleet.run_parallel(lambda switch: self.collect(switch, **session_dicts[switch]),
+                           {switch: switch for switch in session_dicts}, max_workers)
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Recompute the per-port MAC counts used to pick access ports. Called by collect_fleet(); call it after
+        refreshing switches one by one.
+
+        :return: Nothing
+        """
+        self._port_counts = self.macs.port_mac_counts()
+
+    def _access_location(self, mac_int):
+        candidates = [location for location in self.macs.lookup(mac_int)
+                      if location[2] is not None and (location[0], location[2]) not in self.uplinks]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda location: self._port_counts.get((location[0], location[2]), 0))
+
+    def locate(self, ip):
+        """
+        Return where an IP address is attached to the network.
+
+        :param ip: IPv4 or IPv6 address
+        :return: Dictionary with the keys 'ip', 'mac', 'switch', 'vlan', 'port' and 'type' for the access port,
+            'neighbors' listing the (switch, VRF, port, physical port) entries the IP was resolved on and
+            'locations' listing every (switch, VLAN, port, type) the MAC is learned on; None if the IP is unknown
+        """
+        ip = _normalize_ip(ip)
+        with self._lock:
+            neighbor_locations = dict(self._neighbors.get(ip, {}))
+        if not neighbor_locations:
+            return None
+
+        mac_int = next(iter(neighbor_locations.values()))[0]
+        neighbors = []
+        for (switch, vrf_name), (_, port_name, phy_port_name) in sorted(neighbor_locations.items()):
+            neighbors.append((switch, vrf_name, port_name, phy_port_name))
+        result = {
+            "ip": ip,
+            "mac": mac_index.int_to_mac(mac_int),
+            "switch": None, "vlan": None, "port": None, "type": None,
+            "neighbors": neighbors,
+            "locations": self.macs.lookup(mac_int),
+        }
+        access = self._access_location(mac_int)
+        if access is not None:
+            result["switch"], result["vlan"], result["port"], result["type"] = access
+        return result
+
+    def locate_many(self, ips):
+        """
+        Return where each of many IP addresses is attached, e.g. for every IP in an incident report.
+
+        :param ips: Iterable of IPv4 or IPv6 addresses
+        :return: Dictionary keyed by the IP address as given, with the result of locate() as value
+        """
+        return {ip: self.locate(ip) for ip in ips}
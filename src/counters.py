@@ -0,0 +1,196 @@
+from src import interface
+
+import numpy
+
+# Interface counters kept by default; any other counter returned by the switch is ignored unless requested
+DEFAULT_COUNTERS = ("rx_bytes", "tx_bytes", "rx_packets", "tx_packets",
+                    "rx_errors", "tx_errors", "rx_dropped", "tx_dropped")
+
+
+class CounterMatrix(object):
+    """
+    Columnar store for interface counters collected across many switches.
+
+    Counters are held in a single NumPy array indexed by (switch, port, counter) instead of nested dictionaries,
+    so fleet-wide top-N, percentile and threshold queries are answered with vectorized operations.
+    Port names are shared across switches (e.g. "1/1/1"), so the port axis is the union of all port names seen.
+    """
+
+    def __init__(self, counters=DEFAULT_COUNTERS, dtype=numpy.uint64):
+        """
+        :param counters: Sequence of counter names to store, e.g. ("rx_bytes", "tx_bytes")
+        :param dtype: NumPy data type of the stored counters. Defaults to unsigned 64-bit integers.
+        """
+        self.counters = tuple(counters)
+        self._counter_index = {name: i for i, name in enumerate(self.counters)}
+        self._switch_index = {}
+        self._port_index = {}
+        self.switches = []
+        self.ports = []
+        self.data = numpy.zeros((0, 0, len(self.counters)), dtype=dtype)
+        # True where the (switch, port) pair actually exists, so absent ports never show up in query results
+        self.present = numpy.zeros((0, 0), dtype=bool)
+
+    def _grow(self, n_switches, n_ports):
+        """
+        Grow the backing arrays so they hold at least n_switches x n_ports cells, doubling capacity as needed.
+
+        :param n_switches: Number of switches that must fit
+        :param n_ports: Number of ports that must fit
+        :return: Nothing
+        """
+        cur_switches, cur_ports = self.present.shape
+        if n_switches <= cur_switches and n_ports <= cur_ports:
+            return
+        new_switches = max(n_switches, cur_switches * 2 if n_switches > cur_switches else cur_switches)
+        new_ports = max(n_ports, cur_ports * 2 if n_ports > cur_ports else cur_ports)
+
+        data = numpy.zeros((new_switches, new_ports, len(self.counters)), dtype=self.data.dtype)
+        data[:cur_switches, :cur_ports] = self.data
+        present = numpy.zeros((new_switches, new_ports), dtype=bool)
+        present[:cur_switches, :cur_ports] = self.present
+        self.data = data
+        self.present = present
+
+    def _switch_row(self, switch):
+        if switch not in self._switch_index:
+            self._switch_index[switch] = len(self.switches)
+            self.switches.append(switch)
+        return self._switch_index[switch]
+
+    def _port_column(self, port_name):
+        if port_name not in self._port_index:
+            self._port_index[port_name] = len(self.ports)
+            self.ports.append(port_name)
+        return self._port_index[port_name]
+
+    def add_switch_statistics(self, switch, statistics_dict):
+        """
+        Store the counters of one switch, replacing any counters previously stored for it.
+
+        :param switch: Switch identifier, e.g. its IP address
+        :param statistics_dict: Dictionary keyed by port name with a dictionary of counters as value, as returned by
+            interface.get_all_interface_statistics()
+        :return: Nothing
+        """
+        row = self._switch_row(switch)
+        columns = [self._port_column(port_name) for port_name in statistics_dict]
+        self._grow(len(self.switches), len(self.ports))
+
+        self.data[row] = 0
+        self.present[row] = False
+        for column, port_stats in zip(columns, statistics_dict.values()):
+            self.present[row, column] = True
+            for counter, value in port_stats.items():
+                counter_idx = self._counter_index.get(counter)
+                if counter_idx is not None:
+                    self.data[row, column, counter_idx] = value
+
+    def collect(self, switch, **kwargs):
+        """
+        Perform a GET call to retrieve the statistics of all Interfaces on a switch and store them in the matrix.
+
+        :param switch: Switch identifier, e.g. its IP address
+        :param kwargs:
+            keyword s: requests.session object with loaded cookie jar
+            keyword url: URL in main() function
+        :return: Nothing
+        """
+        self.add_switch_statistics(switch, interface.get_all_interface_statistics(**kwargs))
+
+    def values(self, counter):
+        """
+        Return a switch x port view of one counter. Cells for absent ports are zero; see the 'present' mask.
+
+        :param counter: Name of the counter
+        :return: 2-D NumPy array
+        """
+        n_switches, n_ports = len(self.switches), len(self.ports)
+        return self.data[:n_switches, :n_ports, self._counter_index[counter]]
+
+    def _present(self):
+        return self.present[:len(self.switches), :len(self.ports)]
+
+    def _cells(self, flat_indices, values):
+        n_ports = len(self.ports)
+        return [(self.switches[i // n_ports], self.ports[i % n_ports], value.item())
+                for i, value in zip(flat_indices, values)]
+
+    def top_n(self, counter, n=10):
+        """
+        Return the n (switch, port) pairs with the highest value of a counter.
+
+        :param counter: Name of the counter
+        :param n: Number of entries to return
+        :return: List of (switch, port, value) tuples in descending order of value
+        """
+        present = self._present().ravel()
+        flat = self.values(counter).ravel()
+        candidates = numpy.flatnonzero(present)
+        if candidates.size == 0:
+            return []
+        n = min(n, candidates.size)
+        candidate_values = flat[candidates]
+        # argpartition keeps this O(cells) instead of sorting the whole fleet
+        top = numpy.argpartition(candidate_values, candidate_values.size - n)[-n:]
+        top = top[numpy.argsort(candidate_values[top])[::-1]]
+        return self._cells(candidates[top], candidate_values[top])
+
+    def percentile(self, counter, q):
+        """
+        Return percentile(s) of a counter across every present (switch, port) pair.
+
+        :param counter: Name of the counter
+        :param q: Percentile or sequence of percentiles between 0 and 100
+        :return: Float, or NumPy array of floats if q is a sequence
+        """
+        return numpy.percentile(self.values(counter)[self._present()], q)
+
+    def above_threshold(self, counter, threshold):
+        """
+        Return every (switch, port) pair whose counter value exceeds a threshold.
+
+        :param counter: Name of the counter
+        :param threshold: Numeric threshold
+        :return: List of (switch, port, value) tuples
+        """
+        values = self.values(counter)
+        flat_indices = numpy.flatnonzero((values > threshold) & self._present())
+        return self._cells(flat_indices, values.ravel()[flat_indices])
+
+    def rates(self, previous, interval):
+        """
+        Compute per-second rates between an earlier sample and this one, e.g. to rank ports by utilization.
+        Switches or ports missing from either sample are left out; counters that went backwards (counter reset or
+        wrap) are reported as zero.
+
+        :param previous: CounterMatrix sampled 'interval' seconds before this one, with the same counters
+        :param interval: Seconds elapsed between the two samples
+        :return: New CounterMatrix of float64 rates
+        """
+        result = CounterMatrix(self.counters, dtype=numpy.float64)
+        result.switches = list(self.switches)
+        result.ports = list(self.ports)
+        result._switch_index = dict(self._switch_index)
+        result._port_index = dict(self._port_index)
+        result._grow(len(self.switches), len(self.ports))
+
+        current = self.data[:len(self.switches), :len(self.ports)].astype(numpy.float64)
+        earlier = numpy.zeros_like(current)
+        earlier_present = numpy.zeros(current.shape[:2], dtype=bool)
+
+        # Map the rows and columns of the earlier sample onto this sample's layout
+        rows = [(i, previous._switch_index[s]) for i, s in enumerate(self.switches) if s in previous._switch_index]
+        cols = [(j, previous._port_index[p]) for j, p in enumerate(self.ports) if p in previous._port_index]
+        if rows and cols:
+            dst_rows, src_rows = map(list, zip(*rows))
+            dst_cols, src_cols = map(list, zip(*cols))
+            earlier[numpy.ix_(dst_rows, dst_cols)] = previous.data[numpy.ix_(src_rows, src_cols)]
+            earlier_present[numpy.ix_(dst_rows, dst_cols)] = previous.present[numpy.ix_(src_rows, src_cols)]
+
+        delta = numpy.clip(current - earlier, 0, None) / float(interval)
+        present = self._present() & earlier_present
+        delta[~present] = 0
+        result.data[:len(self.switches), :len(self.ports)] = delta
+        result.present[:len(self.switches), :len(self.ports)] = present
+        return result
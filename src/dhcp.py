@@ -1,4 +1,4 @@
-from src import common_ops
+from src import common_ops, fleet
 
 import json
 
@@ -71,10 +71,12 @@ def _get_dhcp_relay(vrf_name, port_name, **kwargs):
     return response.json()
 
 
-def get_all_dhcp_relays(**kwargs):
+def get_all_dhcp_relays(attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get a list (or dictionary) of all entries in DHCP Relays table
 
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["port", "ipv4_ucast_server"]
+    :param filters: Optional filters on attribute values, e.g. ["vrf=default"]; see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
@@ -82,15 +84,15 @@ def get_all_dhcp_relays(**kwargs):
     """
     target_url = kwargs["url"] + "system/dhcp_relays"
 
-    response = kwargs["s"].get(target_url, verify=False)
+    response, dhcp_helpers = common_ops._get_table(target_url, attributes, filters, **kwargs)
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting list/dict of all DHCP Relay table entries failed with status code %d"
               % response.status_code)
+        dhcp_helpers = response.json()
     else:
         print("SUCCESS: Getting list/dict of all DHCP Relay table entries succeeded")
 
-    dhcp_helpers = response.json()
     return dhcp_helpers
 
 
@@ -311,3 +313,117 @@ def _delete_dhcp_relays(port_name, vrf_name="default", **kwargs):
     else:
         print("SUCCESS: No need to delete DHCP relays from SVI Port '%s' since they don't exist"
               % port_name)
+
+
+def sync_dhcp_relays(relays, prune=False, max_workers=8, **kwargs):
+    """
+    Make the IPv4 DHCP helpers of many L3 interfaces match a desired state. The DHCP Relay table is read once,
+    the helpers of every interface are compared as sets, and only the needed POST (new entry), PUT (changed helpers)
+    and DELETE (no helpers left) calls are sent, concurrently. The 8-helper limit is checked for every interface
+    before any call is sent.
+
+    :param relays: Dictionary keyed by (VRF name, Port name) tuples with the list of IPv4 helper addresses as value,
+        e.g. {("default", "vlan10"): ["10.1.1.1", "10.1.1.2"]}. An empty list deletes the interface's helpers.
+    :param prune: If True, also delete the helpers of interfaces that are not in relays
+    :param max_workers: Maximum number of concurrent calls to the switch
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by (VRF name, Port name), True if the interface's helpers are as requested (changed or
+        unchanged), False otherwise
+    """
+    desired = {}
+    for (vrf_name, port_name), ipv4_helper_addresses in relays.items():
+        helpers = list(dict.fromkeys(ipv4_helper_addresses or []))
+        if len(helpers) > 8:
+            raise Exception("Can't have more than 8 IPv4 DHCP helpers per interface! ('%s' in VRF '%s' has %d)"
+                            % (port_name, vrf_name, len(helpers)))
+        desired[(vrf_name, port_name)] = helpers
+
+    if kwargs["url"].endswith("/v1/"):
+        version = "v1"
+        payload = {"depth": 1, "selector": "configuration"}
+        port_table = "ports"
+    else:  # Updated else for when version is v10.04
+        version = "v10.04"
+        payload = {"depth": 1, "selector": "writable"}
+        port_table = "interfaces"
+
+    response = kwargs["s"].get(kwargs["url"] + "system/dhcp_relays", verify=False, params=payload)
+    if not common_ops._response_ok(response, "GET"):
+        print("FAIL: Getting list/dict of all DHCP Relay table entries failed with status code %d"
+              % response.status_code)
+        return {relay_key: False for relay_key in desired}
+    print("SUCCESS: Getting list/dict of all DHCP Relay table entries succeeded")
+
+    current = {}
+    table = response.json()
+    if isinstance(table, dict):
+        # v10.04 keys are "<VRF name>,<Port name>"
+        for key, dhcp_data in table.items():
+            if isinstance(dhcp_data, dict):
+                vrf_name, _, port_name = common_ops._replace_percents(key).partition(",")
+                current[(vrf_name, port_name)] = dhcp_data
+    else:
+        for dhcp_data in table:
+            if isinstance(dhcp_data, dict):
+                relay_key = (common_ops._ref_key(dhcp_data.get('vrf')),
+                             common_ops._ref_key(dhcp_data.get('port')))
+                current[relay_key] = dhcp_data
+
+    if prune:
+        for relay_key in current:
+            desired.setdefault(relay_key, [])
+
+    def _entry_url(vrf_name, port_name):
+        separator = "/" if version == "v1" else ","
+        return kwargs["url"] + "system/dhcp_relays/%s%s%s" % (common_ops._replace_special_characters(vrf_name),
+                                                               separator,
+                                                               common_ops._replace_special_characters(port_name))
+
+    operations = {}
+    results = {}
+    for (vrf_name, port_name), helpers in desired.items():
+        dhcp_data = current.get((vrf_name, port_name))
+        if dhcp_data is None and not helpers:
+            print("SUCCESS: No need to delete DHCP relays from SVI Port '%s' since they don't exist" % port_name)
+            results[(vrf_name, port_name)] = True
+        elif dhcp_data is None:
+            dhcp_relays = {
+                "port": "/rest/%s/system/%s/%s" % (version, port_table,
+                                                    common_ops._replace_special_characters(port_name)),
+                "vrf": "/rest/%s/system/vrfs/%s" % (version, vrf_name),
+                "ipv4_ucast_server": helpers
+            }
+            operations[(vrf_name, port_name)] = ("POST", kwargs["url"] + "system/dhcp_relays", dhcp_relays)
+        elif not helpers:
+            operations[(vrf_name, port_name)] = ("DELETE", _entry_url(vrf_name, port_name), None)
+        elif set(dhcp_data.get('ipv4_ucast_server') or []) == set(helpers):
+            print("SUCCESS: No need to update IPv4 DHCP helpers of SVI Port '%s'" % port_name)
+            results[(vrf_name, port_name)] = True
+        else:
+            dhcp_data = dict(dhcp_data, ipv4_ucast_server=helpers)
+            # Must remove these items from json since they can't be modified
+            for attribute in ('port', 'vrf', 'dhcp_relay_v6_mcast_servers'):
+                dhcp_data.pop(attribute, None)
+            operations[(vrf_name, port_name)] = ("PUT", _entry_url(vrf_name, port_name), dhcp_data)
+
+    def _apply(relay_key):
+        method, target_url, dhcp_data = operations[relay_key]
+        port_name = relay_key[1]
+        if method == "DELETE":
+            response = kwargs["s"].delete(target_url, verify=False)
+        else:
+            data = json.dumps(dhcp_data, sort_keys=True, indent=4)
+            response = kwargs["s"].request(method, target_url, data=data, verify=False)
+
+        if not common_ops._response_ok(response, method):
+            print("FAIL: Setting IPv4 DHCP helpers %s on SVI Port '%s' failed with status code %d"
+                  % (repr(desired[relay_key]), port_name, response.status_code))
+            return False
+        print("SUCCESS: Setting IPv4 DHCP helpers %s on SVI Port '%s' succeeded"
+              % (repr(desired[relay_key]), port_name))
+        return True
+
+    results.update(fleet.run_parallel(_apply, {relay_key: relay_key for relay_key in operations}, max_workers))
+    return {relay_key: bool(results[relay_key]) for relay_key in desired}
@@ -0,0 +1,449 @@
+from src import common_ops, session
+
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import heapq
+import json
+import os
+import threading
+
+import requests
+
+# Status codes returned for writes that are planned but not sent, as expected by common_ops._response_ok()
+PLANNED_STATUS = {"POST": 201, "PUT": 200, "PATCH": 200, "DELETE": 204}
+READ_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+
+# Attributes making up the key of an entry POSTed to a table, by table name; other tables use 'name' or 'id'
+INDEX_ATTRIBUTES = {
+    "acls": ("name", "list_type"),
+    "areas": ("area_id",),
+    "bgp_neighbors": ("ip_or_ifname_or_group_name",),
+    "bgp_routers": ("asn",),
+    "cfg_aces": ("sequence_number",),
+    "cfg_entries": ("sequence_number",),
+    "classes": ("name", "type"),
+    "dhcp_relays": ("vrf", "port"),
+    "evpn_vlans": ("vlan",),
+    "ospf_routers": ("instance_tag",),
+    "port_access_auth_configurations": ("authentication_method",),
+    "q_profile_entries": ("queue_number",),
+    "queues": ("queue_number",),
+    "virtual_network_ids": ("type", "id"),
+    "vlans": ("id",),
+}
+
+
+class Operation(object):
+    """
+    One HTTP request of a plan.
+    """
+
+    __slots__ = ("method", "path", "request_bytes", "response_bytes", "source")
+
+    def __init__(self, method, path, request_bytes, response_bytes, source):
+        """
+        :param method: HTTP method
+        :param path: Request path relative to the base URL, with the query string
+        :param request_bytes: Size of the request body
+        :param response_bytes: Size of the response body
+        :param source: Where the response came from: 'snapshot', 'live', 'missing' (read not in the snapshot),
+            'planned' (write not sent) or 'session' (login/logout)
+        """
+        self.method = method
+        self.path = path
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        self.source = source
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class Snapshot(object):
+    """
+    GET responses of one switch, keyed by path and query string, stored as a JSON file.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: Optional JSON file to load the snapshot from and save it to
+        """
+        self.path = path
+        self.responses = {}
+        self.modified = False
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path) as snapshot_file:
+                self.responses = json.load(snapshot_file)
+
+    def get(self, key):
+        with self._lock:
+            return self.responses.get(key)
+
+    def put(self, key, status_code, body):
+        with self._lock:
+            self.responses[key] = {"status": status_code, "body": body}
+            self.modified = True
+
+    def save(self):
+        """
+        Write the snapshot to its file if it was modified.
+
+        :return: Nothing
+        """
+        if self.path is None or not self.modified:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            with open(self.path, "w") as snapshot_file:
+                json.dump(self.responses, snapshot_file, sort_keys=True, indent=1)
+            self.modified = False
+
+
+def _request_key(path, params):
+    if isinstance(params, dict):
+        params = sorted((key, str(value)) for key, value in params.items() if value is not None)
+    return path + ("?" + urlencode(params) if params else "")
+
+
+def _body_bytes(kwargs):
+    if kwargs.get("json") is not None:
+        return len(json.dumps(kwargs["json"]).encode("utf-8"))
+    data = kwargs.get("data")
+    if data is None:
+        return 0
+    if isinstance(data, dict):
+        return len(urlencode(data).encode("utf-8"))
+    return len(data.encode("utf-8") if isinstance(data, str) else data)
+
+
+def _json_body(kwargs):
+    if kwargs.get("json") is not None:
+        return kwargs["json"]
+    try:
+        return json.loads(kwargs["data"]) if kwargs.get("data") is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _index_value(value):
+    # References are URIs ending with the percent-encoded key of the entry they point to
+    if isinstance(value, str) and value.startswith("/rest/"):
+        return value.rstrip("/").rsplit("/", 1)[-1]
+    return common_ops._replace_special_characters(str(value))
+
+
+def _entry_key(table_path, entry, separator):
+    """
+    Derive the key of a table entry from its index attributes, as used in the entry URI.
+
+    :param table_path: Path of the table
+    :param entry: Dictionary of the entry, e.g. a POST body
+    :param separator: Separator of the parts of a multi-attribute key: ',' for v10.04, '/' for v1
+    :return: Percent-encoded key, None if the entry does not have its index attributes
+    """
+    if not isinstance(entry, dict):
+        return None
+    index = INDEX_ATTRIBUTES.get(table_path.rsplit("/", 1)[-1])
+    if index is None:
+        index = [next((attribute for attribute in ("name", "id") if attribute in entry), "name")]
+    if any(entry.get(attribute) is None for attribute in index):
+        return None
+    return separator.join(_index_value(entry[attribute]) for attribute in index)
+
+
+def _v1_table_path(path, default):
+    """
+    :return: Path of the table of a v1 entry path, whose key spans several segments if the table is indexed by
+        several attributes, e.g. 'system/acls' for 'system/acls/<name>/<type>'
+    """
+    segments = path.split("/")
+    for position in range(len(segments) - 2, -1, -1):
+        index = INDEX_ATTRIBUTES.get(segments[position])
+        if index is not None and len(index) == len(segments) - 1 - position:
+            return "/".join(segments[:position + 1])
+    return default
+
+
+def _query(url, params):
+    query = dict(parse_qsl(urlsplit(url).query))
+    if isinstance(params, dict):
+        query.update(params)
+    return query
+
+
+def _make_response(method, url, status_code, body=None):
+    response = requests.models.Response()
+    response.status_code = status_code
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers["Content-Type"] = "application/json"
+    response._content = json.dumps(body).encode("utf-8") if body is not None else b""
+    response.request = requests.models.Request(method, url).prepare()
+    return response
+
+
+class DryRunSession(requests.Session):
+    """
+    Stand-in for session.Session that records the requests it is given instead of sending writes.
+
+    Reads are answered from a Snapshot; a read missing from the snapshot is sent to the switch when a live session
+    is given (and added to the snapshot), and otherwise answered with a 404 and an empty object, as if the object
+    did not exist.
+    Writes are recorded and answered with the status code the switch would return on success. The body of a POST
+    is served to later reads of the entry it creates (see INDEX_ATTRIBUTES), the body of a PUT to later reads of
+    the same path and a DELETE makes them return 404; reads of the tables list created entries and leave out
+    deleted ones. Sequences creating, reading and modifying entries thus see their own planned changes.
+    Pass it as keyword 's' to any /src function to plan its requests.
+    """
+
+    def __init__(self, base_url, snapshot=None, live_session=None):
+        """
+        :param base_url: URL in main() function
+        :param snapshot: Snapshot to serve reads from. Defaults to an empty in-memory Snapshot.
+        :param live_session: Optional logged-in session.Session used for reads missing from the snapshot
+        """
+        super(DryRunSession, self).__init__()
+        self.base_url = base_url
+        self.snapshot = snapshot if snapshot is not None else Snapshot()
+        self.live_session = live_session
+        self.operations = []
+        self._overlay = {}
+        # Planned entries by table path, as {key: body}, with None for a deleted entry
+        self._table_changes = {}
+        self._separator = "/" if base_url.endswith("/v1/") else ","
+        self._lock = threading.Lock()
+
+    def _path(self, url):
+        return url[len(self.base_url):] if url.startswith(self.base_url) else url
+
+    def _record(self, method, path, request_bytes, response, source):
+        with self._lock:
+            self.operations.append(Operation(method, path, request_bytes, len(response.content), source))
+        return response
+
+    def request(self, method, url, params=None, **kwargs):
+        method = method.upper()
+        path = self._path(url.split("?")[0])
+        key = _request_key(self._path(url), params)
+        request_bytes = _body_bytes(kwargs)
+
+        if path in ("login", "logout"):
+            return self._record(method, key, request_bytes, _make_response(method, url, 200), "session")
+
+        if method not in READ_METHODS:
+            with self._lock:
+                self._plan_write(method, path, _json_body(kwargs))
+            response = _make_response(method, url, PLANNED_STATUS.get(method, 200))
+            return self._record(method, key, request_bytes, response, "planned")
+
+        with self._lock:
+            in_overlay = path in self._overlay
+            overlay_body = self._overlay.get(path)
+            table_changes = dict(self._table_changes.get(path, {}))
+        if in_overlay:
+            status_code = 200 if overlay_body is not None else 404
+            response = _make_response(method, url, status_code, overlay_body if overlay_body is not None else {})
+            return self._record(method, key, request_bytes, response, "planned")
+
+        cached = self.snapshot.get(key)
+        if cached is not None:
+            status_code, body, source = cached["status"], cached["body"], "snapshot"
+        elif self.live_session is not None:
+            live_response = self.live_session.request(method, url, params=params, **kwargs)
+            try:
+                body = live_response.json()
+            except ValueError:
+                body = None
+            self.snapshot.put(key, live_response.status_code, body)
+            status_code, source = live_response.status_code, "live"
+        else:
+            # Many /src getters parse the body even on failure; an empty object reads as "no such entries"
+            status_code, body, source = 404, {}, "missing"
+
+        if table_changes:
+            # A table missing from the snapshot is taken as empty, holding only the planned entries
+            body = self._changed_table(path, body if status_code == 200 else None, table_changes, _query(url, params))
+            status_code, source = 200, "planned"
+        return self._record(method, key, request_bytes, _make_response(method, url, status_code, body), source)
+
+    def _plan_write(self, method, path, body):
+        """
+        Record the effect of a planned write on later reads of the entry and of its table.
+        """
+        if method == "POST":
+            entry_key = _entry_key(path, body, self._separator)
+            if entry_key is None:
+                return
+            table_path, entry_path = path, path + "/" + entry_key
+        else:
+            table_path, _, entry_key = path.rpartition("/")
+            entry_path = path
+        if method == "DELETE":
+            body = None
+        elif body is None:
+            return
+        elif method == "PATCH" and isinstance(self._overlay.get(entry_path), dict):
+            body = dict(self._overlay[entry_path], **body)
+        self._overlay[entry_path] = body
+        if self._separator == "/" and method != "POST":
+            # v1 keys of several attributes span several path segments
+            table_path = _v1_table_path(path, table_path)
+            entry_key = path[len(table_path) + 1:]
+        self._table_changes.setdefault(table_path, {})[entry_key] = body
+
+    def _changed_table(self, table_path, body, table_changes, query):
+        """
+        Apply the planned entries of a table to a table read, at depth 0 (references) or more (entries).
+        """
+        depth = int(query.get("depth", 0) or 0)
+        attributes = [attribute for attribute in str(query.get("attributes", "")).split(",") if attribute]
+        uri_prefix = urlsplit(self.base_url).path + table_path + "/"
+
+        def _entry(entry_key, entry):
+            if not depth:
+                return uri_prefix + entry_key
+            if attributes:
+                return {attribute: entry[attribute] for attribute in attributes if attribute in entry}
+            return entry
+
+        if isinstance(body, list) or (body is None and self._separator == "/"):
+            table = []
+            for item in body or []:
+                item_key = (item[len(uri_prefix):] if isinstance(item, str) and item.startswith(uri_prefix)
+                            else _entry_key(table_path, item, self._separator))
+                if item_key not in table_changes:
+                    table.append(item)
+            table.extend(_entry(entry_key, entry) for entry_key, entry in sorted(table_changes.items())
+                         if entry is not None)
+            return table
+        table = dict(body or {})
+        for entry_key, entry in table_changes.items():
+            if entry is None:
+                table.pop(entry_key, None)
+            else:
+                table[entry_key] = _entry(entry_key, entry)
+        return table
+
+    def plan(self):
+        """
+        :return: Plan of the requests recorded so far
+        """
+        with self._lock:
+            return Plan(list(self.operations))
+
+
+class Plan(object):
+    """
+    Requests recorded by a DryRunSession, with their counts, payload sizes and estimated duration.
+    """
+
+    def __init__(self, operations):
+        self.operations = operations
+
+    def counts(self):
+        """
+        :return: Dictionary keyed by HTTP method with the number of requests as value
+        """
+        counts = {}
+        for operation in self.operations:
+            counts[operation.method] = counts.get(operation.method, 0) + 1
+        return counts
+
+    def estimate_seconds(self, rtt=0.05, bandwidth=None, concurrency=1):
+        """
+        Estimate the wall time of the requests when sent to the switch.
+
+        :param rtt: Round trip time to the switch in seconds, including its processing time
+        :param bandwidth: Optional throughput in bytes per second; payloads then add their transfer time
+        :param concurrency: Number of requests the workflow sends concurrently; workflows are sequential (1)
+        :return: Estimated duration in seconds
+        """
+        total = len(self.operations) * rtt
+        if bandwidth:
+            total += sum(op.request_bytes + op.response_bytes for op in self.operations) / float(bandwidth)
+        return total / max(1, concurrency)
+
+    def report(self, rtt=0.05, bandwidth=None, concurrency=1):
+        """
+        :param rtt: Round trip time to the switch in seconds, see estimate_seconds()
+        :param bandwidth: Optional throughput in bytes per second
+        :param concurrency: Number of requests sent concurrently
+        :return: Dictionary summarizing the plan
+        """
+        writes = [op for op in self.operations if op.source == "planned" and op.method not in READ_METHODS]
+        return {
+            "requests": len(self.operations),
+            "counts": self.counts(),
+            "writes": len(writes),
+            "missing_reads": sum(1 for op in self.operations if op.source == "missing"),
+            "request_bytes": sum(op.request_bytes for op in self.operations),
+            "response_bytes": sum(op.response_bytes for op in self.operations),
+            "estimated_seconds": round(self.estimate_seconds(rtt, bandwidth, concurrency), 3),
+            "operations": ["%s %s" % (op.method, op.path) for op in writes],
+        }
+
+
+def estimate_fleet_seconds(switch_seconds, max_workers=16):
+    """
+    Estimate the wall time of a fleet run in which each switch is processed by one of max_workers workers,
+    the next switch starting as soon as a worker is free.
+
+    :param switch_seconds: List of the estimated duration of every switch
+    :param max_workers: Number of switches processed concurrently
+    :return: Estimated duration in seconds
+    """
+    workers = [0.0] * max(1, min(max_workers, len(switch_seconds)))
+    for seconds in switch_seconds:
+        heapq.heapreplace(workers, workers[0] + seconds)
+    return max(workers) if switch_seconds else 0.0
+
+
+class DryRunPool(session.SessionPool):
+    """
+    SessionPool handing out DryRunSessions, so unmodified workflows calling session.login() are planned instead of
+    run. With a snapshot directory, the reads of each switch are served from <directory>/<switch>.json; with live
+    reads, missing reads are fetched from the switch with a real session and saved to that file by save_snapshots().
+    While it is active, no real session can be created from a thread it does not cover.
+    """
+
+    exclusive = True
+
+    def __init__(self, snapshot_dir=None, live_reads=False, per_switch_limit=None, **session_options):
+        super(DryRunPool, self).__init__(per_switch_limit, **session_options)
+        self.snapshot_dir = snapshot_dir
+        self.live_reads = live_reads
+
+    def _create_session(self, base_url, username, password):
+        host = requests.utils.urlparse(base_url).hostname
+        snapshot_path = os.path.join(self.snapshot_dir, "%s.json" % host) if self.snapshot_dir else None
+        live_session = None
+        if self.live_reads:
+            live_session = super(DryRunPool, self)._create_session(base_url, username, password)
+        return DryRunSession(base_url, Snapshot(snapshot_path), live_session)
+
+    def logout_all(self, max_workers=16):
+        """
+        Log out of the live sessions used for reads, if any. The dry-run sessions and their plans stay available.
+
+        :param max_workers: Maximum number of concurrent logouts
+        :return: Nothing
+        """
+        live = session.SessionPool()
+        with self._lock:
+            for base_url, s in self.sessions.items():
+                if s.live_session is not None:
+                    live.sessions[base_url] = s.live_session
+        live.logout_all(max_workers)
+
+    def save_snapshots(self):
+        """
+        Save the snapshots extended with live reads.
+
+        :return: Nothing
+        """
+        with self._lock:
+            sessions = list(self.sessions.values())
+        for s in sessions:
+            s.snapshot.save()
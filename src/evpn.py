@@ -1,5 +1,5 @@
 import json
-from src import common_ops
+from src import common_ops, fleet
 
 def get_evpn_info(**kwargs):
     """
@@ -72,9 +72,11 @@ def delete_evpn_instance(**kwargs):
         print("SUCCESS: No need to delete EVPN instance since it doesn't exists")
 
 
-def get_evpn_vlan_list(**kwargs):
+def get_evpn_vlan_list(attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to receive a list of VLANs associated with the EVPN instance
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["vlan", "rd"]
+    :param filters: Optional filters on attribute values, e.g. ["rd=auto"]; see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
@@ -82,7 +84,7 @@ def get_evpn_vlan_list(**kwargs):
     """
     target_url = kwargs["url"] + "system/evpns/evpn_vlans"
 
-    response = kwargs["s"].get(target_url, verify=False)
+    response, evpn_vlan_list = common_ops._get_table(target_url, attributes, filters, **kwargs)
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting list of all EVPN VLANs failed with status code %d"
@@ -90,7 +92,6 @@ def get_evpn_vlan_list(**kwargs):
         evpn_vlan_list = []
     else:
         print("SUCCESS: Getting list of all EVPN VLANs succeeded")
-        evpn_vlan_list = response.json()
 
     return evpn_vlan_list
 
@@ -109,6 +110,25 @@ def add_evpn_vlan(vlan_id, export_route=["auto"], import_route=["auto"], rd="aut
         keyword url: URL in main() function
     :return: Nothing
     """
+    evpn_data = _evpn_vlan_data(vlan_id, export_route, import_route, rd, **kwargs)
+
+    target_url = kwargs["url"] + "system/evpns/evpn_vlans"
+
+    post_data = json.dumps(evpn_data, sort_keys=True, indent=4)
+    response = kwargs["s"].post(target_url, data=post_data, verify=False, timeout=2)
+
+    if not common_ops._response_ok(response, "POST"):
+        print("FAIL: Creating EVPN VLAN '%s' association failed with status code %d" % (vlan_id, response.status_code))
+    else:
+        print("SUCCESS: Creating EVPN VLAN '%s' association succeeded" % vlan_id)
+
+
+def _evpn_vlan_data(vlan_id, export_route=["auto"], import_route=["auto"], rd="auto", **kwargs):
+    """
+    Build the POST body of an EVPN VLAN association, see add_evpn_vlan().
+
+    :return: Dictionary of the EVPN VLAN entry
+    """
     evpn_data = {
         "export_route_targets": export_route,
         "import_route_targets": import_route,
@@ -119,13 +139,64 @@ def add_evpn_vlan(vlan_id, export_route=["auto"], import_route=["auto"], rd="aut
     else:
         # Else logic designed for v10.04 and later
         evpn_data.update({'vlan': '/rest/v10.04/system/vlans/%s' % vlan_id})
+    return evpn_data
+
+
+def sync_evpn_vlans(vlan_ids, export_route=["auto"], import_route=["auto"], rd="auto", prune=False, max_workers=8,
+                    **kwargs):
+    """
+    Make the EVPN VLAN associations of a switch match a complete set of VLANs, e.g. the VLANs of the VNI map given to
+    vxlan.sync_vni_map(). The EVPN VLANs are listed once, and only the missing associations are created (and with
+    prune, the extra ones deleted), with at most max_workers concurrent calls.
+    Note that this functions has logic that works for both v1 and v10.04
+
+    :param vlan_ids: VLAN IDs and ranges, e.g. [10, "100-299"], see common_ops._expand_vlan_ranges()
+    :param export_route: List of route targets to be exported from the VLANs in ASN:nn format, or auto.
+    :param import_route: List of route targets to be imported from the VLANs in ASN:nn format, or auto.
+    :param rd: Alphanumeric EVPN RD in ASN:nn format or IP:nn format, or auto.
+    :param prune: If True, also delete the EVPN VLAN associations of VLANs that are not in vlan_ids
+    :param max_workers: Maximum number of concurrent calls to the switch
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by integer VLAN ID, True if the association is as requested (created, deleted or
+        unchanged), False otherwise
+    """
+    vlan_ids = common_ops._expand_vlan_ranges(vlan_ids)
 
     target_url = kwargs["url"] + "system/evpns/evpn_vlans"
+    response = kwargs["s"].get(target_url, verify=False)
+    if not common_ops._response_ok(response, "GET"):
+        print("FAIL: Getting list of all EVPN VLANs failed with status code %d" % response.status_code)
+        return {vlan_id: False for vlan_id in vlan_ids}
+    print("SUCCESS: Getting list of all EVPN VLANs succeeded")
+    current = set(int(vlan_id) for vlan_id in common_ops._table_keys(response.json()))
+
+    creates = vlan_ids - current
+    deletes = current - vlan_ids if prune else set()
+
+    def _create(vlan_id):
+        post_data = json.dumps(_evpn_vlan_data(vlan_id, export_route, import_route, rd, **kwargs),
+                               sort_keys=True, indent=4)
+        response = kwargs["s"].post(target_url, data=post_data, verify=False)
+        if not common_ops._response_ok(response, "POST"):
+            print("FAIL: Creating EVPN VLAN '%s' association failed with status code %d"
+                  % (vlan_id, response.status_code))
+            return False
+        print("SUCCESS: Creating EVPN VLAN '%s' association succeeded" % vlan_id)
+        return True
+
+    def _delete(vlan_id):
+        response = kwargs["s"].delete(target_url + "/%d" % vlan_id, verify=False)
+        if not common_ops._response_ok(response, "DELETE"):
+            print("FAIL: Deleting EVPN VLAN '%s' association failed with status code %d"
+                  % (vlan_id, response.status_code))
+            return False
+        print("SUCCESS: Deleting EVPN VLAN '%s' association succeeded" % vlan_id)
+        return True
 
-    post_data = json.dumps(evpn_data, sort_keys=True, indent=4)
-    response = kwargs["s"].post(target_url, data=post_data, verify=False, timeout=2)
+    operations = dict((vlan_id, (_create, vlan_id)) for vlan_id in creates)
+    operations.update((vlan_id, (_delete, vlan_id)) for vlan_id in deletes)
+    results = fleet.run_parallel(lambda operation: operation[0](operation[1]), operations, max_workers)
 
-    if not common_ops._response_ok(response, "POST"):
-        print("FAIL: Creating EVPN VLAN '%s' association failed with status code %d" % (vlan_id, response.status_code))
-    else:
-        print("SUCCESS: Creating EVPN VLAN '%s' association succeeded" % vlan_id)
\ No newline at end of file
+    return dict((vlan_id, bool(results.get(vlan_id, True))) for vlan_id in vlan_ids | deletes)
@@ -0,0 +1,157 @@
+from src import breaker, output, session
+
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+
+
+def login_all(switches, version="v10.04", max_workers=16, errors=None, **session_options):
+    """
+    Log in to many switches concurrently and keep one persistent session per switch.
+    Switches that fail to log in are left out of the result.
+
+    :param switches: List of dictionaries, each with the keys 'switchip', 'username' and 'password', and optionally
+        'version' to override the default API version for that switch
+    :param version: Default API version, e.g. 'v1' or 'v10.04'
+    :param max_workers: Maximum number of concurrent logins
+    :param errors: Optional dictionary filled with the login error of every switch that failed to log in
+    :param session_options: Keyword arguments passed on to session.login(), e.g. timeout=(3, 30)
+    :return: Dictionary keyed by switch IP with a session dictionary (keys 's' and 'url') as value
+    """
+    def _login(switch):
+        base_url = "https://{0}/rest/{1}/".format(switch['switchip'], switch.get('version', version))
+        try:
+            return dict(s=session.login(base_url, switch['username'], switch['password'], **session_options),
+                        url=base_url)
+        except SystemExit:
+            # session.login() exits the process on failure, which must not take the whole fleet down
+            raise RuntimeError("Login failed")
+
+    results = run_parallel(_login, {switch['switchip']: switch for switch in switches}, max_workers, errors)
+    return {switchip: session_dict for switchip, session_dict in results.items() if session_dict}
+
+
+def logout_all(session_dicts, max_workers=16):
+    """
+    Log out of every switch in a dictionary of session dictionaries concurrently.
+
+    :param session_dicts: Dictionary keyed by switch IP with a session dictionary as value
+    :param max_workers: Maximum number of concurrent logouts
+    :return: Nothing
+    """
+    run_parallel(lambda session_dict: session.logout(**session_dict), session_dicts, max_workers)
+
+
+def run_parallel(func, items, max_workers=16, errors=None):
+    """
+    Call func(item) for every value of a dictionary using a thread pool.
+    An exception raised for one item is printed and does not stop the others. Every call runs in a copy of the
+    caller's context, so e.g. the session.SessionPool active in the calling thread is active in the calls as well.
+
+    :param func: Callable taking a single argument
+    :param items: Dictionary keyed by an identifier (e.g. switch IP) with the argument for func as value
+    :param max_workers: Maximum number of concurrent calls
+    :param errors: Optional dictionary filled with the exception raised for every identifier whose call failed
+    :return: Dictionary keyed by the same identifiers with the return value of func, or None if func raised
+    """
+    results = {}
+    if not items:
+        return results
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        futures = {key: executor.submit(contextvars.copy_context().run, func, item) for key, item in items.items()}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except (Exception, SystemExit) as error:
+                print("FAIL: Ran into exception for '%s': %s" % (key, error))
+                results[key] = None
+                if errors is not None:
+                    errors[key] = error
+    return results
+
+
+def run_steps(steps, session_dicts, journal=None, max_workers=16, errors=None):
+    """
+    Run a sequence of steps on every switch concurrently, the steps of one switch running in order.
+    With a journal, steps already completed in a previous run are skipped and every completed step is recorded,
+    so an interrupted job resumes where it stopped. A step raising an exception, printing a 'FAIL:' or 'ERROR:' line
+    or returning False (see output.run_checked()) stops the remaining steps of that switch only.
+
+    :param steps: List of (step name, callable) tuples; each callable is called with the session dictionary
+        as keyword arguments, like the functions in /src
+    :param session_dicts: Dictionary keyed by switch IP with a session dictionary (keys 's' and 'url') as value
+    :param journal: Optional journal.Journal recording completed and failed steps
+    :param max_workers: Maximum number of switches processed concurrently
+    :param errors: Optional dictionary filled with the exception that stopped each failed switch
+    :return: Dictionary keyed by switch IP, True if every step completed and None otherwise
+    """
+    def _run(switchip):
+        for step_name, step_func in steps:
+            if journal is not None:
+                journal.run_step(switchip, step_name, step_func, **session_dicts[switchip])
+            else:
+                output.run_checked(step_func, **session_dicts[switchip])
+        return True
+
+    return run_parallel(_run, {switchip: switchip for switchip in session_dicts}, max_workers, errors)
+
+
+def pending_switches(switches, step_names, journal):
+    """
+    Return the switches that still have steps to run according to a journal, so completed switches are not even
+    logged in to on a rerun.
+
+    :param switches: List of dictionaries, each with the key 'switchip'
+    :param step_names: List of step names
+    :param journal: journal.Journal of the job
+    :return: List of the switch dictionaries with at least one step not completed
+    """
+    return [switch for switch in switches
+            if not all(journal.is_done(switch['switchip'], step_name) for step_name in step_names)]
+
+
+def summarize(session_dicts, errors=None):
+    """
+    Build a per-switch summary of a fleet run from the circuit breakers of the sessions and the errors collected.
+
+    :param session_dicts: Dictionary keyed by switch IP with a session dictionary as value
+    :param errors: Optional dictionary keyed by switch IP with the exception that stopped the run on that switch,
+        as filled by login_all() or run_parallel()
+    :return: Dictionary keyed by switch IP with a dictionary with the keys 'status', 'failures' and 'error' as value
+    """
+    errors = errors or {}
+    summary = {}
+    for switchip in sorted(set(session_dicts) | set(errors)):
+        circuit_breaker = getattr(session_dicts.get(switchip, {}).get('s'), 'breaker', None)
+        error = errors.get(switchip)
+        if circuit_breaker is not None and circuit_breaker.state != breaker.CLOSED:
+            status = "skipped (circuit %s)" % circuit_breaker.state
+            error = error or circuit_breaker.last_error
+        elif switchip not in session_dicts:
+            status = "login failed"
+        elif error is not None:
+            status = "failed"
+        else:
+            status = "ok"
+        summary[switchip] = {
+            "status": status,
+            "failures": circuit_breaker.total_failures if circuit_breaker is not None else 0,
+            "error": str(error) if error is not None else None,
+        }
+    return summary
+
+
+def print_summary(session_dicts, errors=None):
+    """
+    Print the per-switch summary of a fleet run, see summarize().
+
+    :param session_dicts: Dictionary keyed by switch IP with a session dictionary as value
+    :param errors: Optional dictionary keyed by switch IP with the exception that stopped the run on that switch
+    :return: Nothing
+    """
+    summary = summarize(session_dicts, errors)
+    healthy = sum(1 for switch_summary in summary.values() if switch_summary["status"] == "ok")
+    print("Fleet run summary: %d of %d switch(es) ok" % (healthy, len(summary)))
+    for switchip, switch_summary in summary.items():
+        if switch_summary["status"] != "ok":
+            print("  %s: %s, %d failure(s), last error: %s" % (switchip, switch_summary["status"],
+                                                              switch_summary["failures"], switch_summary["error"]))
@@ -1,7 +1,7 @@
 import json
 import random
 
-from src import common_ops, port
+from src import common_ops, fleet, port
 
 
 def get_interface(int_name, depth=0, selector=None, **kwargs):
@@ -93,10 +93,15 @@ def _get_interface(int_name, depth=0, selector=None, **kwargs):
     return result
 
 
-def get_all_interfaces(**kwargs):
+def get_all_interfaces(attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get a list (or dictionary) of all entries in the Interface table
 
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["name", "admin"].
+        Entries are then returned at depth 1 instead of as references.
+    :param filters: Optional filters on attribute values, e.g. ["admin=up", "type=vlan"] or {"type": "vlan"},
+        applied by the switch where the firmware supports it and locally otherwise. Entries are then returned
+        at depth 1.
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
@@ -104,7 +109,7 @@ def get_all_interfaces(**kwargs):
     """
     target_url = kwargs["url"] + "system/interfaces"
 
-    response = kwargs["s"].get(target_url, verify=False)
+    response, interface_list = common_ops._get_table(target_url, attributes, filters, **kwargs)
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting list/dict of all Interface table entries failed with status code %d"
@@ -112,11 +117,88 @@ def get_all_interfaces(**kwargs):
         interface_list = []
     else:
         print("SUCCESS: Getting list/dict of all Interface table entries succeeded")
-        interface_list = response.json()
 
     return interface_list
 
 
+def get_all_interface_configurations(**kwargs):
+    """
+    Perform a GET call to get the configuration of every L2/L3 port in a single request, in the form PUT expects:
+    the writable attributes of every Interface table entry for v10.04, the configuration of every Port table entry
+    for v1.
+
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by port name with the port's configuration as value
+    """
+    if kwargs["url"].endswith("/v1/"):
+        target_url = kwargs["url"] + "system/ports"
+        payload = {"depth": 1, "selector": "configuration"}
+        logport = "Port"
+    else:  # Updated else for when version is v10.04
+        target_url = kwargs["url"] + "system/interfaces"
+        payload = {"depth": 1, "selector": "writable"}
+        logport = "Interface"
+
+    response = kwargs["s"].get(target_url, verify=False, params=payload)
+
+    if not common_ops._response_ok(response, "GET"):
+        print("FAIL: Getting configuration of all %s table entries failed with status code %d"
+              % (logport, response.status_code))
+        return {}
+
+    print("SUCCESS: Getting configuration of all %s table entries succeeded" % logport)
+    table = response.json()
+    if isinstance(table, dict):
+        # The writable selector leaves out 'name'; v10.04 keys are the percent-encoded names
+        return {common_ops._replace_percents(key): entry for key, entry in table.items() if isinstance(entry, dict)}
+    return {entry["name"]: entry for entry in table if isinstance(entry, dict)}
+
+
+def get_all_interface_statistics(**kwargs):
+    """
+    Perform a GET call to retrieve the statistics of every entry in the Interface table in a single request
+
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by Interface name, each value being the dictionary of counters for that Interface
+    """
+    target_url = kwargs["url"] + "system/interfaces"
+    if kwargs["url"].endswith("/v1/"):
+        payload = {
+            "depth": 1,
+            "attributes": "name,statistics"
+        }
+    else:  # Updated else for when version is v10.04
+        payload = {
+            "depth": 1,
+            "selector": "statistics"
+        }
+    response = kwargs["s"].get(target_url, verify=False, params=payload, timeout=10)
+
+    statistics_dict = {}
+    if not common_ops._response_ok(response, "GET"):
+        print("FAIL: Getting statistics of all Interface table entries failed with status code %d"
+              % response.status_code)
+    else:
+        print("SUCCESS: Getting statistics of all Interface table entries succeeded")
+        interface_data = response.json()
+        # The statistics selector leaves out 'name': v10.04 returns a dictionary keyed by percent-encoded Interface
+        # name, v1 a list of Interface objects in which only the requested 'name' attribute identifies the entry
+        if isinstance(interface_data, dict):
+            for int_name, int_data in zip(common_ops._table_keys(interface_data), interface_data.values()):
+                if isinstance(int_data, dict):
+                    statistics_dict[int_name] = int_data.get('statistics', {})
+        else:
+            for int_data in interface_data:
+                if isinstance(int_data, dict) and 'name' in int_data:
+                    statistics_dict[int_data['name']] = int_data.get('statistics', {})
+
+    return statistics_dict
+
+
 def get_ipv6_addresses(int_name, depth=0, **kwargs):
     """
     Perform a GET call to retrieve the list of IPv6 addresses for an Interface table entry
@@ -1167,12 +1249,12 @@ def add_port_to_lag(int_name, lag_id, **kwargs):
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
-    :return: Nothing
+    :return: True if successful, False otherwise
     """
     if kwargs["url"].endswith("/v1/"):
-        _add_port_to_lag_v1(int_name, lag_id, **kwargs)
+        return _add_port_to_lag_v1(int_name, lag_id, **kwargs)
     else:  # Updated else for when version is v10.04
-        _add_port_to_lag(int_name, lag_id, **kwargs)
+        return _add_port_to_lag(int_name, lag_id, **kwargs)
 
 
 def _add_port_to_lag_v1(int_name, lag_id, **kwargs):
@@ -1185,7 +1267,7 @@ def _add_port_to_lag_v1(int_name, lag_id, **kwargs):
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
-    :return: Nothing
+    :return: True if the interface was added to the LAG, False otherwise
     """
 
     int_name_percents = common_ops._replace_special_characters(int_name)
@@ -1200,7 +1282,8 @@ def _add_port_to_lag_v1(int_name, lag_id, **kwargs):
 
     response = kwargs["s"].put(target_url, data=put_data, verify=False)
 
-    if not common_ops._response_ok(response, "PUT"):
+    success = common_ops._response_ok(response, "PUT")
+    if not success:
         print("FAIL: Adding Interface '%s' to LAG '%d' "
               "failed with status code %d" % (int_name, lag_id, response.status_code))
     else:
@@ -1209,22 +1292,26 @@ def _add_port_to_lag_v1(int_name, lag_id, **kwargs):
 
     # Delete Port Table entry for the port
     port.delete_port(int_name_percents, **kwargs)
+    return success
 
 
-def _add_port_to_lag(int_name, lag_id, **kwargs):
+def _add_port_to_lag(int_name, lag_id, int_data=None, **kwargs):
     """
     Perform GET and PUT calls to configure a Port as a LAG member, and also enable the port
 
     :param int_name: Alphanumeric name of the interface
     :param lag_id: Numeric ID of the LAG to which the port is to be added
+    :param int_data: Optional writable data of the interface, already fetched, in which case the GET is skipped
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
-    :return: Nothing
+    :return: True if successful, False otherwise
     """
     int_name_percents = common_ops._replace_special_characters(int_name)
 
-    int_data = get_interface(int_name, 1, "writable", **kwargs)
+    if int_data is None:
+        int_data = get_interface(int_name, 1, "writable", **kwargs)
+    int_data = dict(int_data, other_config=dict(int_data.get('other_config') or {}))
 
     int_data['user_config'] = {"admin": "up"}
     int_data['other_config']['lacp-aggregation-key'] = lag_id
@@ -1237,9 +1324,11 @@ def _add_port_to_lag(int_name, lag_id, **kwargs):
     if not common_ops._response_ok(response, "PUT"):
         print("FAIL: Adding Interface '%s' to LAG '%d' "
               "failed with status code %d" % (int_name, lag_id, response.status_code))
+        return False
     else:
         print("SUCCESS: Adding Interface '%s' to LAG '%d' "
               "succeeded" % (int_name, lag_id))
+        return True
 
 
 def remove_port_from_lag(int_name, lag_id, **kwargs):
@@ -1404,4 +1493,89 @@ def initialize_interface(interface_name, **kwargs):
     if kwargs["url"].endswith("/v1/"):
         port.initialize_port_entry(interface_name, **kwargs)
     else:  # Updated else for when version is v10.04
-        initialize_interface_entry(interface_name, **kwargs)
\ No newline at end of file
+        initialize_interface_entry(interface_name, **kwargs)
+
+
+def initialize_interfaces(names_or_ranges, max_workers=8, **kwargs):
+    """
+    Initialize many interfaces to factory settings, e.g. every port of a line card. Unlike calling
+    initialize_interface() for each interface, the IPv6 addresses of all the interfaces are fetched with a single GET
+    of the table, then the interfaces are initialized concurrently and their IPv6 addresses deleted concurrently.
+
+    :param names_or_ranges: Interface names and ranges such as "1/1/1-1/1/48", see
+        common_ops._expand_interface_ranges()
+    :param max_workers: Maximum number of concurrent calls to the switch
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by interface name, True if the interface was initialized and its IPv6 addresses
+        deleted, False otherwise
+    """
+    int_names = common_ops._expand_interface_ranges(names_or_ranges)
+    if not int_names:
+        return {}
+
+    if kwargs["url"].endswith("/v1/"):
+        # v1 keeps the IPv6 addresses under the Port table, and both Port and Interface entries are initialized
+        ipv6_table = "ports"
+        reset_tables = ("ports", "interfaces")
+        logport = "Port"
+    else:  # Updated else for when version is v10.04
+        ipv6_table = "interfaces"
+        reset_tables = ("interfaces",)
+        logport = "Interface"
+
+    response, table = common_ops._get_table(kwargs["url"] + "system/%s" % ipv6_table,
+                                            attributes=["name", "ip6_addresses"], **kwargs)
+    if table is None:
+        print("FAIL: Getting IPv6 addresses of %s table entries failed with status code %d; getting them per %s"
+              % (logport, response.status_code, logport))
+        ipv6_addresses = None
+    else:
+        print("SUCCESS: Getting IPv6 addresses of %s table entries succeeded" % logport)
+        items = table.items() if isinstance(table, dict) else ((None, entry) for entry in table)
+        ipv6_addresses = {entry.get("name", key): common_ops._table_keys(entry.get("ip6_addresses") or {})
+                          for key, entry in items if isinstance(entry, dict)}
+
+    put_data = json.dumps({}, sort_keys=True, indent=4)
+
+    def _initialize(int_name):
+        int_name_percents = common_ops._replace_special_characters(int_name)
+        for reset_table in reset_tables:
+            target_url = kwargs["url"] + "system/%s/%s" % (reset_table, int_name_percents)
+            response = kwargs["s"].put(target_url, data=put_data, verify=False)
+            if not common_ops._response_ok(response, "PUT"):
+                print("FAIL: Initializing interface '%s' failed with status code %d"
+                      % (int_name, response.status_code))
+                return False
+        print("SUCCESS: Initializing interface '%s' succeeded" % int_name)
+        return True
+
+    initialized = fleet.run_parallel(_initialize, {int_name: int_name for int_name in int_names}, max_workers)
+
+    addresses = {}
+    for int_name in int_names:
+        if initialized[int_name]:
+            if ipv6_addresses is not None:
+                int_addresses = ipv6_addresses.get(int_name, [])
+            else:
+                int_addresses = get_ipv6_addresses(int_name, **kwargs)
+            for ip in int_addresses:
+                addresses[(int_name, ip)] = (int_name, ip)
+
+    def _delete_address(int_address):
+        int_name, ip = int_address
+        target_url = kwargs["url"] + "system/%s/%s/ip6_addresses/%s" % (
+            ipv6_table, common_ops._replace_special_characters(int_name), common_ops._replace_special_characters(ip))
+        response = kwargs["s"].delete(target_url, verify=False)
+        if not common_ops._response_ok(response, "DELETE"):
+            print("FAIL: Deleting IPv6 Address '%s' from %s table entry '%s' failed with status code %d"
+                  % (ip, logport, int_name, response.status_code))
+            return False
+        print("SUCCESS: Deleting IPv6 Address '%s' from %s table entry '%s' succeeded" % (ip, logport, int_name))
+        return True
+
+    deleted = fleet.run_parallel(_delete_address, addresses, max_workers)
+
+    failed = set(int_name for (int_name, _), ok in deleted.items() if not ok)
+    return {int_name: bool(initialized[int_name]) and int_name not in failed for int_name in int_names}
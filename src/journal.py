@@ -0,0 +1,138 @@
+from src import output
+
+import json
+import os
+import threading
+import time
+
+DONE = "done"
+FAILED = "failed"
+
+
+class Journal(object):
+    """
+    Append-only on-disk record of the units of work (switch, step) completed by a fleet job.
+
+    Every completion is appended as one JSON line and flushed immediately, so a job that dies part way through can
+    be rerun with the same journal and skip everything already done. Opening a journal replays it in a single
+    sequential read; a partially written last line (e.g. after a crash) is ignored.
+    """
+
+    def __init__(self, path, job=None, fsync=False):
+        """
+        :param path: Path of the journal file; created if it does not exist
+        :param job: Optional job name. A journal written by a different job is refused, so that a rerun with
+            other parameters cannot wrongly skip work.
+        :param fsync: Set to True to force every record to disk, surviving power loss at the cost of speed
+        """
+        self.path = path
+        self.job = job
+        self.fsync = fsync
+        self._done = set()
+        self._lock = threading.Lock()
+        self._replay()
+        self._file = open(path, "a")
+        if self._torn_tail:
+            # Terminate the partial line left by a crash so the next record starts on its own line
+            self._file.write("\n")
+        if self.job is not None and self._journal_job is None:
+            self._append({"job": self.job})
+
+    def _replay(self):
+        self._journal_job = None
+        self._torn_tail = False
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as journal_file:
+            for line in journal_file:
+                self._torn_tail = not line.endswith("\n")
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if "job" in record:
+                    self._journal_job = record["job"]
+                    if self.job is not None and self.job != self._journal_job:
+                        raise Exception("ERROR: Journal '%s' belongs to job '%s', not '%s'"
+                                        % (self.path, self._journal_job, self.job))
+                elif record.get("status") == DONE:
+                    self._done.add((record["switch"], record["step"]))
+
+    def _append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def is_done(self, switch, step):
+        """
+        :param switch: Switch identifier, e.g. its IP address
+        :param step: Step name
+        :return: True if the step was recorded as completed on the switch
+        """
+        return (switch, step) in self._done
+
+    def done_count(self):
+        """
+        :return: Number of (switch, step) units recorded as completed
+        """
+        return len(self._done)
+
+    def record(self, switch, step, status=DONE, error=None):
+        """
+        Append the outcome of a step on a switch to the journal.
+
+        :param switch: Switch identifier, e.g. its IP address
+        :param step: Step name
+        :param status: journal.DONE or journal.FAILED
+        :param error: Optional description of the failure
+        :return: Nothing
+        """
+        record = {"switch": switch, "step": step, "status": status, "time": round(time.time(), 3)}
+        if error is not None:
+            record["error"] = str(error)
+        self._append(record)
+        if status == DONE:
+            with self._lock:
+                self._done.add((switch, step))
+
+    def run_step(self, switch, step, func, *args, **kwargs):
+        """
+        Run a step on a switch unless the journal shows it was already completed, and record the outcome.
+        The step is only recorded as completed if func neither raises, prints a 'FAIL:' or 'ERROR:' line nor returns
+        False (see output.run_checked()), so that a failed step is run again when the job resumes.
+
+        :param switch: Switch identifier, e.g. its IP address
+        :param step: Step name
+        :param func: Callable performing the step; a failure marks the step as failed and raises an Exception
+        :param args: Positional arguments for func
+        :param kwargs: Keyword arguments for func
+        :return: Return value of func, or None if the step was skipped
+        """
+        if self.is_done(switch, step):
+            print("SKIPPED: Step '%s' on switch '%s' already completed" % (step, switch))
+            return None
+        try:
+            result = output.run_checked(func, *args, **kwargs)
+        except Exception as error:
+            self.record(switch, step, FAILED, error)
+            raise
+        self.record(switch, step)
+        return result
+
+    def close(self):
+        """
+        Close the journal file.
+
+        :return: Nothing
+        """
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -2,6 +2,7 @@ import json
 import re
 
 from src import common_ops
+from src import fleet
 from src import port
 from src import interface
 from json import dumps
@@ -66,24 +67,8 @@ def _create_l2_lag_interface_v1(name, phys_ports, lacp_mode="passive", mc_lag=Fa
         for phys_port in phys_ports:
             interface.add_port_to_lag(phys_port, lag_id, **kwargs)
 
-        interfaces = ["/rest/v1/system/interfaces/%s" % common_ops._replace_special_characters(phys_port)
-                      for phys_port in phys_ports]
-        port_data = {"admin": admin_state,
-                     "interfaces": interfaces,
-                     "name": name,
-                     "routing": False,
-                     "vlan_trunks": ["/rest/v1/system/vlans/%d" % vlan_id for vlan_id in vlan_ids_list],
-                     "lacp": lacp_mode,
-                     "other_config": {
-                         "mclag_enabled": mc_lag,
-                         "lacp-fallback": fallback_enabled
-                        },
-                     "vlan_mode": "native-untagged",
-                     "vlan_tag": "/rest/v1/system/vlans/1"
-                     }
-
-        if desc is not None:
-            port_data['description'] = desc
+        port_data = _l2_lag_data(name, phys_ports, lacp_mode, mc_lag, fallback_enabled, vlan_ids_list, desc,
+                                 admin_state, **kwargs)
 
         target_url = kwargs["url"] + "system/ports"
         post_data = json.dumps(port_data, sort_keys=True, indent=4)
@@ -132,34 +117,8 @@ def _create_l2_lag_interface(name, phys_ports, lacp_mode="passive", mc_lag=False
         for phys_port in phys_ports:
             interface.add_port_to_lag(phys_port, lag_id, **kwargs)
 
-        interfaces = ["/rest/v10.04/system/interfaces/%s" % common_ops._replace_special_characters(phys_port)
-                      for phys_port in phys_ports]
-        int_data = {"admin": admin_state,
-                    "interfaces": interfaces,
-                    "name": name,
-                    "type": "lag",
-                    "routing": False,
-                    "vlan_trunks": ["/rest/v10.04/system/vlans/%d" % vlan_id for vlan_id in vlan_ids_list],
-                    "lacp": lacp_mode,
-                    "other_config": {
-                        "lacp-aggregation-key": lag_id,
-                        "lacp-port-id": 0,
-                        "lacp-port-priority": 0,
-                        "lldp_dot3_macphy_disable": True,
-                        "lldp_dot3_poe_disable": True,
-                        "lldp_enable_dir": "off",
-                        "lldp_med_capability_disable": True,
-                        "lldp_med_network_policy_disable": True,
-                        "lldp_med_poe_disable": True,
-                        "lldp_med_poe_priority_override": True,
-                        "lldp_med_topology_notification_disable": True
-                    },
-                    "vlan_mode": "native-untagged",
-                    "vlan_tag": {"1": "/rest/v10.04/system/vlans/1"}
-                    }
-
-        if desc is not None:
-            int_data['description'] = desc
+        int_data = _l2_lag_data(name, phys_ports, lacp_mode, mc_lag, fallback_enabled, vlan_ids_list, desc,
+                                admin_state, **kwargs)
 
         target_url = kwargs["url"] + "system/interfaces"
         post_data = json.dumps(int_data, sort_keys=True, indent=4)
@@ -239,26 +198,8 @@ def _create_l3_lag_interface_v1(name, phys_ports, ipv4, lacp_mode="passive", mc_
         for phys_port in phys_ports:
             interface.add_port_to_lag(phys_port, lag_id, **kwargs)
 
-        interfaces = ["/rest/v1/system/interfaces/%s" % common_ops._replace_special_characters(phys_port)
-                      for phys_port in phys_ports]
-        port_data = {"admin": admin_state,
-                     "interfaces": interfaces,
-                     "name": name,
-                     "routing": True,
-                     "vrf": "/rest/v1/system/vrfs/%s" % vrf,
-                     "ip4_address": ipv4,
-                     "lacp": lacp_mode,
-                     "other_config": {
-                        "mclag_enabled": mc_lag,
-                        "lacp-fallback": fallback_enabled
-                        },
-                     }
-
-        if desc is not None:
-            port_data['description'] = desc
-
-        if ipv4 is not None:
-            port_data['ip4_address'] = ipv4
+        port_data = _l3_lag_data(name, phys_ports, ipv4, lacp_mode, mc_lag, fallback_enabled, desc, admin_state, vrf,
+                                 **kwargs)
 
         target_url = kwargs["url"] + "system/ports"
         post_data = json.dumps(port_data, sort_keys=True, indent=4)
@@ -302,26 +243,8 @@ def _create_l3_lag_interface(name, phys_ports, ipv4, lacp_mode="passive", mc_lag
 
     if name not in ints_dict:
 
-        interfaces = ["/rest/v10.04/system/interfaces/%s" % common_ops._replace_special_characters(phys_port)
-                      for phys_port in phys_ports]
-        int_data = {"admin": admin_state,
-                    "interfaces": interfaces,
-                    "name": name,
-                    "type": "lag",
-                    "vrf": "/rest/v10.04/system/vrfs/%s" % vrf,
-                    "routing": True,
-                    "ip4_address": ipv4,
-                    "lacp": lacp_mode,
-                    # "other_config": {
-                    #    "mclag_enabled": mc_lag,
-                    #    "lacp-fallback": fallback_enabled
-                    #    }
-
-                    }
-        """commented out the other_config since it causes error"""
-
-        if desc is not None:
-            int_data['description'] = desc
+        int_data = _l3_lag_data(name, phys_ports, ipv4, lacp_mode, mc_lag, fallback_enabled, desc, admin_state, vrf,
+                                **kwargs)
 
         target_url = kwargs["url"] + "system/interfaces"
         post_data = json.dumps(int_data, sort_keys=True, indent=4)
@@ -399,4 +322,212 @@ def _delete_lag_interface(name, phys_ports, **kwargs):
         interface.initialize_interface_entry(phys_port, **kwargs)
 
 
+def _lag_id(name):
+    """
+    Extract the LAG ID from a LAG name, e.g. 12 from "lag12".
+    """
+    return int(re.search(r'\d+', name).group())
+
+
+def _l2_lag_data(name, phys_ports, lacp_mode="passive", mc_lag=False, fallback_enabled=False, vlan_ids_list=[],
+                 desc=None, admin_state="up", **kwargs):
+    """
+    Build the POST body of an L2 LAG: a Port table entry for v1, an Interface table entry for v10.04.
+    See create_l2_lag_interface() for the parameters.
 
+    :return: Dictionary of the LAG entry
+    """
+    if kwargs["url"].endswith("/v1/"):
+        interfaces = ["/rest/v1/system/interfaces/%s" % common_ops._replace_special_characters(phys_port)
+                      for phys_port in phys_ports]
+        lag_data = {"admin": admin_state,
+                    "interfaces": interfaces,
+                    "name": name,
+                    "routing": False,
+                    "vlan_trunks": ["/rest/v1/system/vlans/%d" % vlan_id for vlan_id in vlan_ids_list],
+                    "lacp": lacp_mode,
+                    "other_config": {
+                        "mclag_enabled": mc_lag,
+                        "lacp-fallback": fallback_enabled
+                        },
+                    "vlan_mode": "native-untagged",
+                    "vlan_tag": "/rest/v1/system/vlans/1"
+                    }
+    else:  # Updated else for when version is v10.04
+        interfaces = ["/rest/v10.04/system/interfaces/%s" % common_ops._replace_special_characters(phys_port)
+                      for phys_port in phys_ports]
+        lag_data = {"admin": admin_state,
+                    "interfaces": interfaces,
+                    "name": name,
+                    "type": "lag",
+                    "routing": False,
+                    "vlan_trunks": ["/rest/v10.04/system/vlans/%d" % vlan_id for vlan_id in vlan_ids_list],
+                    "lacp": lacp_mode,
+                    "other_config": {
+                        "lacp-aggregation-key": _lag_id(name),
+                        "lacp-port-id": 0,
+                        "lacp-port-priority": 0,
+                        "lldp_dot3_macphy_disable": True,
+                        "lldp_dot3_poe_disable": True,
+                        "lldp_enable_dir": "off",
+                        "lldp_med_capability_disable": True,
+                        "lldp_med_network_policy_disable": True,
+                        "lldp_med_poe_disable": True,
+                        "lldp_med_poe_priority_override": True,
+                        "lldp_med_topology_notification_disable": True
+                    },
+                    "vlan_mode": "native-untagged",
+                    "vlan_tag": {"1": "/rest/v10.04/system/vlans/1"}
+                    }
+
+    if desc is not None:
+        lag_data['description'] = desc
+    return lag_data
+
+
+def _l3_lag_data(name, phys_ports, ipv4, lacp_mode="passive", mc_lag=False, fallback_enabled=False, desc=None,
+                 admin_state="up", vrf="default", **kwargs):
+    """
+    Build the POST body of an L3 LAG: a Port table entry for v1, an Interface table entry for v10.04.
+    See create_l3_lag_interface() for the parameters.
+
+    :return: Dictionary of the LAG entry
+    """
+    if kwargs["url"].endswith("/v1/"):
+        interfaces = ["/rest/v1/system/interfaces/%s" % common_ops._replace_special_characters(phys_port)
+                      for phys_port in phys_ports]
+        lag_data = {"admin": admin_state,
+                    "interfaces": interfaces,
+                    "name": name,
+                    "routing": True,
+                    "vrf": "/rest/v1/system/vrfs/%s" % vrf,
+                    "ip4_address": ipv4,
+                    "lacp": lacp_mode,
+                    "other_config": {
+                        "mclag_enabled": mc_lag,
+                        "lacp-fallback": fallback_enabled
+                        },
+                    }
+    else:  # Updated else for when version is v10.04
+        interfaces = ["/rest/v10.04/system/interfaces/%s" % common_ops._replace_special_characters(phys_port)
+                      for phys_port in phys_ports]
+        # other_config (mclag_enabled, lacp-fallback) is left out since it causes an error
+        lag_data = {"admin": admin_state,
+                    "interfaces": interfaces,
+                    "name": name,
+                    "type": "lag",
+                    "vrf": "/rest/v10.04/system/vrfs/%s" % vrf,
+                    "routing": True,
+                    "ip4_address": ipv4,
+                    "lacp": lacp_mode,
+                    }
+
+    if desc is not None:
+        lag_data['description'] = desc
+    return lag_data
+
+
+def create_lag_interfaces(lags, max_workers=8, **kwargs):
+    """
+    Create many LAG interfaces and attach their member ports with concurrent calls, then verify every LAG and its
+    members with a single GET of the table. Unlike calling create_l2_lag_interface() or create_l3_lag_interface()
+    for each LAG, existing LAGs are found with one GET, the writable data of all member ports is fetched with one GET
+    of the Interface table (v10.04), and the member ports and LAGs are written concurrently.
+
+    :param lags: List of dictionaries, each with the keys 'name' and 'phys_ports' (list of physical ports, or ranges
+        such as "1/1/1-1/1/8", see common_ops._expand_interface_ranges()), and optionally the other parameters of
+        create_l2_lag_interface() or create_l3_lag_interface(): 'lacp_mode', 'mc_lag', 'fallback_enabled', 'desc',
+        'admin_state', 'vlan_ids_list' for an L2 LAG, 'ipv4' and 'vrf' for an L3 LAG. A LAG with the key 'ipv4' is
+        created as an L3 LAG. The LAGs are checked for ports listed in several of them before any call is sent.
+    :param max_workers: Maximum number of concurrent calls to the switch
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by LAG name, True if the LAG exists with all its member ports after the call,
+        False otherwise
+    """
+    v1 = kwargs["url"].endswith("/v1/")
+    lag_table = "ports" if v1 else "interfaces"
+    logport = "Port" if v1 else "Interface"
+    lags = [dict(lag, phys_ports=common_ops._expand_interface_ranges(lag['phys_ports'])) for lag in lags]
+    port_lags = {}
+    for lag in lags:
+        for phys_port in lag['phys_ports']:
+            if port_lags.setdefault(phys_port, lag['name']) != lag['name']:
+                raise Exception("ERROR: Port %s can't be a member of both LAG '%s' and LAG '%s'"
+                                % (phys_port, port_lags[phys_port], lag['name']))
+
+    response, table = common_ops._get_table(kwargs["url"] + "system/%s" % lag_table, **kwargs)
+    existing = set(common_ops._table_keys(table)) if table is not None else set()
+    new_lags = []
+    for lag in lags:
+        if lag['name'] in existing:
+            print("SUCCESS: No need to add %s table entry '%s' because it already exists" % (logport, lag['name']))
+        else:
+            new_lags.append(lag)
+
+    # Attach the member ports of every new LAG
+    members = {}
+    for lag in new_lags:
+        for phys_port in lag['phys_ports']:
+            members[phys_port] = _lag_id(lag['name'])
+    writable = {}
+    if members and not v1:
+        # One GET of the writable data of every interface instead of one GET per member port
+        writable = interface.get_all_interface_configurations(**kwargs)
+
+    def _attach(phys_port):
+        if v1:
+            return interface._add_port_to_lag_v1(phys_port, members[phys_port], **kwargs)
+        return interface._add_port_to_lag(phys_port, members[phys_port], writable.get(phys_port), **kwargs)
+
+    attached = fleet.run_parallel(_attach, {phys_port: phys_port for phys_port in members}, max_workers)
+
+    # Create the LAGs whose member ports were all attached
+    def _create(lag):
+        options = dict((key, value) for key, value in lag.items() if key not in ('name', 'phys_ports'))
+        if 'ipv4' in lag:
+            lag_data = _l3_lag_data(lag['name'], lag['phys_ports'], **dict(options, **kwargs))
+        else:
+            lag_data = _l2_lag_data(lag['name'], lag['phys_ports'], **dict(options, **kwargs))
+        post_data = json.dumps(lag_data, sort_keys=True, indent=4)
+
+        response = kwargs["s"].post(kwargs["url"] + "system/%s" % lag_table, data=post_data, verify=False)
+
+        if not common_ops._response_ok(response, "POST"):
+            print("FAIL: Adding %s table entry '%s' failed with status code %d"
+                  % (logport, lag['name'], response.status_code))
+            return False
+        print("SUCCESS: Adding %s table entry '%s' succeeded" % (logport, lag['name']))
+        return True
+
+    creatable = {}
+    for lag in new_lags:
+        if all(attached[phys_port] for phys_port in lag['phys_ports']):
+            creatable[lag['name']] = lag
+        else:
+            print("FAIL: Adding %s table entry '%s' skipped because not all its member ports could be attached"
+                  % (logport, lag['name']))
+    fleet.run_parallel(_create, creatable, max_workers)
+
+    # Verify every LAG and its member ports with one read-back
+    response, table = common_ops._get_table(kwargs["url"] + "system/%s" % lag_table, attributes=["name", "interfaces"],
+                                            **kwargs)
+    if table is None:
+        print("FAIL: Verifying LAGs failed with status code %d" % response.status_code)
+        return {lag['name']: False for lag in lags}
+    items = table.items() if isinstance(table, dict) else ((None, entry) for entry in table)
+    lag_members = {entry.get("name", key): set(common_ops._table_keys(entry.get("interfaces") or {}))
+                   for key, entry in items if isinstance(entry, dict)}
+
+    results = {}
+    for lag in lags:
+        missing = [phys_port for phys_port in lag['phys_ports'] if phys_port not in lag_members.get(lag['name'], ())]
+        if lag['name'] not in lag_members:
+            print("FAIL: LAG '%s' does not exist" % lag['name'])
+        elif missing:
+            print("FAIL: LAG '%s' is missing member port(s) %s" % (lag['name'], ", ".join(missing)))
+        else:
+            print("SUCCESS: LAG '%s' has all its member ports" % lag['name'])
+        results[lag['name']] = lag['name'] in lag_members and not missing
+    return results
@@ -0,0 +1,317 @@
+"""
+Lazy proxies over REST API entries.
+
+lazy_interface("lag1", **session_dict) returns a proxy without sending anything. The entry is fetched at depth 1
+the first time one of its attributes is read; attributes holding references (e.g. vlan_trunks, the interfaces of a
+LAG, the ACLs applied to a port) come back as proxies of the referenced entries, which are fetched in turn only when
+one of their attributes is read:
+
+    lag = lazy.lazy_interface("lag1", **session_dict)
+    for member in lag.interfaces.values():      # nothing fetched for the members yet
+        print(member.name, member.admin)        # all members fetched together on the first access
+
+Every entry is fetched at most once per session (see Resolver). Sibling references resolved together are fetched
+with one GET of their table when there are enough of them, and otherwise with concurrent GETs.
+"""
+
+from src import common_ops
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import contextvars
+import threading
+import weakref
+
+_resolvers = weakref.WeakKeyDictionary()
+_resolvers_lock = threading.Lock()
+
+
+def _is_ref(value):
+    return isinstance(value, str) and value.startswith("/rest/")
+
+
+class Resolver(object):
+    """
+    Per-session memo of REST API entries, keyed by reference URI.
+    """
+
+    def __init__(self, batch_threshold=4, max_workers=8, **kwargs):
+        """
+        :param batch_threshold: Number of uncached siblings from which their whole table is fetched in one GET
+            instead of one GET per entry
+        :param max_workers: Maximum number of concurrent GETs when entries are fetched one by one
+        :param kwargs:
+            keyword s: requests.session object with loaded cookie jar
+            keyword url: URL in main() function
+        """
+        self.batch_threshold = batch_threshold
+        self.max_workers = max_workers
+        self.session_dict = {"s": kwargs["s"], "url": kwargs["url"]}
+        parsed = urlparse(kwargs["url"])
+        self._origin = "%s://%s" % (parsed.scheme, parsed.netloc)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def uri(self, path):
+        """
+        :param path: Path relative to the base URL, e.g. "system/interfaces/1%2F1%2F1"
+        :return: Reference URI of the entry, e.g. "/rest/v10.04/system/interfaces/1%2F1%2F1"
+        """
+        return urlparse(self.session_dict["url"]).path + path
+
+    def _get(self, uri, depth):
+        response = self.session_dict["s"].get(self._origin + uri, params={"depth": depth}, verify=False)
+        if not common_ops._response_ok(response, "GET"):
+            print("FAIL: Getting '%s' failed with status code %d" % (uri, response.status_code))
+            return None
+        return response.json()
+
+    def fetch(self, uri):
+        """
+        Return the entry a reference URI points to, fetching it at depth 1 unless it was fetched before.
+
+        :param uri: Reference URI
+        :return: Dictionary of the entry, or None if it could not be fetched
+        """
+        return self.fetch_many([uri]).get(uri)
+
+    def fetch_many(self, uris):
+        """
+        Return the entries of several reference URIs, fetching the uncached ones together.
+
+        :param uris: Iterable of reference URIs
+        :return: Dictionary keyed by URI with the entry as value; entries that could not be fetched are left out
+        """
+        uris = list(uris)
+        with self._lock:
+            missing = [uri for uri in uris if uri not in self._cache]
+        tables = {}
+        for uri in missing:
+            tables.setdefault(uri.rstrip('/').rsplit('/', 1)[0], []).append(uri)
+
+        singles = []
+        for table_uri, table_members in tables.items():
+            if len(table_members) < self.batch_threshold or not self._fetch_table(table_uri):
+                singles.extend(table_members)
+        with self._lock:
+            singles = [uri for uri in singles if uri not in self._cache]
+        if singles:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(singles))) as executor:
+                # Run in copies of the caller's context, so that output captured by the caller includes the GETs'
+                futures = [executor.submit(contextvars.copy_context().run, self._get, uri, 1) for uri in singles]
+                for uri, data in zip(singles, (future.result() for future in futures)):
+                    if data is not None:
+                        with self._lock:
+                            self._cache[uri] = data
+
+        with self._lock:
+            return {uri: self._cache[uri] for uri in uris if uri in self._cache}
+
+    def _fetch_table(self, table_uri):
+        """
+        Fetch a whole table at depth 1 and cache every entry. Only v10.04 returns tables keyed by entry key,
+        which is needed to know the URI of each entry.
+
+        :return: True if the table was fetched and cached
+        """
+        table = self._get(table_uri, 1)
+        if not isinstance(table, dict):
+            return False
+        with self._lock:
+            for key, data in table.items():
+                if isinstance(data, dict):
+                    self._cache[table_uri + "/" + common_ops._replace_special_characters(key)] = data
+        return True
+
+    def invalidate(self, uri=None):
+        """
+        Forget a cached entry, e.g. after changing it, or every cached entry.
+
+        :param uri: Reference URI, or None to clear the whole cache
+        :return: Nothing
+        """
+        with self._lock:
+            if uri is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(uri, None)
+
+
+def get_resolver(**kwargs):
+    """
+    Return the Resolver of a session, creating it on first use, so that every proxy of the session shares its memo.
+
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Resolver
+    """
+    with _resolvers_lock:
+        resolver = _resolvers.get(kwargs["s"])
+        if resolver is None or resolver.session_dict["url"] != kwargs["url"]:
+            resolver = Resolver(**kwargs)
+            _resolvers[kwargs["s"]] = resolver
+        return resolver
+
+
+class LazyEntry(object):
+    """
+    Proxy of a REST API entry, fetched on first attribute access. Attributes are also available by item access
+    (entry["vlan_trunks"]), and references are returned as LazyEntry, LazyRefs or lists of LazyEntry.
+    """
+
+    __slots__ = ("uri", "key", "_resolver", "_data")
+
+    def __init__(self, resolver, uri, data=None):
+        self.uri = uri
+        self.key = common_ops._ref_key(uri)
+        self._resolver = resolver
+        self._data = data
+
+    def _load(self):
+        if self._data is None:
+            self._data = self._resolver.fetch(self.uri) or {}
+        return self._data
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError("'%s' has no attribute '%s'" % (self.uri, name))
+
+    def __getitem__(self, name):
+        return _wrap(self._resolver, self._load()[name])
+
+    def __contains__(self, name):
+        return name in self._load()
+
+    def __dir__(self):
+        return list(self._load())
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        """
+        :return: The entry as returned by the REST API, with references as URIs
+        """
+        return self._load()
+
+    def __repr__(self):
+        return "<LazyEntry %s%s>" % (self.uri, "" if self._data is not None else " (not loaded)")
+
+
+class LazyRefs(object):
+    """
+    Read-only mapping of keys to LazyEntry proxies, e.g. the vlan_trunks of an interface. Reading an attribute of
+    one entry fetches all the entries of the mapping together.
+    """
+
+    def __init__(self, resolver, refs):
+        self._resolver = resolver
+        self._refs = refs
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            fetched = self._resolver.fetch_many(self._refs.values())
+            self._entries = {key: LazyEntry(self._resolver, uri, fetched.get(uri)) for key, uri in self._refs.items()}
+        return self._entries
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __contains__(self, key):
+        return key in self._refs
+
+    def __iter__(self):
+        return iter(self._refs)
+
+    def __len__(self):
+        return len(self._refs)
+
+    def keys(self):
+        return self._refs.keys()
+
+    def values(self):
+        return self._load().values()
+
+    def items(self):
+        return self._load().items()
+
+    def __repr__(self):
+        return "<LazyRefs %s>" % sorted(self._refs)
+
+
+def _wrap(resolver, value):
+    if _is_ref(value):
+        return LazyEntry(resolver, value)
+    if isinstance(value, dict) and value and all(_is_ref(item) for item in value.values()):
+        return LazyRefs(resolver, value)
+    if isinstance(value, list) and value and all(_is_ref(item) for item in value):
+        return list(LazyRefs(resolver, {common_ops._ref_key(item): item for item in value}).values())
+    return value
+
+
+def lazy_get(path, **kwargs):
+    """
+    Return a proxy of the entry at a path relative to the base URL.
+
+    :param path: Path such as "system/vlans/10" or "system/interfaces/1%2F1%2F1"
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: LazyEntry
+    """
+    resolver = get_resolver(**kwargs)
+    return LazyEntry(resolver, resolver.uri(path))
+
+
+def lazy_interface(int_name, **kwargs):
+    """
+    :param int_name: Alphanumeric name of the interface, e.g. "1/1/1" or "lag1"
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: LazyEntry of the Interface table entry
+    """
+    return lazy_get("system/interfaces/%s" % common_ops._replace_special_characters(int_name), **kwargs)
+
+
+def lazy_port(port_name, **kwargs):
+    """
+    :param port_name: Alphanumeric name of the port
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: LazyEntry of the Port table entry
+    """
+    return lazy_get("system/ports/%s" % common_ops._replace_special_characters(port_name), **kwargs)
+
+
+def lazy_vlan(vlan_id, **kwargs):
+    """
+    :param vlan_id: Numeric ID of VLAN
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: LazyEntry of the VLAN table entry
+    """
+    return lazy_get("system/vlans/%d" % vlan_id, **kwargs)
+
+
+def lazy_acl(list_name, list_type, **kwargs):
+    """
+    :param list_name: Alphanumeric name of the ACL
+    :param list_type: Type should be one of "ipv4," "ipv6," or "mac"
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: LazyEntry of the ACL table entry
+    """
+    if kwargs["url"].endswith("/v1/"):
+        return lazy_get("system/acls/%s/%s" % (list_name, list_type), **kwargs)
+    return lazy_get("system/acls/%s,%s" % (list_name, list_type), **kwargs)
@@ -0,0 +1,154 @@
+import collections
+import threading
+import time
+
+# Number of request classes whose baseline latency is remembered, least recently used ones are dropped first
+MAX_REQUEST_CLASSES = 256
+
+
+def request_class(method, url, params=None):
+    """
+    Key grouping requests expected to take about as long, for the baseline latency of AIMDLimiter.
+
+    :param method: HTTP method
+    :param url: URL of the request
+    :param params: Query parameters of the request, if not in the URL
+    :return: Hashable key
+    """
+    if isinstance(params, dict):
+        params = tuple(sorted((str(key), str(value)) for key, value in params.items()))
+    return method.upper(), url, params
+
+
+class AIMDLimiter(object):
+    """
+    Adaptive limit on the number of requests in flight to one switch.
+
+    The limit grows additively (by about one request per round trip window) while latency stays close to the
+    baseline latency, and is cut multiplicatively when the switch throttles (429/503), a request times out or latency
+    spikes. Small access switches thus settle at a low concurrency while large chassis are driven harder.
+
+    The baseline is kept per request class (see request_class()), so a depth=1 GET of a large table is not compared
+    with a GET of a single entry. It follows a faster request quickly and a slower one slowly, so it tracks the
+    typical latency of the class rather than the fastest one ever seen.
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=32, backoff_ratio=0.5, latency_tolerance=2.0,
+                 throttle_status_codes=(429, 503)):
+        """
+        :param initial_limit: Number of concurrent requests allowed before any latency has been observed
+        :param min_limit: Lowest limit the limiter backs off to
+        :param max_limit: Highest limit the limiter grows to
+        :param backoff_ratio: Factor applied to the limit on throttling, timeouts and latency spikes
+        :param latency_tolerance: A request slower than this multiple of the baseline latency of its class counts as
+            a spike
+        :param throttle_status_codes: Status codes meaning the switch is overloaded
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.throttle_status_codes = frozenset(throttle_status_codes)
+        self.baseline_latencies = collections.OrderedDict()
+        self.inflight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Block until a request may be sent.
+
+        :return: Monotonic start time to be passed back to release()
+        """
+        with self._condition:
+            while self.inflight >= int(self.limit):
+                self._condition.wait()
+            self.inflight += 1
+        return time.monotonic()
+
+    def release(self, start, status_code=None, timed_out=False, request_class=None):
+        """
+        Record the outcome of a request and adjust the limit.
+
+        :param start: Value returned by acquire()
+        :param status_code: Status code of the response, or None if no response was received
+        :param timed_out: True if the request failed with a timeout
+        :param request_class: Key of the request's class, see request_class(); requests without one share a class
+        :return: Nothing
+        """
+        now = time.monotonic()
+        latency = now - start
+        with self._condition:
+            self.inflight -= 1
+            if timed_out or status_code in self.throttle_status_codes:
+                self._decrease(now, latency)
+            elif status_code is not None:
+                baseline = self._update_baseline(request_class, latency)
+                if baseline is not None and latency > baseline * self.latency_tolerance:
+                    self._decrease(now, latency)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def _update_baseline(self, request_class, latency):
+        """
+        Fold a latency into the baseline of its request class.
+
+        :return: Baseline of the class before the update, None for the first request of the class
+        """
+        baseline = self.baseline_latencies.pop(request_class, None)
+        if baseline is None:
+            updated = latency
+        elif latency < baseline:
+            updated = baseline + 0.5 * (latency - baseline)
+        else:
+            # Drift up slowly so a spike barely moves the baseline but a permanently slower class is not punished
+            updated = baseline + 0.05 * (latency - baseline)
+        self.baseline_latencies[request_class] = updated
+        if len(self.baseline_latencies) > MAX_REQUEST_CLASSES:
+            self.baseline_latencies.popitem(last=False)
+        return baseline
+
+    def _decrease(self, now, latency):
+        # Requests already in flight see the same congestion; only back off once per round trip
+        if now - self._last_decrease < latency:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+
+
+class RateLimiter(object):
+    """
+    Token bucket capping the rate of requests, e.g. shared by the sessions of a whole fleet run so that the total
+    load on a shared management network or AAA server stays bounded however many switches run concurrently.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        :param rate: Sustained number of requests per second
+        :param burst: Number of requests that may be sent back to back after an idle period. Defaults to rate,
+            at least 1.
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Block until a request may be sent under the rate limit.
+
+        :return: Nothing
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                delay = (1.0 - self.tokens) / self.rate
+            time.sleep(delay)
@@ -1,19 +1,31 @@
 from src import common_ops
 
 
-def get_all_mac_addrs(vlan_id, **kwargs):
+def get_all_mac_addrs(vlan_id, depth=0, attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get MAC address(es) for VLAN
 
     :param vlan_id: Numeric ID of VLAN
+    :param depth: Integer deciding how many levels into the API JSON that references will be returned.
+        At depth 1 each entry contains the MAC data (type, address and port) instead of its URI.
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["mac_addr", "port"];
+        the entries are then returned at depth 1
+    :param filters: Optional filters on attribute values, e.g. ["from=dynamic"]; see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
-    :return: List of MAC address URIs
+    :return: List/dict of MAC address URIs, or of MAC data if depth is 1 or more or attributes or filters are given
     """
     target_url = kwargs["url"] + "system/vlans/%d/macs" % vlan_id
 
-    response = kwargs["s"].get(target_url, verify=False)
+    mac_data = None
+    if attributes or filters:
+        response, mac_data = common_ops._get_table(target_url, attributes, filters, **kwargs)
+    else:
+        payload = {
+            "depth": depth
+        }
+        response = kwargs["s"].get(target_url, verify=False, params=payload)
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting MAC address(es) of VLAN ID '%d' failed with status code %d"
@@ -21,7 +33,8 @@ def get_all_mac_addrs(vlan_id, **kwargs):
     else:
         print("SUCCESS: Getting MAC address(es) of VLAN ID '%d' succeeded" % vlan_id)
 
-    mac_data = response.json()
+    if mac_data is None:
+        mac_data = response.json()
     return mac_data
 
 
@@ -0,0 +1,219 @@
+from src import common_ops, fleet, mac, vlan
+
+import sys
+import threading
+
+
+def mac_to_int(mac_addr):
+    """
+    Encode a MAC address as a 48-bit integer.
+
+    :param mac_addr: MAC address in any common notation, e.g. "00:50:56:96:a4:5b", "0050.5696.a45b"
+    :return: Integer between 0 and 2**48 - 1
+    """
+    return int(mac_addr.replace(":", "").replace("-", "").replace(".", ""), 16)
+
+
+def int_to_mac(mac_int):
+    """
+    Decode a 48-bit integer into a colon-separated lowercase MAC address.
+
+    :param mac_int: Integer between 0 and 2**48 - 1
+    :return: MAC address string, e.g. "00:50:56:96:a4:5b"
+    """
+    mac_hex = "%012x" % mac_int
+    return ":".join(mac_hex[i:i + 2] for i in range(0, 12, 2))
+
+
+def _port_name(port_ref):
+    """
+    Return the name of the port a MAC entry is learned on, whatever form the reference takes.
+
+    :param port_ref: Port reference URI, dictionary {name: URI}, or None
+    :return: Port name such as "1/1/1", or None
+    """
+    if not port_ref:
+        return None
+    if isinstance(port_ref, dict):
+        return next(iter(port_ref))
+    return common_ops._uri_key(port_ref)
+
+
+def parse_mac_entries(mac_data):
+    """
+    Convert the output of mac.get_all_mac_addrs() into compact (MAC integer, port, type) tuples.
+    Entries returned at depth 0 are bare URIs and carry no port; those get a port of None.
+
+    :param mac_data: List/dict returned by mac.get_all_mac_addrs(), at any depth
+    :return: List of (MAC integer, port name, MAC type) tuples
+    """
+    entries = []
+    items = mac_data.items() if isinstance(mac_data, dict) else ((None, item) for item in mac_data)
+    for key, item in items:
+        if isinstance(item, dict):
+            mac_type = item.get('from')
+            mac_addr = item.get('mac_addr')
+            port_name = _port_name(item.get('port'))
+            if (mac_type is None or mac_addr is None) and key:
+                # v10.04 keys are "<type>,<MAC address>"
+                mac_type, mac_addr = key.split(',', 1)
+        elif isinstance(item, str) and "/macs/" in item:
+            # Bare URI such as /rest/v1/system/vlans/1/macs/dynamic/00%3A50%3A56%3A96%3Aa4%3A5b
+            mac_type, mac_addr = common_ops._parse_uri(item)[1][-2:]
+            port_name = None
+        else:
+            continue
+        entries.append((mac_to_int(common_ops._replace_percents(mac_addr)),
+                        sys.intern(port_name) if port_name else None,
+                        sys.intern(mac_type)))
+    return entries
+
+
+class MacIndex(object):
+    """
+    Fleet-wide index from MAC address to the places it is learned.
+
+    MAC addresses are stored as 48-bit integers. Entries are grouped in slices, one per (switch, VLAN); refreshing
+    a slice only touches the MACs that were added, moved or removed in it, and an unchanged slice costs one
+    comparison. Lookups are a single dictionary access regardless of the size of the index.
+    """
+
+    def __init__(self):
+        # (switch, vlan_id) -> {mac_int: (port, mac_type)}
+        self._slices = {}
+        # mac_int -> set of (switch, vlan_id) slices the MAC appears in
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._slices.values())
+
+    def refresh_vlan(self, switch, vlan_id, entries):
+        """
+        Replace the slice of one VLAN on one switch.
+
+        :param switch: Switch identifier, e.g. its IP address
+        :param vlan_id: Numeric ID of VLAN
+        :param entries: Iterable of (MAC integer, port name, MAC type) tuples, as returned by parse_mac_entries()
+        :return: Number of MAC addresses added, changed or removed in the slice
+        """
+        slice_key = (switch, vlan_id)
+        new_slice = {mac_int: (port_name, mac_type) for mac_int, port_name, mac_type in entries}
+        with self._lock:
+            return self._replace_slice(slice_key, new_slice)
+
+    def _replace_slice(self, slice_key, new_slice):
+        old_slice = self._slices.get(slice_key, {})
+        if new_slice == old_slice:
+            return 0
+
+        changed = 0
+        for mac_int in old_slice.keys() - new_slice.keys():
+            locations = self._index[mac_int]
+            locations.discard(slice_key)
+            if not locations:
+                del self._index[mac_int]
+            changed += 1
+        for mac_int, location in new_slice.items():
+            old_location = old_slice.get(mac_int)
+            if old_location is None:
+                self._index.setdefault(mac_int, set()).add(slice_key)
+            if old_location != location:
+                changed += 1
+
+        if new_slice:
+            self._slices[slice_key] = new_slice
+        else:
+            self._slices.pop(slice_key, None)
+        return changed
+
+    def remove_vlan(self, switch, vlan_id):
+        """
+        Drop the slice of one VLAN on one switch, e.g. after the VLAN was deleted.
+
+        :param switch: Switch identifier
+        :param vlan_id: Numeric ID of VLAN
+        :return: Number of MAC addresses removed
+        """
+        return self.refresh_vlan(switch, vlan_id, [])
+
+    def remove_switch(self, switch):
+        """
+        Drop every slice of one switch.
+
+        :param switch: Switch identifier
+        :return: Number of MAC addresses removed
+        """
+        return sum(self.remove_vlan(switch, vlan_id) for vlan_id in self.vlans(switch))
+
+    def vlans(self, switch):
+        """
+        Return the VLAN IDs that have a slice for a switch.
+
+        :param switch: Switch identifier
+        :return: List of VLAN IDs
+        """
+        with self._lock:
+            return [vlan_id for slice_switch, vlan_id in self._slices if slice_switch == switch]
+
+    def lookup(self, mac_addr):
+        """
+        Return every place a MAC address is learned.
+
+        :param mac_addr: MAC address string or 48-bit integer
+        :return: List of (switch, VLAN ID, port name, MAC type) tuples; empty if the MAC is unknown
+        """
+        mac_int = mac_addr if isinstance(mac_addr, int) else mac_to_int(mac_addr)
+        with self._lock:
+            return [slice_key + self._slices[slice_key][mac_int] for slice_key in self._index.get(mac_int, ())]
+
+    def port_mac_counts(self):
+        """
+        Count the MAC addresses learned on every port. Uplinks and inter-switch links learn far more MACs than
+        access ports, which makes this count a simple way to tell them apart.
+
+        :return: Dictionary keyed by (switch, port name) with the number of MAC addresses as value
+        """
+        counts = {}
+        with self._lock:
+            for (switch, vlan_id), entries in self._slices.items():
+                for port_name, mac_type in entries.values():
+                    counts[(switch, port_name)] = counts.get((switch, port_name), 0) + 1
+        return counts
+
+    def collect(self, switch, vlan_ids=None, max_workers=4, **kwargs):
+        """
+        Perform GET calls to refresh the slices of one switch. VLANs that no longer exist on the switch are dropped.
+
+        :param switch: Switch identifier
+        :param vlan_ids: Optional list of VLAN IDs to refresh. Defaults to every VLAN on the switch.
+        :param max_workers: Maximum number of concurrent calls to the switch
+        :param kwargs:
+            keyword s: requests.session object with loaded cookie jar
+            keyword url: URL in main() function
+        :return: Number of MAC addresses added, changed or removed
+        """
+        changed = 0
+        if vlan_ids is None:
+            vlan_ids = [int(vlan_id) for vlan_id in common_ops._table_keys(vlan.get_all_vlans(**kwargs))]
+            for stale_vlan_id in set(self.vlans(switch)) - set(vlan_ids):
+                changed += self.remove_vlan(switch, stale_vlan_id)
+
+        results = fleet.run_parallel(lambda vlan_id: mac.get_all_mac_addrs(vlan_id, depth=1, **kwargs),
+                                     {vlan_id: vlan_id for vlan_id in vlan_ids}, max_workers)
+        for vlan_id, mac_data in results.items():
+            # A failed GET leaves the previous slice in place rather than emptying it
+            if isinstance(mac_data, (list, dict)):
+                changed += self.refresh_vlan(switch, vlan_id, parse_mac_entries(mac_data))
+        return changed
+
+    def collect_fleet(self, session_dicts, max_workers=16):
+        """
+        Refresh the slices of many switches concurrently.
+
+        :param session_dicts: Dictionary keyed by switch IP with a session dictionary (keys 's' and 'url') as value
+        :param max_workers: Maximum number of switches refreshed concurrently
+        :return: Dictionary keyed by switch IP with the number of MAC addresses changed, or None if the switch failed
+        """
+        return fleet.run_parallel(lambda switch: self.collect(switch, **session_dicts[switch]),
+                                  {switch: switch for switch in session_dicts}, max_workers)
@@ -0,0 +1,250 @@
+from src import arp, bgp, common_ops, fleet, interface, mac, ospf, output, system, vlan, vrf
+
+import threading
+import time
+
+# HELP text for every metric family the exporter emits
+METRIC_HELP = {
+    "aoscx_up": "Whether the last poll of the switch succeeded",
+    "aoscx_poll_duration_seconds": "Time taken by the last poll of the switch",
+    "aoscx_system_info": "Switch identity, always 1",
+    "aoscx_interface_statistics_total": "Interface counter as reported by the switch",
+    "aoscx_arp_entries": "Number of entries in the Neighbors table of a VRF",
+    "aoscx_mac_entries": "Number of MAC addresses learned on a VLAN",
+    "aoscx_bgp_neighbors": "Number of BGP neighbors configured on a BGP router",
+    "aoscx_bgp_neighbor_up": "Whether the BGP session with the neighbor is Established, the 'state' label holds "
+                             "the session state",
+    "aoscx_ospf_routers": "Number of OSPF routers configured on a VRF",
+    "aoscx_ospf_neighbor_up": "Whether the OSPF adjacency with the neighbor is Full (or 2-Way between non-DR routers), "
+                              "the 'state' label holds the neighbor state",
+}
+
+# OSPF neighbor states of a working adjacency, lower case without separators
+OSPF_UP_STATES = ("full", "2way", "twoway")
+
+
+def collect_switch_metrics(switch, max_workers=4, **kwargs):
+    """
+    Perform the GET calls needed to sample the metrics of one switch, issuing independent calls concurrently.
+
+    :param switch: Switch identifier used as the 'switch' label, e.g. its IP address
+    :param max_workers: Maximum number of concurrent calls to the switch
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: List of (metric name, labels dictionary, value) tuples, including 'aoscx_up', which is 0 if one of the
+        switch-wide GET calls (system, interface statistics, VRFs, VLANs) failed
+    """
+    start = time.time()
+    samples = []
+    tasks = {
+        # Identity attributes are status attributes, not part of the configuration selector
+        "system": lambda: system.get_system_info(params={"attributes": "firmware_version,hostname,platform_name"},
+                                                 **kwargs),
+        "statistics": lambda: interface.get_all_interface_statistics(**kwargs),
+        "vrfs": lambda: common_ops._table_keys(vrf.get_all_vrfs(**kwargs)),
+        "vlans": lambda: common_ops._table_keys(vlan.get_all_vlans(**kwargs)),
+    }
+    with output.capture(tee=True) as buffer:
+        results = fleet.run_parallel(lambda task: task(), tasks, max_workers)
+    # The getters print a failure and return an empty result when a GET fails instead of raising
+    up = 0 if output.failed("".join(buffer)) or None in results.values() else 1
+
+    system_info = results["system"] or {}
+    samples.append(("aoscx_system_info",
+                    {"switch": switch,
+                     "hostname": system_info.get("hostname", ""),
+                     "platform_name": system_info.get("platform_name", ""),
+                     "firmware_version": system_info.get("firmware_version", "")},
+                    1))
+
+    for int_name, statistics in (results["statistics"] or {}).items():
+        for counter, value in statistics.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                samples.append(("aoscx_interface_statistics_total",
+                                {"switch": switch, "interface": int_name, "counter": counter}, value))
+
+    # Second round: per-VRF and per-VLAN tables, fanned out over the same number of workers
+    vrf_names = results["vrfs"] or []
+    vlan_ids = [int(vlan_id) for vlan_id in (results["vlans"] or []) if str(vlan_id).isdigit()]
+    tasks = {}
+    for vrf_name in vrf_names:
+        tasks[("arp", vrf_name)] = (lambda v: lambda: len(arp.get_arp_entries(v, **kwargs)))(vrf_name)
+        tasks[("bgp", vrf_name)] = (lambda v: lambda: _bgp_neighbor_states(v, **kwargs))(vrf_name)
+        tasks[("ospf", vrf_name)] = (lambda v: lambda: _ospf_neighbor_states(v, **kwargs))(vrf_name)
+    for vlan_id in vlan_ids:
+        tasks[("mac", vlan_id)] = (lambda v: lambda: len(mac.get_all_mac_addrs(v, **kwargs)))(vlan_id)
+    results = fleet.run_parallel(lambda task: task(), tasks, max_workers)
+
+    for (kind, key), value in sorted(results.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+        if value is None:
+            continue
+        if kind == "arp":
+            samples.append(("aoscx_arp_entries", {"switch": switch, "vrf": key}, value))
+        elif kind == "mac":
+            samples.append(("aoscx_mac_entries", {"switch": switch, "vlan": str(key)}, value))
+        elif kind == "ospf":
+            samples.append(("aoscx_ospf_routers", {"switch": switch, "vrf": key}, len(value)))
+            for ospf_id, neighbors in sorted(value.items()):
+                for (area_id, interface_name, neighbor), state in sorted(neighbors.items()):
+                    normalized = str(state).lower().replace("-", "").replace("_", "")
+                    samples.append(("aoscx_ospf_neighbor_up",
+                                    {"switch": switch, "vrf": key, "ospf_id": ospf_id, "area": area_id,
+                                     "interface": interface_name, "neighbor": neighbor, "state": state or ""},
+                                    1 if normalized in OSPF_UP_STATES else 0))
+        elif kind == "bgp":
+            for asn, neighbors in value.items():
+                samples.append(("aoscx_bgp_neighbors", {"switch": switch, "vrf": key, "asn": asn}, len(neighbors)))
+                for neighbor, state in sorted(neighbors.items()):
+                    samples.append(("aoscx_bgp_neighbor_up",
+                                    {"switch": switch, "vrf": key, "asn": asn, "neighbor": neighbor,
+                                     "state": state or ""},
+                                    1 if state == "Established" else 0))
+
+    samples.append(("aoscx_poll_duration_seconds", {"switch": switch}, time.time() - start))
+    samples.append(("aoscx_up", {"switch": switch}, up))
+    return samples
+
+
+def _bgp_neighbor_states(vrf_name, **kwargs):
+    """
+    Perform GET calls to get the session state of the BGP neighbors of every BGP router in a VRF.
+
+    :param vrf_name: Alphanumeric name of the VRF
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by ASN with a dictionary keyed by neighbor with its session state
+        (status 'bgp_peer_state', e.g. "Established" or "Idle") as value
+    """
+    states = {}
+    for asn in common_ops._table_keys(bgp.get_bgp_routers(vrf_name, **kwargs)):
+        table = bgp.get_bgp_neighbors_list(vrf_name, asn, attributes=["ip_or_ifname_or_group_name", "status"],
+                                           **kwargs)
+        items = table.items() if isinstance(table, dict) else ((None, entry) for entry in table)
+        states[asn] = {}
+        for key, entry in items:
+            if isinstance(entry, dict):
+                neighbor = entry.get("ip_or_ifname_or_group_name") or common_ops._replace_percents(key or "")
+                states[asn][neighbor] = (entry.get("status") or {}).get("bgp_peer_state")
+    return states
+
+
+def _ospf_neighbor_states(vrf_name, **kwargs):
+    """
+    Perform GET calls to get the state of the neighbors of every OSPF router in a VRF.
+
+    :param vrf_name: Alphanumeric name of the VRF
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by OSPF ID with the result of ospf.get_ospf_neighbors() as value (an empty
+        dictionary if it failed)
+    """
+    return {ospf_id: ospf.get_ospf_neighbors(vrf_name, ospf_id, **kwargs) or {}
+            for ospf_id in common_ops._table_keys(ospf.get_ospf_routers(vrf_name, **kwargs))}
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_metrics(samples):
+    """
+    Render samples in the Prometheus text exposition format (version 0.0.4).
+
+    :param samples: Iterable of (metric name, labels dictionary, value) tuples
+    :return: String ready to be served on a /metrics endpoint
+    """
+    families = {}
+    for name, labels, value in samples:
+        families.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(families):
+        lines.append("# HELP %s %s" % (name, METRIC_HELP.get(name, name)))
+        lines.append("# TYPE %s %s" % (name, "counter" if name.endswith("_total") else "gauge"))
+        for labels, value in families[name]:
+            label_str = ",".join('%s="%s"' % (key, _escape_label_value(labels[key])) for key in sorted(labels))
+            lines.append("%s{%s} %s" % (name, label_str, repr(float(value)) if isinstance(value, float) else value))
+    return "\n".join(lines) + "\n"
+
+
+class MetricsCache(object):
+    """
+    Background poller that keeps the latest metrics of every switch in memory.
+
+    Each switch is polled over its own persistent session; render() only reads the cache,
+    so scrapes never wait on a switch round trip.
+    """
+
+    def __init__(self, session_dicts, interval=60, max_workers=16, unreachable=()):
+        """
+        :param session_dicts: Dictionary keyed by switch IP with a session dictionary (keys 's' and 'url') as value
+        :param interval: Seconds between the start of two polls of the fleet
+        :param max_workers: Maximum number of switches polled concurrently
+        :param unreachable: Switch IPs without a session, e.g. that failed to log in, exported as down
+        """
+        self.session_dicts = session_dicts
+        self.unreachable = [switch for switch in unreachable if switch not in session_dicts]
+        self.interval = interval
+        self.max_workers = max_workers
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll(self):
+        """
+        Poll every switch once and replace its cached samples.
+
+        :return: Nothing
+        """
+        def _poll(switch):
+            return collect_switch_metrics(switch, **self.session_dicts[switch])
+
+        results = fleet.run_parallel(_poll, {switch: switch for switch in self.session_dicts}, self.max_workers)
+        with self._lock:
+            for switch, samples in results.items():
+                if samples is None:
+                    # Keep the last good samples but flag the switch as down
+                    samples = [sample for sample in self._samples.get(switch, []) if sample[0] != "aoscx_up"]
+                    samples.append(("aoscx_up", {"switch": switch}, 0))
+                self._samples[switch] = samples
+            for switch in self.unreachable:
+                self._samples[switch] = [("aoscx_up", {"switch": switch}, 0)]
+
+    def _run(self):
+        while not self._stop.is_set():
+            start = time.time()
+            self.poll()
+            self._stop.wait(max(0, self.interval - (time.time() - start)))
+
+    def start(self):
+        """
+        Start polling in a daemon thread.
+
+        :return: Nothing
+        """
+        self._thread = threading.Thread(target=self._run, name="aoscx-metrics-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the polling thread and wait for the current poll to finish.
+
+        :return: Nothing
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def render(self):
+        """
+        Return the cached metrics of every switch in the Prometheus text exposition format.
+
+        :return: String
+        """
+        with self._lock:
+            samples = [sample for switch in sorted(self._samples) for sample in self._samples[switch]]
+        return format_metrics(samples)
@@ -0,0 +1,336 @@
+"""
+Compact models of the entries returned by the getters in /src.
+
+The REST API returns every entry as a dictionary whose references are full URIs, e.g.
+{"vlan_tag": {"10": "/rest/v10.04/system/vlans/10"}}. The models below keep the same information in __slots__
+objects: references become plain keys (integer VLAN IDs, interface and VRF names), MAC addresses become 48-bit
+integers and repeated strings (names, types, states) are interned, so that a fleet inventory of 100k+ entries
+takes a fraction of the memory and is faster to traverse. to_rest() rebuilds the REST form of an entry; since the
+models only keep a summary of it, a PUT body must be built on the writable data read from the switch.
+"""
+
+from src import common_ops, mac_index
+
+import sys
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _ref_keys(refs):
+    if not refs:
+        return ()
+    if isinstance(refs, dict):
+        return common_ops._table_keys(refs)
+    return [common_ops._ref_key(ref) for ref in refs]
+
+
+def _vlan_int(key):
+    return int(key) if key is not None else None
+
+
+def _uri(version, table, key):
+    return "/rest/%s/system/%s/%s" % (version, table, common_ops._replace_special_characters(str(key)))
+
+
+def _merged(body, current, immutable=()):
+    """
+    Merge the attributes a model keeps into the writable data of its entry, e.g. as returned by
+    interface.get_all_interface_configurations(), so that a PUT of the result keeps every other attribute.
+    The entry key and the attributes that cannot be modified are left out, as a PUT must not carry them.
+    """
+    if current is None:
+        return body
+    merged = dict(current)
+    merged.update(body)
+    for attribute in immutable:
+        merged.pop(attribute, None)
+    return merged
+
+
+def _items(data):
+    """
+    Iterate over the entries of a table returned at depth 1 or more, as a dictionary keyed by entry key (v10.04)
+    or as a list (v1), skipping bare reference URIs.
+    """
+    items = data.items() if isinstance(data, dict) else ((None, item) for item in data or ())
+    for key, item in items:
+        if isinstance(item, dict):
+            yield key, item
+
+
+class _Model(object):
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(getattr(self, slot) == getattr(other, slot)
+                                                 for slot in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, slot) for slot in self.__slots__))
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__,
+                           ", ".join("%s=%r" % (slot, getattr(self, slot)) for slot in self.__slots__
+                                     if getattr(self, slot) is not None))
+
+
+class Vlan(_Model):
+    """
+    VLAN table entry, see vlan.get_vlan().
+    """
+
+    __slots__ = ("id", "name", "type", "admin", "description")
+
+    # Left out of a PUT body, see vlan._attach_vlan_acl()
+    immutable = ("id", "type")
+
+    def __init__(self, id, name=None, type="static", admin=None, description=None):
+        self.id = int(id)
+        self.name = _intern(name)
+        self.type = _intern(type)
+        self.admin = _intern(admin)
+        self.description = description
+
+    @classmethod
+    def from_rest(cls, data, key=None):
+        """
+        :param data: Dictionary of a VLAN entry
+        :param key: Entry key, used when the entry does not include its 'id'
+        :return: Vlan
+        """
+        return cls(data.get("id", key), data.get("name"), data.get("type", "static"), data.get("admin"),
+                   data.get("description"))
+
+    def to_rest(self, version="v10.04", current=None):
+        """
+        :param version: API version, e.g. 'v1' or 'v10.04'
+        :param current: Optional writable data of the entry read from the switch, which the result is built on,
+            leaving out the entry key and the attributes in 'immutable'
+        :return: Dictionary usable as POST body. The model only keeps a summary of the entry: use it as PUT body
+            only when built on the current writable data, otherwise the PUT clears every other attribute.
+        """
+        body = {"id": self.id, "name": self.name, "type": self.type}
+        if self.admin is not None:
+            body["admin"] = self.admin
+        if self.description is not None:
+            body["description"] = self.description
+        return _merged(body, current, self.immutable)
+
+
+class Interface(_Model):
+    """
+    Interface (or v1 Port) table entry, see interface.get_interface() and interface.get_all_interfaces().
+    """
+
+    __slots__ = ("name", "type", "admin", "description", "routing", "vrf", "vlan_mode", "vlan_tag", "vlan_trunks",
+                 "ip4_address")
+
+    # Left out of a PUT body
+    immutable = ("name", "type")
+
+    def __init__(self, name, type=None, admin=None, description=None, routing=None, vrf=None, vlan_mode=None,
+                 vlan_tag=None, vlan_trunks=(), ip4_address=None):
+        self.name = _intern(name)
+        self.type = _intern(type)
+        self.admin = _intern(admin)
+        self.description = description
+        self.routing = routing
+        self.vrf = _intern(vrf)
+        self.vlan_mode = _intern(vlan_mode)
+        self.vlan_tag = vlan_tag
+        self.vlan_trunks = tuple(sorted(vlan_trunks))
+        self.ip4_address = ip4_address
+
+    @classmethod
+    def from_rest(cls, data, key=None):
+        """
+        :param data: Dictionary of an Interface or Port entry
+        :param key: Entry key, used when the entry does not include its 'name'
+        :return: Interface
+        """
+        return cls(data.get("name", key), data.get("type"), data.get("admin"), data.get("description"),
+                   data.get("routing"), common_ops._ref_key(data.get("vrf")), data.get("vlan_mode"),
+                   _vlan_int(common_ops._ref_key(data.get("vlan_tag"))),
+                   [int(vlan_id) for vlan_id in _ref_keys(data.get("vlan_trunks"))], data.get("ip4_address"))
+
+    def to_rest(self, version="v10.04", current=None):
+        """
+        :param version: API version, e.g. 'v1' or 'v10.04'
+        :param current: Optional writable data of the entry read from the switch, see
+            interface.get_all_interface_configurations(), which the result is built on, leaving out the
+            attributes in 'immutable'
+        :return: Summary of the entry in REST form, with VLANs and VRF as reference URIs. Use it as PUT body only
+            when built on the current writable data: otherwise the PUT clears every attribute the model does not
+            keep, such as the ACLs applied, other_config or the LAG membership.
+        """
+        body = {"name": self.name}
+        for attribute in ("type", "admin", "description", "routing", "vlan_mode", "ip4_address"):
+            if getattr(self, attribute) is not None:
+                body[attribute] = getattr(self, attribute)
+        if self.vrf is not None:
+            body["vrf"] = _uri(version, "vrfs", self.vrf)
+        if self.vlan_tag is not None:
+            body["vlan_tag"] = _uri(version, "vlans", self.vlan_tag)
+        if self.vlan_trunks:
+            body["vlan_trunks"] = [_uri(version, "vlans", vlan_id) for vlan_id in self.vlan_trunks]
+        return _merged(body, current, self.immutable)
+
+
+class Ace(_Model):
+    """
+    ACL entry (cfg_aces), see acl.get_all_acl_entries() and acl.create_acl_entry().
+    """
+
+    __slots__ = ("sequence_number", "action", "protocol", "src_ip", "dst_ip", "dst_l4_port_min", "dst_l4_port_max",
+                 "src_mac", "dst_mac", "ethertype", "count")
+
+    # Left out of a PUT body
+    immutable = ("sequence_number",)
+
+    def __init__(self, sequence_number, action, protocol=None, src_ip=None, dst_ip=None, dst_l4_port_min=None,
+                 dst_l4_port_max=None, src_mac=None, dst_mac=None, ethertype=None, count=None):
+        self.sequence_number = int(sequence_number)
+        self.action = _intern(action)
+        self.protocol = protocol
+        self.src_ip = _intern(src_ip)
+        self.dst_ip = _intern(dst_ip)
+        self.dst_l4_port_min = dst_l4_port_min
+        self.dst_l4_port_max = dst_l4_port_max
+        self.src_mac = src_mac
+        self.dst_mac = dst_mac
+        self.ethertype = ethertype
+        self.count = count
+
+    @classmethod
+    def from_rest(cls, data, key=None):
+        """
+        :param data: Dictionary of an ACL entry
+        :param key: Entry key (the sequence number), used when the entry does not include its 'sequence_number'
+        :return: Ace
+        """
+        return cls(data.get("sequence_number", key), data.get("action"),
+                   **{slot: data.get(slot) for slot in cls.__slots__[2:]})
+
+    def to_rest(self, version="v10.04", current=None):
+        """
+        :param version: API version, e.g. 'v1' or 'v10.04'
+        :param current: Optional writable data of the entry read from the switch, which the result is built on,
+            leaving out the entry key and the attributes in 'immutable'
+        :return: Dictionary usable as POST body, as built by acl.create_acl_entry(). The model only keeps a summary
+            of the entry: use it as PUT body only when built on the current writable data, otherwise the PUT clears
+            every other attribute of the entry.
+        """
+        return _merged({slot: getattr(self, slot) for slot in self.__slots__ if getattr(self, slot) is not None},
+                       current, self.immutable)
+
+
+class Neighbor(_Model):
+    """
+    Neighbors (ARP/ND) table entry of a VRF, see arp.get_all_neighbors().
+    """
+
+    __slots__ = ("ip_address", "mac", "vrf", "port", "phy_port", "state")
+
+    def __init__(self, ip_address, mac, vrf=None, port=None, phy_port=None, state=None):
+        self.ip_address = ip_address
+        self.mac = mac if isinstance(mac, int) else mac_index.mac_to_int(mac)
+        self.vrf = _intern(vrf)
+        self.port = _intern(port)
+        self.phy_port = _intern(phy_port)
+        self.state = _intern(state)
+
+    @classmethod
+    def from_rest(cls, data, vrf=None):
+        """
+        :param data: Dictionary of a Neighbors entry
+        :param vrf: Name of the VRF the entry belongs to
+        :return: Neighbor
+        """
+        return cls(data["ip_address"], data["mac"], vrf, common_ops._ref_key(data.get("port")),
+                   common_ops._ref_key(data.get("phy_port")), data.get("state"))
+
+    def to_rest(self, version="v10.04"):
+        """
+        :param version: API version, e.g. 'v1' or 'v10.04'
+        :return: Dictionary in the form returned by the REST API, with ports as reference URIs
+        """
+        body = {"ip_address": self.ip_address, "mac": mac_index.int_to_mac(self.mac)}
+        table = "ports" if version == "v1" else "interfaces"
+        if self.port is not None:
+            body["port"] = _uri(version, table, self.port)
+        if self.phy_port is not None:
+            body["phy_port"] = _uri(version, table, self.phy_port)
+        if self.state is not None:
+            body["state"] = self.state
+        return body
+
+
+class MacEntry(_Model):
+    """
+    MAC table entry of a VLAN, see mac.get_all_mac_addrs().
+    """
+
+    __slots__ = ("mac", "vlan", "type", "port")
+
+    def __init__(self, mac, vlan, type="dynamic", port=None):
+        self.mac = mac if isinstance(mac, int) else mac_index.mac_to_int(mac)
+        self.vlan = int(vlan)
+        self.type = _intern(type)
+        self.port = _intern(port)
+
+    def to_rest(self, version="v10.04"):
+        """
+        :param version: API version, e.g. 'v1' or 'v10.04'
+        :return: Dictionary in the form returned by the REST API, with the port as reference URI
+        """
+        body = {"mac_addr": mac_index.int_to_mac(self.mac), "from": self.type}
+        if self.port is not None:
+            body["port"] = _uri(version, "ports" if version == "v1" else "interfaces", self.port)
+        return body
+
+
+def vlans_from_rest(data):
+    """
+    :param data: VLAN entries returned at depth 1, as a dictionary keyed by VLAN ID or a list
+    :return: List of Vlan
+    """
+    return [Vlan.from_rest(item, key) for key, item in _items(data)]
+
+
+def interfaces_from_rest(data):
+    """
+    :param data: Interface or Port entries returned at depth 1, as a dictionary keyed by name or a list
+    :return: List of Interface
+    """
+    return [Interface.from_rest(item, key) for key, item in _items(data)]
+
+
+def aces_from_rest(data):
+    """
+    :param data: ACL entries returned at depth 1, as a dictionary keyed by sequence number or a list
+    :return: List of Ace, ordered by sequence number
+    """
+    return sorted((Ace.from_rest(item, key) for key, item in _items(data)), key=lambda ace: ace.sequence_number)
+
+
+def neighbors_from_rest(data, vrf=None):
+    """
+    :param data: Output of arp.get_all_neighbors() at depth 1
+    :param vrf: Name of the VRF the entries belong to
+    :return: List of Neighbor; entries without IP or MAC address are skipped
+    """
+    return [Neighbor.from_rest(item, vrf) for _, item in _items(data) if item.get("ip_address") and item.get("mac")]
+
+
+def macs_from_rest(data, vlan):
+    """
+    :param data: Output of mac.get_all_mac_addrs(), at any depth
+    :param vlan: VLAN ID the entries belong to
+    :return: List of MacEntry
+    """
+    return [MacEntry(mac_int, vlan, mac_type, port) for mac_int, port, mac_type in mac_index.parse_mac_entries(data)]
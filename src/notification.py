@@ -0,0 +1,229 @@
+from src import common_ops
+
+import json
+import ssl
+import threading
+
+import websocket
+
+
+class NotificationSubscriber(object):
+    """
+    Client for the AOS-CX WebSocket notification service.
+
+    The subscriber reuses the cookie of a session returned by session.login(), subscribes to a set of tables and
+    keeps a local cache of those tables up to date from the pushed notifications, so table state can be tracked
+    without re-polling get_all_* functions.
+    The cache is a dictionary keyed by table path (e.g. "interfaces" or "vrfs/default/neighbors"), each value being a
+    dictionary keyed by entry name (e.g. "1/1/1") with the attribute dictionary of that entry as value.
+    When the WebSocket is lost, the subscriber connects and subscribes again; the switch answers a subscription with
+    the current content of the tables, which replaces the cache, so changes missed in between are not lost.
+    """
+
+    def __init__(self, tables, on_change=None, reconnect_delay=1, **kwargs):
+        """
+        :param tables: Dictionary keyed by table path relative to 'system/' (e.g. "interfaces", "vlans") with the list
+            of attributes to subscribe to as value, or None to subscribe to every attribute
+        :param on_change: Optional callable invoked as on_change(table, entry_name, operation, values) for every
+            applied notification, operation being 'inserted', 'modified' or 'deleted'
+        :param reconnect_delay: Seconds to wait before reconnecting after a failed attempt, doubled after every
+            failure up to 30 seconds
+        :param kwargs:
+            keyword s: requests.session object with loaded cookie jar
+            keyword url: URL in main() function
+        """
+        self.tables = tables
+        self.on_change = on_change
+        self.session = kwargs["s"]
+        self.url = kwargs["url"]
+        # e.g. "https://10.0.0.1/rest/v10.04/" -> "/rest/v10.04/system/"
+        self._system_path = "/" + self.url.split("://", 1)[-1].split("/", 1)[-1] + "system/"
+        self.cache = {table: {} for table in tables}
+        self.reconnect_delay = reconnect_delay
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._ws = None
+        self._thread = None
+
+    def notification_url(self):
+        """
+        Return the WebSocket URL of the notification service of the switch the session is logged in to.
+
+        :return: String such as 'wss://10.0.0.1/rest/v10.04/notification'
+        """
+        url = self.url
+        if url.startswith("https://"):
+            url = "wss://" + url[len("https://"):]
+        elif url.startswith("http://"):
+            url = "ws://" + url[len("http://"):]
+        return url + "notification"
+
+    def _topics(self):
+        topics = []
+        for table, attributes in self.tables.items():
+            name = self._system_path + table
+            if attributes:
+                name += "?attributes=%s" % ",".join(attributes)
+            topics.append({"name": name})
+        return topics
+
+    def connect(self, timeout=10):
+        """
+        Open the WebSocket using the session cookie and send the subscription request.
+
+        :param timeout: Seconds to wait for the connection to be established
+        :return: Nothing
+        """
+        cookie = "; ".join("%s=%s" % item for item in self.session.cookies.get_dict().items())
+        self._ws = websocket.create_connection(self.notification_url(), timeout=timeout, cookie=cookie,
+                                               sslopt={"cert_reqs": ssl.CERT_NONE})
+        self._ws.send(json.dumps({"type": "subscribe", "topics": self._topics()}))
+        print("SUCCESS: Subscribing to notifications for table(s) %s succeeded" % ", ".join(sorted(self.tables)))
+
+    def _split_uri(self, uri):
+        """
+        Split a resource URI into the subscribed table it belongs to and the entry name within that table.
+
+        :param uri: Resource URI, e.g. '/rest/v10.04/system/interfaces/1%2F1%2F1'
+        :return: (table, entry name) tuple, or (None, None) if the URI is not under a subscribed table
+        """
+        path = uri.split("?", 1)[0]
+        if path.startswith(self._system_path):
+            path = path[len(self._system_path):]
+        # Longest table first so that 'vrfs/default/neighbors' wins over 'vrfs'
+        for table in sorted(self.tables, key=len, reverse=True):
+            if path == table:
+                return table, None
+            if path.startswith(table + "/"):
+                return table, common_ops._replace_percents(path[len(table) + 1:])
+        return None, None
+
+    def apply(self, message):
+        """
+        Apply one notification message to the local cache.
+
+        :param message: Notification message, either as the raw JSON string received on the WebSocket or decoded
+        :return: Number of entries changed in the cache
+        """
+        if isinstance(message, (str, bytes)):
+            message = json.loads(message)
+        if message.get("type") not in ("notification", "success"):
+            return 0
+
+        changed = 0
+        for topic in message.get("data") or []:
+            for resource in topic.get("resources") or []:
+                table, entry_name = self._split_uri(resource.get("uri", ""))
+                if table is None:
+                    continue
+                operation = resource.get("operation", "modified")
+                values = resource.get("values") or {}
+                with self._lock:
+                    if entry_name is None:
+                        # Snapshot of a whole table, keyed by entry name
+                        if operation != "deleted":
+                            self.cache[table] = {name: dict(entry) for name, entry in values.items()}
+                    elif operation == "deleted":
+                        self.cache[table].pop(entry_name, None)
+                    elif operation == "inserted":
+                        self.cache[table][entry_name] = dict(values)
+                    else:
+                        self.cache[table].setdefault(entry_name, {}).update(values)
+                changed += 1
+                if self.on_change is not None:
+                    self.on_change(table, entry_name, operation, values)
+        return changed
+
+    def get(self, table, entry_name=None):
+        """
+        Return a copy of a cached table, or of one of its entries.
+
+        :param table: Subscribed table path, e.g. "interfaces"
+        :param entry_name: Optional entry name, e.g. "1/1/1"
+        :return: Dictionary, or None if the entry is not in the cache
+        """
+        with self._lock:
+            if entry_name is None:
+                return {name: dict(entry) for name, entry in self.cache[table].items()}
+            entry = self.cache[table].get(entry_name)
+            return dict(entry) if entry is not None else None
+
+    def _reconnect(self):
+        """
+        Connect and subscribe again after the WebSocket was lost, retrying until it succeeds or stop() is called.
+        A session able to log in again (see session.Session) does so if the switch refuses its cookie.
+
+        :return: True if connected, False if stopped
+        """
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            try:
+                self.connect()
+                self._ws.settimeout(None)
+                if self._stopped.is_set():
+                    # stop() was called while connecting
+                    ws, self._ws = self._ws, None
+                    if ws is not None:
+                        ws.close()
+                    return False
+                return True
+            except (websocket.WebSocketException, OSError) as error:
+                print("WARNING: Reconnecting to notifications failed: %s" % error)
+                if getattr(error, "status_code", None) == 401 and hasattr(self.session, "relogin"):
+                    self.session.relogin()
+            self._stopped.wait(delay)
+            delay = min(delay * 2, 30)
+        return False
+
+    def run(self):
+        """
+        Receive and apply notifications until stop() is called, reconnecting whenever the WebSocket is lost.
+
+        :return: Nothing
+        """
+        while not self._stopped.is_set():
+            ws = self._ws
+            if ws is None:
+                break
+            try:
+                opcode, message = ws.recv_data()
+                closed = opcode == websocket.ABNF.OPCODE_CLOSE
+            except websocket.WebSocketTimeoutException:
+                continue
+            except (websocket.WebSocketConnectionClosedException, OSError):
+                closed = True
+            if closed:
+                # The switch closed the WebSocket or the connection dropped
+                ws.shutdown()
+                if self._stopped.is_set() or not self._reconnect():
+                    break
+            elif message:
+                self.apply(message)
+
+    def start(self):
+        """
+        Connect if needed and apply notifications in a daemon thread.
+
+        :return: Nothing
+        """
+        self._stopped.clear()
+        if self._ws is None:
+            self.connect()
+        # Block in recv() indefinitely; notifications may be minutes apart
+        self._ws.settimeout(None)
+        self._thread = threading.Thread(target=self.run, name="aoscx-notifications", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Close the WebSocket and wait for the receiving thread to exit.
+
+        :return: Nothing
+        """
+        self._stopped.set()
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            ws.close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -3,10 +3,12 @@ from src import common_ops, interface, port
 import json
 
 
-def get_ospf_routers(vrf, **kwargs):
+def get_ospf_routers(vrf, attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get a list of all OSPF Router IDs
     :param vrf: Alphanumeric name of the VRF that we are retrieving all Router IDs from
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["router_id"]
+    :param filters: Optional filters on attribute values, e.g. ["router_id=1.1.1.1"]; see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
@@ -14,19 +16,65 @@ def get_ospf_routers(vrf, **kwargs):
     """
     target_url = kwargs["url"] + "system/vrfs/%s/ospf_routers" % vrf
 
-    response = kwargs["s"].get(target_url, verify=False)
+    response, ospf_list = common_ops._get_table(target_url, attributes, filters, **kwargs)
 
-    ospf_list = []
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting list of all OSPF Router IDs failed with status code %d"
               % response.status_code)
+        ospf_list = []
     else:
         print("SUCCESS: Getting list of all OSPF Router IDs succeeded")
-        ospf_list = response.json()
 
     return ospf_list
 
 
+def get_ospf_neighbors(vrf, ospf_id, **kwargs):
+    """
+    Perform GET calls to get the state of the OSPF neighbors of every interface of an OSPF router,
+    one call per area and one per OSPF interface
+    :param vrf: Alphanumeric name of the VRF the OSPF ID belongs to
+    :param ospf_id: OSPF process ID between numbers 1-63
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by (area ID, interface name, neighbor router ID) tuples with the neighbor state
+        (nfsm_state) as value, None if one of the calls failed
+    """
+    router_url = kwargs["url"] + "system/vrfs/%s/ospf_routers/%s" % (vrf, ospf_id)
+
+    response, areas = common_ops._get_table(router_url + "/areas", **kwargs)
+    if areas is None:
+        print("FAIL: Getting list of all OSPF areas of OSPF ID '%s' failed with status code %d"
+              % (ospf_id, response.status_code))
+        return None
+
+    neighbors = {}
+    for area_id in common_ops._table_keys(areas):
+        area_url = router_url + "/areas/%s" % area_id
+        response, ospf_interfaces = common_ops._get_table(area_url + "/ospf_interfaces", **kwargs)
+        if ospf_interfaces is None:
+            print("FAIL: Getting list of all OSPF interfaces of area '%s' failed with status code %d"
+                  % (area_id, response.status_code))
+            return None
+        for interface_name in common_ops._table_keys(ospf_interfaces):
+            interface_name_percents = common_ops._replace_special_characters(interface_name)
+            target_url = area_url + "/ospf_interfaces/%s/ospf_neighbors" % interface_name_percents
+            response, table = common_ops._get_table(target_url, attributes=["nbr_router_id", "nfsm_state"],
+                                                    **kwargs)
+            if table is None:
+                print("FAIL: Getting OSPF neighbors of interface '%s' failed with status code %d"
+                      % (interface_name, response.status_code))
+                return None
+            items = table.items() if isinstance(table, dict) else ((None, entry) for entry in table)
+            for key, entry in items:
+                if isinstance(entry, dict):
+                    neighbor_id = entry.get("nbr_router_id", common_ops._replace_percents(key or ""))
+                    neighbors[(area_id, interface_name, neighbor_id)] = entry.get("nfsm_state")
+
+    print("SUCCESS: Getting OSPF neighbors of OSPF ID '%s' succeeded" % ospf_id)
+    return neighbors
+
+
 def create_ospf_id(vrf, ospf_id, redistribute=["connected", "static"], **kwargs):
     """
     Perform a POST call to create an OSPF ID
@@ -0,0 +1,90 @@
+"""
+Capture of what /src functions and workflows print, per task instead of per process.
+
+The functions in /src report errors by printing 'FAIL:' or 'ERROR:' lines rather than raising. capture() collects
+what the current thread prints, including the worker threads of fleet.run_parallel() started from it, so the caller
+can tell whether the task reported a failure (see failed()) and print its output in one piece.
+"""
+
+import contextlib
+import contextvars
+import sys
+import threading
+
+# Lines printed by /src functions and workflows when something went wrong
+FAILURE_PREFIXES = ("FAIL", "ERROR", "Ran into exception")
+
+# Captures active in the current context, innermost last, as (buffer, tee) tuples
+_captures = contextvars.ContextVar("aoscx_output_captures", default=())
+_install_lock = threading.Lock()
+
+
+class CapturingStream(object):
+    """
+    sys.stdout replacement sending what is printed inside capture() to the buffer of the capture, and everything else
+    to the stream it wraps.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        for buffer, tee in reversed(_captures.get()):
+            buffer.append(text)
+            if not tee:
+                return len(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+@contextlib.contextmanager
+def capture(tee=False):
+    """
+    Context manager collecting what is printed in the current context into a list of strings.
+    sys.stdout is wrapped in a CapturingStream the first time, unless it already is one.
+
+    :param tee: Set to True to pass the output on as well, to the enclosing capture if any or to the stream
+    :return: List receiving the printed text
+    """
+    with _install_lock:
+        if not isinstance(sys.stdout, CapturingStream):
+            sys.stdout = CapturingStream(sys.stdout)
+    buffer = []
+    token = _captures.set(_captures.get() + ((buffer, tee),))
+    try:
+        yield buffer
+    finally:
+        _captures.reset(token)
+
+
+def failed(text):
+    """
+    :param text: Output of a /src function or workflow, e.g. "".join() of a capture() buffer
+    :return: True if a line of the output reports a failure
+    """
+    return any(line.startswith(FAILURE_PREFIXES) for line in text.splitlines())
+
+
+def run_checked(func, *args, **kwargs):
+    """
+    Call func, raising an Exception if it reports a failure the way the functions in /src do: by printing a line
+    starting with one of FAILURE_PREFIXES, or by returning False. What func prints is passed on as usual.
+
+    :param func: Callable to run
+    :param args: Positional arguments for func
+    :param kwargs: Keyword arguments for func
+    :return: Return value of func
+    """
+    with capture(tee=True) as buffer:
+        result = func(*args, **kwargs)
+    failures = [line for line in "".join(buffer).splitlines() if line.startswith(FAILURE_PREFIXES)]
+    if failures:
+        raise Exception(failures[0])
+    if result is False:
+        raise Exception("ERROR: '%s' returned False" % getattr(func, "__name__", func))
+    return result
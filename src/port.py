@@ -90,10 +90,13 @@ def _get_port(port_name, depth=0, selector=None, **kwargs):
     return output
 
 
-def get_all_ports(**kwargs):
+def get_all_ports(attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get a list of all entries in the Port table
 
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["name", "vlan_mode"]
+    :param filters: Optional filters on attribute values, e.g. ["vlan_mode=native-untagged"];
+        see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
@@ -101,15 +104,15 @@ def get_all_ports(**kwargs):
     """
     target_url = kwargs["url"] + "system/ports"
 
-    response = kwargs["s"].get(target_url, verify=False)
+    response, ports_list = common_ops._get_table(target_url, attributes, filters, **kwargs)
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting list of all Port table entries failed with status code %d"
               % response.status_code)
+        ports_list = response.json()
     else:
         print("SUCCESS: Getting list of all Port table entries succeeded")
 
-    ports_list = response.json()
     return ports_list
 
 
@@ -0,0 +1,106 @@
+import random
+import time
+
+import requests
+from requests.packages.urllib3.exceptions import NewConnectionError
+
+# Methods that can be replayed without changing the outcome on the switch
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+# Status codes worth retrying: throttling and transient server-side failures of the REST daemon
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+
+class RetryPolicy(object):
+    """
+    Decides whether a failed request may be replayed and how long to wait before doing so.
+
+    Idempotent requests (GET, PUT, DELETE) are retried on connection errors, timeouts and the status codes in
+    RETRY_STATUS_CODES. A POST is only retried when it provably never reached the switch, i.e. on a connect timeout
+    or a refused connection, since replaying it could create a duplicate table entry.
+    Waits use exponential backoff with full jitter, so threads retrying against the same switch spread out.
+    """
+
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=30.0, status_codes=RETRY_STATUS_CODES):
+        """
+        :param max_retries: Maximum number of retries after the first attempt
+        :param backoff_base: Seconds of the first backoff window; the window doubles on every retry
+        :param backoff_max: Upper bound in seconds of the backoff window
+        :param status_codes: Status codes that make an idempotent request eligible for a retry
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.status_codes = frozenset(status_codes)
+
+    @staticmethod
+    def is_idempotent(method):
+        """
+        :param method: HTTP method, e.g. "GET"
+        :return: True if the request can be replayed safely
+        """
+        return method.upper() in IDEMPOTENT_METHODS
+
+    def should_retry_response(self, method, response, attempt):
+        """
+        :param method: HTTP method of the request
+        :param response: Response object received
+        :param attempt: Number of retries already performed
+        :return: True if the request should be sent again
+        """
+        return (attempt < self.max_retries and self.is_idempotent(method)
+                and response.status_code in self.status_codes)
+
+    def should_retry_exception(self, method, error, attempt):
+        """
+        :param method: HTTP method of the request
+        :param error: Exception raised while sending the request
+        :param attempt: Number of retries already performed
+        :return: True if the request should be sent again
+        """
+        if attempt >= self.max_retries:
+            return False
+        if self.is_idempotent(method):
+            return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+        # The connection was never established, so the switch cannot have processed the request
+        return _never_sent(error)
+
+    def backoff(self, attempt, response=None):
+        """
+        Return the number of seconds to wait before a retry. A Retry-After header in seconds is honored.
+
+        :param attempt: Number of retries already performed
+        :param response: Optional response that triggered the retry
+        :return: Seconds to wait
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def sleep(self, attempt, response=None):
+        """
+        Wait before a retry.
+
+        :param attempt: Number of retries already performed
+        :param response: Optional response that triggered the retry
+        :return: Nothing
+        """
+        time.sleep(self.backoff(attempt, response))
+
+
+def _never_sent(error):
+    """
+    Tell whether a request failed before the connection to the switch was established.
+
+    :param error: Exception raised while sending the request
+    :return: True for connect timeouts and refused connections, False for anything that may have reached the switch
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        # requests wraps urllib3's MaxRetryError, whose 'reason' is the underlying connection error
+        reason = getattr(error.args[0], "reason", error.args[0])
+        return isinstance(reason, NewConnectionError)
+    return False
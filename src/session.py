@@ -1,33 +1,330 @@
-from src import common_ops
+from src import breaker, common_ops, limiter, retry, singleflight
 
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import contextvars
 import getpass
 import requests
 import json
+import threading
 
+# SessionPool active in the current context; fleet.run_parallel() hands it on to its worker threads
+_active_pool = contextvars.ContextVar("aoscx_session_pool", default=None)
+# Number of exclusive pools (dry-run pools) currently active anywhere in the process
+_exclusive_activations = 0
+_exclusive_lock = threading.Lock()
 
-def login(base_url, username=None, password=None):
+
+class Session(requests.Session):
+    """
+    requests.Session that keeps a long workflow alive across transient failures.
+
+    On a 401 the session logs in again with the credentials it was created with and replays the request once.
+    Requests failing with a connection error, a timeout or a transient status code are retried as allowed by
+    its RetryPolicy, which never replays a POST that may have reached the switch.
+    Every request goes through an AIMDLimiter, adapting the number of concurrent requests to what the switch sustains,
+    and a CircuitBreaker, failing fast once the switch is unreachable. Requests issued without a timeout get the
+    session's (connect, read) timeout so a dead switch can never hang a call.
+    Concurrent identical GETs, e.g. existence checks issued by several threads configuring the same switch,
+    share a single request, each getting its own copy of the parsed result. An optional limiter.RateLimiter,
+    usually shared by many sessions, caps the rate at which requests are sent.
+    """
+
+    def __init__(self, base_url=None, username=None, password=None, retry_policy=None, concurrency_limiter=None,
+                 timeout=(5, 60), circuit_breaker=None, coalesce_gets=True, rate_limiter=None):
+        """
+        :param base_url: URL in main() function, used to log in again when the session expires
+        :param username: username
+        :param password: password
+        :param retry_policy: retry.RetryPolicy to apply. Defaults to RetryPolicy() if not specified.
+        :param concurrency_limiter: limiter.AIMDLimiter shared by every request of the session.
+            Defaults to AIMDLimiter() if not specified.
+        :param timeout: Default timeout in seconds for requests that do not specify one, either a single number or a
+            (connect timeout, read timeout) tuple. Defaults to (5, 60).
+        :param circuit_breaker: breaker.CircuitBreaker guarding the switch.
+            Defaults to CircuitBreaker() if not specified.
+        :param coalesce_gets: Set to False to send every GET even when an identical one is already in flight
+        :param rate_limiter: Optional limiter.RateLimiter applied to every request of the session
+        """
+        super(Session, self).__init__()
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.retry_policy = retry_policy if retry_policy is not None else retry.RetryPolicy()
+        self.limiter = concurrency_limiter if concurrency_limiter is not None else limiter.AIMDLimiter()
+        self.timeout = timeout
+        self.breaker = circuit_breaker if circuit_breaker is not None else breaker.CircuitBreaker()
+        self.single_flight = singleflight.SingleFlight() if coalesce_gets else None
+        self.rate_limiter = rate_limiter
+        self._login_lock = threading.Lock()
+        # Incremented on every successful re-login so concurrent 401s only trigger one login
+        self._login_generation = 0
+
+    def _can_relogin(self, url):
+        if self.base_url is None or self.username is None:
+            return False
+        return url.split("?")[0] not in (self.base_url + "login", self.base_url + "logout")
+
+    def relogin(self, generation=None):
+        """
+        Perform a POST call to log in again with the stored credentials, refreshing the session cookie.
+
+        :param generation: Login generation observed when the failed request was sent. If another thread has
+            logged in again since then, no new login is performed.
+        :return: True if the session holds a valid cookie afterwards, False otherwise
+        """
+        with self._login_lock:
+            if generation is not None and generation != self._login_generation:
+                return True
+            login_data = {"username": self.username, "password": self.password}
+            try:
+                response = super(Session, self).request("POST", self.base_url + "login", data=login_data,
+                                                        verify=False, timeout=self.timeout)
+            except requests.exceptions.RequestException as error:
+                print("FAIL: Re-login failed: %s" % error)
+                return False
+            # Response OK check needs to be passed "PUT" since this POST call returns 200 instead of conventional 201
+            if not common_ops._response_ok(response, "PUT"):
+                print("FAIL: Re-login failed with status code %d" % response.status_code)
+                return False
+            self._login_generation += 1
+            print("SUCCESS: Re-login succeeded")
+            return True
+
+    def _send(self, method, url, **kwargs):
+        """
+        Send a single request once the circuit breaker, the rate limiter and the concurrency limiter admit it,
+        and report its outcome to the circuit breaker and the concurrency limiter.
+        """
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        trial = self.breaker.before_request()
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait()
+            request_class = limiter.request_class(method, url, kwargs.get("params"))
+            start = self.limiter.acquire()
+            try:
+                response = super(Session, self).request(method, url, **kwargs)
+            except requests.exceptions.Timeout as error:
+                self.limiter.release(start, timed_out=True)
+                self.breaker.record_failure(error)
+                raise
+            except requests.exceptions.ConnectionError as error:
+                self.limiter.release(start)
+                self.breaker.record_failure(error)
+                raise
+            except BaseException:
+                self.limiter.release(start)
+                raise
+            self.limiter.release(start, response.status_code, request_class=request_class)
+            self.breaker.record_response(response.status_code)
+            return response
+        finally:
+            if trial:
+                self.breaker.end_trial()
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request, logging in again on 401 and retrying transient failures.
+        Takes the same arguments as requests.Session.request().
+        """
+        params = kwargs.get("params")
+        # 'writable' GETs are read-modify-write; each caller gets its own copy of the result to modify
+        writable = isinstance(params, dict) and params.get("selector") == "writable"
+        if method.upper() == "GET" and self.single_flight is not None and not writable:
+            key = singleflight.request_key(url, params)
+            return self.single_flight.do(
+                key, lambda: singleflight.share_json(self._request_with_retry(method, url, **kwargs)))
+        return self._request_with_retry(method, url, **kwargs)
+
+    def _request_with_retry(self, method, url, **kwargs):
+        attempt = 0
+        relogged = False
+        while True:
+            generation = self._login_generation
+            try:
+                response = self._send(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                if not self.retry_policy.should_retry_exception(method, error, attempt):
+                    raise
+                print("WARNING: %s %s failed with '%s', retrying" % (method, url, error))
+                self.retry_policy.sleep(attempt)
+                attempt += 1
+                continue
+
+            if response.status_code == 401 and not relogged and self._can_relogin(url):
+                # A 401 is returned before the request is processed, so replaying it is safe for any method
+                relogged = True
+                if self.relogin(generation):
+                    continue
+                return response
+
+            if self.retry_policy.should_retry_response(method, response, attempt):
+                print("WARNING: %s %s failed with status code %d, retrying" % (method, url, response.status_code))
+                self.retry_policy.sleep(attempt, response)
+                attempt += 1
+                continue
+            return response
+
+
+class SessionPool(object):
+    """
+    Sessions shared by every workflow run in a process, one per base URL (switch and API version).
+
+    While the pool is active in a thread (see activate()), login() in that thread, and in the worker threads of
+    fleet.run_parallel() it starts, returns the pooled session of the switch, logging in only the first time, and
+    logout() of a pooled session does nothing until logout_all().
+    Unmodified workflows can thus run concurrently against many switches over persistent sessions.
+    """
+
+    # While an exclusive pool is active, login() refuses to create a real session in threads the pool does not cover
+    exclusive = False
+
+    def __init__(self, per_switch_limit=None, **session_options):
+        """
+        :param per_switch_limit: Optional maximum number of concurrent requests to one switch; every pooled session
+            then gets its own limiter.AIMDLimiter growing up to that limit
+        :param session_options: Keyword arguments passed on to login() for every pooled session,
+            e.g. timeout=(3, 30) or rate_limiter=limiter.RateLimiter(50) to cap the rate across all switches
+        """
+        self.per_switch_limit = per_switch_limit
+        self.session_options = session_options
+        self.sessions = {}
+        self._login_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, base_url, username=None, password=None):
+        """
+        Return the pooled session of a base URL, logging in if there is none yet.
+
+        :param base_url: URL in main() function
+        :param username: username
+        :param password: password
+        :return: Session object
+        """
+        with self._lock:
+            login_lock = self._login_locks.setdefault(base_url, threading.Lock())
+        with login_lock:
+            s = self.sessions.get(base_url)
+            if s is None:
+                s = self._create_session(base_url, username, password)
+                with self._lock:
+                    self.sessions[base_url] = s
+        return s
+
+    def _create_session(self, base_url, username, password):
+        options = dict(self.session_options)
+        if self.per_switch_limit is not None:
+            options["concurrency_limiter"] = limiter.AIMDLimiter(
+                initial_limit=min(4, self.per_switch_limit), max_limit=self.per_switch_limit)
+        return _new_session(base_url, username, password, **options)
+
+    def owns(self, s):
+        """
+        :param s: Session object
+        :return: True if the session belongs to the pool
+        """
+        with self._lock:
+            return any(pooled is s for pooled in self.sessions.values())
+
+    @contextlib.contextmanager
+    def activate(self):
+        """
+        Context manager making login() and logout() in the current thread, and in the worker threads of
+        fleet.run_parallel() started from it, use the pool.
+        """
+        global _exclusive_activations
+        token = _active_pool.set(self)
+        if self.exclusive:
+            with _exclusive_lock:
+                _exclusive_activations += 1
+        try:
+            yield self
+        finally:
+            _active_pool.reset(token)
+            if self.exclusive:
+                with _exclusive_lock:
+                    _exclusive_activations -= 1
+
+    def logout_all(self, max_workers=16):
+        """
+        Log out of every pooled session concurrently and empty the pool.
+
+        :param max_workers: Maximum number of concurrent logouts
+        :return: Nothing
+        """
+        with self._lock:
+            sessions, self.sessions = self.sessions, {}
+        if not sessions:
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(sessions))) as executor:
+            futures = {base_url: executor.submit(_logout, s, base_url) for base_url, s in sessions.items()}
+            for base_url, future in futures.items():
+                try:
+                    future.result()
+                except requests.exceptions.RequestException as error:
+                    print("FAIL: Logout of '%s' failed: %s" % (base_url, error))
+
+
+def active_pool():
+    """
+    :return: SessionPool active in the current thread, or None
+    """
+    return _active_pool.get()
+
+
+def login(base_url, username=None, password=None, retry_policy=None, concurrency_limiter=None, timeout=(5, 60),
+          circuit_breaker=None, coalesce_gets=True, rate_limiter=None):
     """
 
     Perform a POST call to login and gain access to other API calls.
     If either username or password is not specified, user will be prompted to enter the missing credential(s).
+    If a SessionPool is active in the current thread, its session for base_url is returned instead and the
+    session options of the pool apply. While a dry-run pool is active in any thread, logging in from a thread
+    it does not cover raises an Exception.
 
     :param base_url: URL in main() function
     :param username: username
     :param password: password
-    :return: requests.session object with loaded cookie jar
+    :param retry_policy: Optional retry.RetryPolicy for the returned session. Defaults to RetryPolicy().
+    :param concurrency_limiter: Optional limiter.AIMDLimiter for the returned session. Defaults to AIMDLimiter().
+    :param timeout: Default (connect timeout, read timeout) in seconds of the returned session, also used for the
+        login call itself. Defaults to (5, 60).
+    :param circuit_breaker: Optional breaker.CircuitBreaker for the returned session. Defaults to CircuitBreaker().
+    :param coalesce_gets: Set to False to disable sharing of concurrent identical GETs by the returned session
+    :param rate_limiter: Optional limiter.RateLimiter for the returned session
+    :return: Session object with loaded cookie jar, which logs in again if the cookie expires
     """
+    pool = active_pool()
+    if pool is not None:
+        return pool.get(base_url, username, password)
+    if _exclusive_activations:
+        # E.g. a dry-run workflow logging in from a thread of its own, which must not reach the switch for real
+        raise Exception("ERROR: Refusing to log in to '%s' from a thread outside of the active dry-run"
+                        % base_url)
+    return _new_session(base_url, username, password, retry_policy, concurrency_limiter, timeout, circuit_breaker,
+                        coalesce_gets, rate_limiter)
+
+
+def _new_session(base_url, username=None, password=None, retry_policy=None, concurrency_limiter=None,
+                 timeout=(5, 60), circuit_breaker=None, coalesce_gets=True, rate_limiter=None):
     if username is None and password is None:
         username = input('Enter username: ')
         password = getpass.getpass()
 
     login_data = {"username": username, "password": password}
 
-    s = requests.Session()
+    s = Session(base_url, username, password, retry_policy, concurrency_limiter, timeout, circuit_breaker,
+                coalesce_gets, rate_limiter)
     try:
-        response = s.post(base_url + "login", data=login_data, verify=False, timeout=5)
+        response = s.post(base_url + "login", data=login_data, verify=False)
     except requests.exceptions.ConnectTimeout:
         print('ERROR: Error connecting to host: connection attempt timed out.')
         exit(-1)
+    except requests.exceptions.RequestException as error:
+        print('ERROR: Error connecting to host: {}'.format(error))
+        exit(-1)
     # Response OK check needs to be passed "PUT" since this POST call returns 200 instead of conventional 201
     if not common_ops._response_ok(response, "PUT"):
         print("FAIL: Login failed with status code %d" % response.status_code)
@@ -40,13 +337,21 @@ def login(base_url, username=None, password=None):
 def logout(**kwargs):
     """
     Perform a POST call to logout and end session.
+    Sessions of the SessionPool active in the current thread stay logged in until the pool's logout_all().
 
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
     :return: Nothing
     """
-    response = kwargs["s"].post(kwargs["url"] + "logout", verify=False)
+    pool = active_pool()
+    if pool is not None and pool.owns(kwargs["s"]):
+        return
+    _logout(kwargs["s"], kwargs["url"])
+
+
+def _logout(s, base_url):
+    response = s.post(base_url + "logout", verify=False)
     # Response OK check needs to be passed "PUT" since this POST call returns 200 instead of conventional 201
     if not common_ops._response_ok(response, "PUT"):
         print("FAIL: Logout failed with status code %d" % response.status_code)
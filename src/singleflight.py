@@ -0,0 +1,99 @@
+import copy
+import threading
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight(object):
+    """
+    Collapses concurrent identical calls into one.
+
+    The first caller of do() for a key runs the function; callers arriving with the same key while it is still
+    running wait for it and receive the same result (or exception) instead of running the function again.
+    Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, func):
+        """
+        Run func(), or wait for the identical call already in flight.
+
+        :param key: Hashable key identifying identical calls
+        :param func: Callable without arguments
+        :return: Return value of func()
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.executed += 1
+            else:
+                call.followers += 1
+                leader = False
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+def request_key(url, params=None):
+    """
+    Build the single-flight key of a GET request; params that requests would drop (None values) are ignored.
+
+    :param url: Target URL
+    :param params: Optional dictionary of query parameters
+    :return: Hashable key
+    """
+    if isinstance(params, dict):
+        params = tuple(sorted((key, str(value)) for key, value in params.items() if value is not None))
+    elif params is not None:
+        params = repr(params)
+    return url, params
+
+
+def share_json(response):
+    """
+    Make response.json() parse the body only once. Every call returns its own deep copy of the parsed body, so
+    callers sharing the response can modify their result, e.g. before a PUT, without affecting each other.
+
+    :param response: Response object
+    :return: The same response object
+    """
+    parse = response.json
+    parsed = []
+
+    def json(**kwargs):
+        if kwargs:
+            return parse(**kwargs)
+        if not parsed:
+            parsed.append(parse())
+        return copy.deepcopy(parsed[0])
+
+    response.json = json
+    return response
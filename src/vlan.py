@@ -1,5 +1,6 @@
 from src import interface, common_ops
 from src import common_ops
+from src import fleet
 from src import port
 from src import mac
 
@@ -102,12 +103,14 @@ def vlan_get_all_mac_info(vlan_id, **kwargs):
 
     mac_uris_percents = mac.get_all_mac_addrs(vlan_id, **kwargs)
 
+    if isinstance(mac_uris_percents, dict):
+        # v10.04 returns a dictionary keyed by "<type>,<MAC address>" with the URIs as values
+        mac_uris_percents = mac_uris_percents.values()
+
     mac_data_list = []
     for mac_uri_percent in mac_uris_percents:
-        uri_split = mac_uri_percent.split('/')
-        mac_addr = common_ops._replace_percents(uri_split[-1])
-        mac_type = uri_split[-2]
-        vlan_id = int(uri_split[-4])
+        _, (vlan_id, mac_type, mac_addr) = common_ops._parse_uri(mac_uri_percent)
+        vlan_id = int(vlan_id)
 
         mac_data = mac.get_mac_info(vlan_id, mac_type, mac_addr, **kwargs)
         mac_data_list.append(mac_data)
@@ -115,10 +118,13 @@ def vlan_get_all_mac_info(vlan_id, **kwargs):
     return mac_data_list
 
 
-def get_all_vlans(**kwargs):
+def get_all_vlans(attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get a list (or dictionary)  of all entries in VLANs table
 
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["id", "name"]
+    :param filters: Optional filters on attribute values, e.g. ["admin=up"] or {"type": "static"};
+        see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
@@ -126,15 +132,15 @@ def get_all_vlans(**kwargs):
     """
     target_url = kwargs["url"] + "system/vlans"
 
-    response = kwargs["s"].get(target_url, verify=False)
+    response, vlans = common_ops._get_table(target_url, attributes, filters, **kwargs)
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting list/dict of all VLAN table entries failed with status code %d"
               % response.status_code)
+        vlans = response.json()
     else:
         print("SUCCESS: Getting list/dict of all VLAN table entries succeeded")
 
-    vlans = response.json()
     return vlans
 
 
@@ -758,6 +764,113 @@ def port_set_native_vlan(l2_port_name, vlan_id, tagged=True, **kwargs):
         interface._port_set_native_vlan(l2_port_name, vlan_id, tagged, **kwargs)
 
 
+def ports_update_vlan_trunks(port_names_or_ranges, add_vlan_ids=None, remove_vlan_ids=None, max_workers=8,
+                             **kwargs):
+    """
+    Add and remove VLANs on the trunks of many ports with at most one PUT per port, sent concurrently. The
+    configuration of all the ports is fetched with a single GET, and ports whose trunk does not change are not
+    written. Like port_add_vlan_trunks(), ports getting VLANs added are set to 'no routing', and get native VLAN 1
+    and VLAN mode 'native-untagged' if they have none. For v1, a port getting VLANs added that has no Port table
+    entry gets one created.
+
+    :param port_names_or_ranges: L2 port names and ranges such as "1/1/1-1/1/48", see
+        common_ops._expand_interface_ranges()
+    :param add_vlan_ids: VLAN IDs and ranges to allow on the trunks, e.g. "100-299" or [10, "20-29"]
+    :param remove_vlan_ids: VLAN IDs and ranges to remove from the trunks
+    :param max_workers: Maximum number of concurrent calls to the switch
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by port name, True if the port's trunk is as requested (updated or unchanged),
+        False otherwise
+    """
+    port_names = common_ops._expand_interface_ranges(port_names_or_ranges)
+    add_ids = common_ops._expand_vlan_ranges(add_vlan_ids)
+    remove_ids = common_ops._expand_vlan_ranges(remove_vlan_ids)
+    if add_ids & remove_ids:
+        raise Exception("ERROR: VLANs %s are both added and removed" % sorted(add_ids & remove_ids))
+
+    if kwargs["url"].endswith("/v1/"):
+        version = "v1"
+        port_table = "ports"
+        default_vlan_tag = "/rest/v1/system/vlans/1"
+    else:  # Updated else for when version is v10.04
+        version = "v10.04"
+        port_table = "interfaces"
+        default_vlan_tag = {"1": "/rest/v10.04/system/vlans/1"}
+
+    configs = interface.get_all_interface_configurations(**kwargs)
+
+    results = {}
+    writes = {}
+    for port_name in port_names:
+        port_name_percents = common_ops._replace_special_characters(port_name)
+        port_data = configs.get(port_name)
+
+        if port_data is None:
+            if version == "v1" and add_ids:
+                # if Port table entry doesn't exist, create it
+                port_data = {"name": port_name,
+                             "interfaces": ["/rest/v1/system/interfaces/%s" % port_name_percents],
+                             "vlan_mode": "native-untagged",
+                             "vlan_tag": default_vlan_tag,
+                             "vlan_trunks": ["/rest/v1/system/vlans/%d" % vlan_id for vlan_id in sorted(add_ids)],
+                             "routing": False
+                             }
+                writes[port_name] = ("POST", "system/ports", port_data)
+            elif add_ids:
+                print("FAIL: Updating VLAN trunk of Port '%s' failed because the port does not exist" % port_name)
+                results[port_name] = False
+            else:
+                results[port_name] = True
+            continue
+
+        current_ids = set(int(vlan_id) for vlan_id in common_ops._table_keys(port_data.get('vlan_trunks') or []))
+        trunk_ids = (current_ids | add_ids) - remove_ids
+        port_data = dict(port_data)
+        changed = trunk_ids != current_ids
+        if trunk_ids - current_ids:
+            if not port_data.get('vlan_tag'):
+                port_data['vlan_tag'] = default_vlan_tag
+                changed = True
+            if not port_data.get('vlan_mode'):
+                port_data['vlan_mode'] = "native-untagged"
+                changed = True
+            if port_data.get('routing') is not False:
+                port_data['routing'] = False
+                changed = True
+
+        if not changed:
+            print("SUCCESS: No need to update VLAN trunk of Port '%s'" % port_name)
+            results[port_name] = True
+            continue
+
+        port_data['vlan_trunks'] = ["/rest/%s/system/vlans/%d" % (version, vlan_id) for vlan_id in sorted(trunk_ids)]
+        if version == "v1":
+            port_data.pop('name', None)
+            port_data.pop('origin', None)
+            port_data.pop('vrf', None)
+        writes[port_name] = ("PUT", "system/%s/%s" % (port_table, port_name_percents), port_data)
+
+    def _write(port_name):
+        method, path, port_data = writes[port_name]
+        data = json.dumps(port_data, sort_keys=True, indent=4)
+        if method == "POST":
+            response = kwargs["s"].post(kwargs["url"] + path, data=data, verify=False)
+        else:
+            response = kwargs["s"].put(kwargs["url"] + path, data=data, verify=False)
+
+        if not common_ops._response_ok(response, method):
+            print("FAIL: Updating VLAN trunk of Port '%s' failed with status code %d"
+                  % (port_name, response.status_code))
+            return False
+        print("SUCCESS: Updating VLAN trunk of Port '%s' succeeded" % port_name)
+        return True
+
+    results.update(fleet.run_parallel(_write, {port_name: port_name for port_name in writes}, max_workers))
+    return {port_name: bool(results[port_name]) for port_name in port_names}
+
+
 def port_delete_vlan_port(l2_port_name, vlan_id, **kwargs):
     """
     Perform GET and PUT calls to remove a VLAN from a trunk port
@@ -3,10 +3,12 @@ from src import common_ops
 import json
 
 
-def get_all_vrfs(**kwargs):
+def get_all_vrfs(attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to get a list (or dictionary) of all entries in VRF table
 
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["name", "rd"]
+    :param filters: Optional filters on attribute values, e.g. ["type=user"]; see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
@@ -14,7 +16,7 @@ def get_all_vrfs(**kwargs):
     """
     target_url = kwargs["url"] + "system/vrfs"
 
-    response = kwargs["s"].get(target_url, verify=False)
+    response, vrfs = common_ops._get_table(target_url, attributes, filters, **kwargs)
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting list/dict of all VRF table entries failed with status code %d"
@@ -22,7 +24,6 @@ def get_all_vrfs(**kwargs):
         vrfs = []
     else:
         print("SUCCESS: Getting list/dict of all VRF table entries succeeded")
-        vrfs = response.json()
 
     return vrfs
 
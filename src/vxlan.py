@@ -1,5 +1,5 @@
 import json
-from src import common_ops, port, interface
+from src import common_ops, fleet, port, interface
 
 
 def create_vxlan_interface(port_name, source_ipv4=None, port_desc=None, dest_udp_port=4789, **kwargs):
@@ -21,9 +21,11 @@ def create_vxlan_interface(port_name, source_ipv4=None, port_desc=None, dest_udp
         interface._create_vxlan_interface(port_name, source_ipv4, port_desc, dest_udp_port, **kwargs)
 
 
-def get_vni_list(**kwargs):
+def get_vni_list(attributes=None, filters=None, **kwargs):
     """
     Perform a GET call to receive a list of Virtual Network IDs on the system
+    :param attributes: Optional list of attribute names to return for each entry, e.g. ["id", "vlan"]
+    :param filters: Optional filters on attribute values, e.g. ["type=vxlan_vni"]; see common_ops._get_table()
     :param kwargs:
         keyword s: requests.session object with loaded cookie jar
         keyword url: URL in main() function
@@ -31,7 +33,7 @@ def get_vni_list(**kwargs):
     """
     target_url = kwargs["url"] + "system/virtual_network_ids"
 
-    response = kwargs["s"].get(target_url, verify=False)
+    response, vni_list = common_ops._get_table(target_url, attributes, filters, **kwargs)
 
     if not common_ops._response_ok(response, "GET"):
         print("FAIL: Getting list of all Virtual Network IDs failed with status code %d"
@@ -39,7 +41,6 @@ def get_vni_list(**kwargs):
         vni_list = []
     else:
         print("SUCCESS: Getting list of all Virtual Network IDs succeeded")
-        vni_list = response.json()
 
     return vni_list
 
@@ -75,12 +76,7 @@ def _add_vni_mapping_v1(vni, vxlan, vlan, **kwargs):
     current_vni = get_vni_list(**kwargs)
 
     if "/rest/v1/system/virtual_network_ids/vxlan_vni/%d" % vni not in current_vni:
-        vni_data = {
-          "id": vni,
-          "interface": "/rest/v1/system/interfaces/%s" % vxlan,
-          "type": "vxlan_vni",
-          "vlan": "/rest/v1/system/vlans/%d" % vlan
-        }
+        vni_data = _vni_data(vni, vxlan, vlan, **kwargs)
 
         target_url = kwargs["url"] + "system/virtual_network_ids"
 
@@ -110,12 +106,7 @@ def _add_vni_mapping(vni, vxlan, vlan, **kwargs):
     vni_list = get_vni_list(**kwargs)
 
     if "vxlan_vni,%d" % vni not in vni_list:
-        vni_data = {
-          "id": vni,
-          "interface": "/rest/v10.04/system/interfaces/%s" % vxlan,
-          "type": "vxlan_vni",
-          "vlan": "/rest/v10.04/system/vlans/%d" % vlan
-        }
+        vni_data = _vni_data(vni, vxlan, vlan, **kwargs)
 
         target_url = kwargs["url"] + "system/virtual_network_ids"
 
@@ -191,3 +182,123 @@ def _delete_vni_mapping(vni, **kwargs):
             print("SUCCESS: Deleting VNI '%s' succeeded" % vni)
     else:
         print("SUCCESS: No need to delete VNI '%s' since it doesn't exist" % vni)
+
+
+def _vni_data(vni, vxlan, vlan, **kwargs):
+    """
+    Build the POST body of a Virtual Network ID mapped to a VLAN.
+
+    :param vni: Integer representing the Virtual Network ID
+    :param vxlan: Alphanumeric of the VXLAN that the VNI will be associated with
+    :param vlan: VLAN that the VNI will be mapped to
+    :return: Dictionary of the Virtual Network ID entry
+    """
+    version = "v1" if kwargs["url"].endswith("/v1/") else "v10.04"
+    return {
+        "id": vni,
+        "interface": "/rest/%s/system/interfaces/%s" % (version, vxlan),
+        "type": "vxlan_vni",
+        "vlan": "/rest/%s/system/vlans/%d" % (version, vlan)
+    }
+
+
+def sync_vni_map(vni_map, vxlan="vxlan1", prune=False, max_workers=8, **kwargs):
+    """
+    Make the VXLAN VNI to VLAN mappings of a switch match a complete mapping. The Virtual Network ID table is read
+    once, and only the VNIs that are missing are created and those mapped elsewhere deleted, with at most
+    max_workers concurrent calls. A VNI mapped to another VLAN or VXLAN interface is deleted and created again.
+    A VNI not in vni_map that holds a VLAN which vni_map maps to another VNI is deleted as well, even without prune,
+    since a VLAN can only be mapped to one VNI. The mapping is checked for VLANs mapped to several VNIs before any
+    call is sent.
+
+    :param vni_map: Dictionary keyed by integer VNI with the integer VLAN ID it maps to as value
+    :param vxlan: Alphanumeric of the VXLAN that the VNIs will be associated with
+    :param prune: If True, also delete the VNIs of the VXLAN interface that are not in vni_map
+    :param max_workers: Maximum number of concurrent calls to the switch
+    :param kwargs:
+        keyword s: requests.session object with loaded cookie jar
+        keyword url: URL in main() function
+    :return: Dictionary keyed by VNI, True if the VNI is as requested (created, deleted or unchanged),
+        False otherwise; a VNI is only created once every VNI holding its VLAN was deleted
+    """
+    vlan_vnis = {}
+    for vni, vlan in vni_map.items():
+        if vlan in vlan_vnis:
+            raise Exception("ERROR: VLAN %d can't be mapped to both VNI %d and VNI %d" % (vlan, vlan_vnis[vlan], vni))
+        vlan_vnis[vlan] = vni
+
+    if kwargs["url"].endswith("/v1/"):
+        vni_path = "system/virtual_network_ids/vxlan_vni/%d"
+    else:   # Updated else for when version is v10.04
+        vni_path = "system/virtual_network_ids/vxlan_vni,%d"
+
+    response, table = common_ops._get_table(kwargs["url"] + "system/virtual_network_ids",
+                                            attributes=["id", "type", "interface", "vlan"], **kwargs)
+    if table is None:
+        print("FAIL: Getting list of all Virtual Network IDs failed with status code %d" % response.status_code)
+        return {vni: False for vni in vni_map}
+    print("SUCCESS: Getting list of all Virtual Network IDs succeeded")
+
+    current = {}
+    items = table.items() if isinstance(table, dict) else ((None, vni_data) for vni_data in table)
+    for key, vni_data in items:
+        if not isinstance(vni_data, dict):
+            continue
+        # v10.04 keys are "<type>,<VNI>"
+        vni_type, _, vni = (key or "").partition(",")
+        vni_type = vni_data.get("type", vni_type)
+        vni = vni_data.get("id", vni)
+        if vni_type == "vxlan_vni" and vni:
+            vlan = common_ops._ref_key(vni_data.get("vlan"))
+            interface_name = common_ops._ref_key(vni_data.get("interface"))
+            current[int(vni)] = (int(vlan) if vlan is not None else None, interface_name)
+
+    deletes = set()
+    creates = set()
+    for vni, vlan in vni_map.items():
+        if vni not in current:
+            creates.add(vni)
+        elif current[vni] != (vlan, vxlan):
+            deletes.add(vni)
+            creates.add(vni)
+        else:
+            print("SUCCESS: No need to create VNI '%s' for VXLAN '%s' as it already exists" % (vni, vxlan))
+    if prune:
+        deletes.update(vni for vni, (_, interface_name) in current.items()
+                       if vni not in vni_map and interface_name == vxlan)
+    # VNIs that must be deleted first to free the VLAN of a VNI to create
+    holders = {}
+    for vni in creates:
+        holders[vni] = [other for other, (vlan, _) in current.items() if other != vni and vlan == vni_map[vni]]
+        deletes.update(holders[vni])
+
+    def _delete(vni):
+        response = kwargs["s"].delete(kwargs["url"] + vni_path % vni, verify=False)
+        if not common_ops._response_ok(response, "DELETE"):
+            print("FAIL: Deleting VNI '%s' failed with status code %d" % (vni, response.status_code))
+            return False
+        print("SUCCESS: Deleting VNI '%s' succeeded" % vni)
+        return True
+
+    def _create(vni):
+        post_data = json.dumps(_vni_data(vni, vxlan, vni_map[vni], **kwargs), sort_keys=True, indent=4)
+        response = kwargs["s"].post(kwargs["url"] + "system/virtual_network_ids", data=post_data, verify=False)
+        if not common_ops._response_ok(response, "POST"):
+            print("FAIL: Creating VNI '%s' for VXLAN '%s' failed with status code %d"
+                  % (vni, vxlan, response.status_code))
+            return False
+        print("SUCCESS: Creating VNI '%s' for VXLAN '%s' succeeded" % (vni, vxlan))
+        return True
+
+    # Deletes go first, so that VLANs are freed before the VNIs they move to are created
+    deleted = fleet.run_parallel(_delete, {vni: vni for vni in deletes}, max_workers)
+    created = fleet.run_parallel(_create, {vni: vni for vni in creates
+                                           if all(deleted.get(other, True) for other in [vni] + holders[vni])},
+                                 max_workers)
+
+    results = {vni: True for vni in vni_map}
+    for vni in deletes:
+        results[vni] = bool(deleted[vni])
+    for vni in creates:
+        results[vni] = bool(created.get(vni))
+    return results
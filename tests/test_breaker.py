@@ -0,0 +1,48 @@
+import unittest
+
+import requests
+import requests.adapters
+
+from src import breaker, session
+
+
+class _RaisingAdapter(requests.adapters.BaseAdapter):
+    def __init__(self, errors):
+        super(_RaisingAdapter, self).__init__()
+        self.errors = errors
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        self.sent += 1
+        raise self.errors.pop(0)
+
+    def close(self):
+        pass
+
+
+class HalfOpenTrialTest(unittest.TestCase):
+    def _session(self, errors):
+        circuit_breaker = breaker.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        s = session.Session(circuit_breaker=circuit_breaker)
+        adapter = _RaisingAdapter(errors)
+        s.mount("https://", adapter)
+        return s, adapter
+
+    def test_trial_failing_with_other_exception_lets_next_trial_through(self):
+        s, adapter = self._session([requests.exceptions.ConnectionError("down"), ValueError("bad request"),
+                                    requests.exceptions.ConnectionError("still down")])
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            s._send("GET", "https://switch/rest/v10.04/system")
+        self.assertEqual(s.breaker.state, breaker.OPEN)
+        # Half-open trial raising something that is not a switch failure
+        with self.assertRaises(ValueError):
+            s._send("GET", "https://switch/rest/v10.04/system")
+        self.assertEqual(s.breaker.state, breaker.HALF_OPEN)
+        # The next request is a new trial instead of being rejected forever
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            s._send("GET", "https://switch/rest/v10.04/system")
+        self.assertEqual(adapter.sent, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import contextlib
+import io
+import unittest
+
+from src import acl, dryrun, vlan
+
+
+class PlannedWritesTest(unittest.TestCase):
+    def _session(self, base, responses):
+        snapshot = dryrun.Snapshot()
+        for key, body in responses.items():
+            snapshot.put(key, 200, body)
+        return dryrun.DryRunSession(base, snapshot)
+
+    def _run(self, func, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            func(*args, **kwargs)
+        return output.getvalue()
+
+    def test_create_then_modify_vlan(self):
+        base = "https://switch/rest/v10.04/"
+        s = self._session(base, {"system/vlans": {"1": "/rest/v10.04/system/vlans/1"}})
+        self._run(vlan.create_vlan, 10, "users", s=s, url=base)
+        output = self._run(vlan.modify_vlan, 10, vlan_desc="Users", s=s, url=base)
+        self.assertNotIn("FAIL", output)
+        self.assertEqual(vlan.get_vlan(10, s=s, url=base)["description"], "Users")
+        self.assertEqual(sorted(vlan.get_all_vlans(s=s, url=base)), ["1", "10"])
+        # A second create sees the planned entry and sends nothing
+        self.assertIn("No need to create", self._run(vlan.create_vlan, 10, "users", s=s, url=base))
+
+        self._run(vlan.delete_vlan, 10, s=s, url=base)
+        self.assertEqual(sorted(vlan.get_all_vlans(s=s, url=base)), ["1"])
+
+        plan = [(op.method, op.path, op.source) for op in s.plan().operations]
+        self.assertEqual([op for op in plan if op[0] != "GET"],
+                         [("POST", "system/vlans", "planned"), ("PUT", "system/vlans/10", "planned"),
+                          ("DELETE", "system/vlans/10", "planned")])
+        self.assertNotIn("missing", [op[2] for op in plan])
+
+    def test_v1_entry_keyed_by_several_attributes(self):
+        base = "https://switch/rest/v1/"
+        s = self._session(base, {"system/acls": ["/rest/v1/system/acls/old/ipv4"]})
+        self._run(acl.create_acl, "new", "ipv4", s=s, url=base)
+        self.assertEqual(s.get(base + "system/acls/new/ipv4").status_code, 200)
+        s.delete(base + "system/acls/old/ipv4")
+        self.assertEqual(s.get(base + "system/acls").json(), ["/rest/v1/system/acls/new/ipv4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
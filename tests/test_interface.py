@@ -0,0 +1,68 @@
+import contextlib
+import io
+import threading
+import unittest
+
+from src import interface
+
+
+class _Response(object):
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body if body is not None else {}
+        self.text = ""
+
+    def json(self):
+        return self.body
+
+
+class _StubSession(object):
+    """
+    Records the requests it is given and answers the GET of the Interface table with a fixed body.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def _record(self, method, url, params=None):
+        with self._lock:
+            self.requests.append((method, url, params))
+
+    def get(self, url, verify=False, params=None, **kwargs):
+        self._record("GET", url, params)
+        return _Response(200, self.table)
+
+    def put(self, url, data=None, verify=False, **kwargs):
+        self._record("PUT", url)
+        return _Response(200)
+
+    def delete(self, url, verify=False, **kwargs):
+        self._record("DELETE", url)
+        return _Response(204)
+
+
+class InitializeInterfacesTest(unittest.TestCase):
+    def test_one_table_get_one_put_per_port_and_deletes_found_addresses(self):
+        base = "https://switch/rest/v10.04/"
+        s = _StubSession({
+            "1%2F1%2F1": {"name": "1/1/1", "ip6_addresses": {"2001%3A%3A1%2F64": "/rest/v10.04/..."}},
+            "1%2F1%2F2": {"name": "1/1/2", "ip6_addresses": {}},
+            "1%2F1%2F9": {"name": "1/1/9", "ip6_addresses": {"2001%3A%3A9%2F64": "/rest/v10.04/..."}},
+        })
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = interface.initialize_interfaces(["1/1/1-1/1/3"], s=s, url=base)
+
+        self.assertEqual(results, {"1/1/1": True, "1/1/2": True, "1/1/3": True})
+        gets = [request for request in s.requests if request[0] == "GET"]
+        self.assertEqual(len(gets), 1)
+        self.assertEqual(gets[0][1], base + "system/interfaces")
+        puts = sorted(request[1] for request in s.requests if request[0] == "PUT")
+        self.assertEqual(puts, [base + "system/interfaces/1%2F1%2F" + str(port) for port in (1, 2, 3)])
+        deletes = [request[1] for request in s.requests if request[0] == "DELETE"]
+        self.assertEqual(deletes, [base + "system/interfaces/1%2F1%2F1/ip6_addresses/2001%3A%3A1%2F64"])
+
+
+if __name__ == "__main__":
+    unittest.main()
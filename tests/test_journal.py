@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src import fleet, journal
+
+
+class JournalResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "job.journal")
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _steps(self, fail_second):
+        def first(**session_dict):
+            self.calls.append("first")
+
+        def second(**session_dict):
+            self.calls.append("second")
+            if fail_second:
+                # Functions in /src report HTTP errors by printing, not by raising
+                print("FAIL: Adding VLAN failed with status code 400")
+
+        return [("first", first), ("second", second)]
+
+    def _run(self, fail_second):
+        errors = {}
+        with journal.Journal(self.path, job="test") as job_journal:
+            results = fleet.run_steps(self._steps(fail_second), {"10.0.0.1": {}}, job_journal, errors=errors)
+        return results, errors
+
+    def test_failed_step_is_not_recorded_done(self):
+        results, errors = self._run(fail_second=True)
+        self.assertIsNone(results["10.0.0.1"])
+        self.assertIn("10.0.0.1", errors)
+        with journal.Journal(self.path, job="test") as job_journal:
+            self.assertTrue(job_journal.is_done("10.0.0.1", "first"))
+            self.assertFalse(job_journal.is_done("10.0.0.1", "second"))
+
+    def test_resume_reruns_only_the_failed_step(self):
+        self._run(fail_second=True)
+        self.calls = []
+        results, errors = self._run(fail_second=False)
+        self.assertEqual(self.calls, ["second"])
+        self.assertTrue(results["10.0.0.1"])
+        self.assertEqual(errors, {})
+        with journal.Journal(self.path, job="test") as job_journal:
+            self.assertEqual(job_journal.done_count(), 2)
+
+    def test_step_returning_false_fails(self):
+        with journal.Journal(self.path) as job_journal:
+            with self.assertRaises(Exception):
+                job_journal.run_step("10.0.0.1", "check", lambda: False)
+            self.assertFalse(job_journal.is_done("10.0.0.1", "check"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,17 @@
+import unittest
+
+from src import dryrun, lag
+
+
+class CreateLagInterfacesTest(unittest.TestCase):
+    def test_port_in_two_lags_is_rejected_before_any_call(self):
+        base = "https://switch/rest/v10.04/"
+        s = dryrun.DryRunSession(base)
+        with self.assertRaises(Exception):
+            lag.create_lag_interfaces([{"name": "lag1", "phys_ports": "1/1/1-1/1/2"},
+                                       {"name": "lag2", "phys_ports": ["1/1/2", "1/1/3"]}], s=s, url=base)
+        self.assertEqual(s.plan().operations, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
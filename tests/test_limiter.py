@@ -0,0 +1,32 @@
+import time
+import unittest
+
+from src import limiter
+
+
+class AIMDLimiterTest(unittest.TestCase):
+    def _release(self, aimd, latency, request_class):
+        aimd.acquire()
+        aimd.release(time.monotonic() - latency, 200, request_class=request_class)
+
+    def test_mixed_workload_does_not_collapse_the_limit(self):
+        aimd = limiter.AIMDLimiter(initial_limit=4)
+        entry = limiter.request_class("GET", "https://switch/rest/v10.04/system/vlans/10")
+        table = limiter.request_class("GET", "https://switch/rest/v10.04/system/interfaces", {"depth": 1})
+        for _ in range(50):
+            self._release(aimd, 0.01, entry)
+            self._release(aimd, 0.2, table)
+        self.assertGreater(aimd.limit, 4)
+
+    def test_latency_spike_within_a_class_backs_off(self):
+        aimd = limiter.AIMDLimiter(initial_limit=8)
+        table = limiter.request_class("GET", "https://switch/rest/v10.04/system/interfaces", {"depth": 1})
+        for _ in range(5):
+            self._release(aimd, 0.05, table)
+        limit = aimd.limit
+        self._release(aimd, 0.5, table)
+        self.assertLess(aimd.limit, limit)
+
+
+if __name__ == "__main__":
+    unittest.main()
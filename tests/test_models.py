@@ -0,0 +1,44 @@
+import unittest
+
+from src import models
+
+
+class ToRestOnCurrentDataTest(unittest.TestCase):
+    def _check(self, entry, current, changed):
+        body = entry.to_rest("v10.04", current=current)
+        for attribute in current:
+            if attribute not in entry.immutable:
+                self.assertIn(attribute, body)
+        for attribute in entry.immutable:
+            self.assertNotIn(attribute, body)
+        self.assertLessEqual(set(body) - set(current), set(changed))
+        return body
+
+    def test_vlan_put_body(self):
+        writable = {"name": "users", "description": "old", "admin": "up", "aclv4_in_cfg": {"1": "/acl"},
+                    "vsx_sync": ["all"]}
+        body = self._check(models.Vlan(10, "users", description="new"), writable, ["description"])
+        self.assertEqual(body["description"], "new")
+        self.assertEqual(body["aclv4_in_cfg"], {"1": "/acl"})
+
+    def test_interface_put_body(self):
+        writable = {"description": "uplink", "admin": "up", "other_config": {"lacp-aggregation-key": 1},
+                    "vlan_mode": "access", "vlan_tag": "/rest/v10.04/system/vlans/1"}
+        entry = models.Interface("1/1/1", type="system", admin="down", vlan_mode="access", vlan_tag=20)
+        body = self._check(entry, writable, [])
+        self.assertEqual(body["vlan_tag"], "/rest/v10.04/system/vlans/20")
+        self.assertEqual(body["other_config"], {"lacp-aggregation-key": 1})
+
+    def test_ace_put_body(self):
+        writable = {"action": "permit", "protocol": 6, "src_ip": "10.0.0.0/255.0.0.0", "log": True}
+        body = self._check(models.Ace(10, "deny", protocol=6, src_ip="10.0.0.0/255.0.0.0"), writable, [])
+        self.assertEqual(body["action"], "deny")
+        self.assertTrue(body["log"])
+
+    def test_post_body_keeps_key(self):
+        self.assertEqual(models.Vlan(10, "users").to_rest()["id"], 10)
+        self.assertEqual(models.Ace(10, "deny").to_rest()["sequence_number"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+import unittest
+
+import requests
+
+from src import notification
+
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class _Connection(object):
+    """
+    Server side of one WebSocket connection, just enough of RFC 6455 for text frames and closing.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.file = sock.makefile("rb")
+        request = b""
+        while not request.endswith(b"\r\n\r\n"):
+            request += self.file.readline()
+        headers = dict(line.split(": ", 1) for line in request.decode().split("\r\n")[1:] if ": " in line)
+        self.cookie = headers.get("Cookie")
+        accept = base64.b64encode(hashlib.sha1((headers["Sec-WebSocket-Key"] + _WEBSOCKET_GUID).encode()).digest())
+        sock.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+
+    def recv_json(self):
+        """
+        :return: Decoded JSON of the next text frame, or None once the client closed the connection
+        """
+        header = self.file.read(2)
+        if len(header) < 2 or header[0] & 0x0f == 0x8:
+            return None
+        length = header[1] & 0x7f
+        if length == 126:
+            length = struct.unpack("!H", self.file.read(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self.file.read(8))[0]
+        mask = self.file.read(4)
+        payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(self.file.read(length)))
+        return json.loads(payload.decode())
+
+    def send_json(self, message):
+        payload = json.dumps(message).encode()
+        if len(payload) < 126:
+            header = struct.pack("!BB", 0x81, len(payload))
+        else:
+            header = struct.pack("!BBH", 0x81, 126, len(payload))
+        self.sock.sendall(header + payload)
+
+    def close(self):
+        try:
+            self.sock.sendall(b"\x88\x00")
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.file.close()
+        self.sock.close()
+
+
+class WebSocketStandIn(object):
+    """
+    Local stand-in for the notification service of a switch: the n-th connection is handed to the n-th script.
+    """
+
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.subscriptions = []
+        self.cookies = []
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(len(scripts))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        for script in self.scripts:
+            sock, _ = self.listener.accept()
+            connection = _Connection(sock)
+            self.cookies.append(connection.cookie)
+            self.subscriptions.append(connection.recv_json())
+            script(connection)
+        self.listener.close()
+
+
+def _snapshot(entries):
+    return {"type": "success",
+            "data": [{"name": "/rest/v10.04/system/interfaces?attributes=admin",
+                      "resources": [{"uri": "/rest/v10.04/system/interfaces", "operation": "inserted",
+                                     "values": entries}]}]}
+
+
+def _first_connection(connection):
+    connection.send_json(_snapshot({"1/1/1": {"admin": "up"}}))
+    connection.send_json({"type": "notification",
+                          "data": [{"name": "/rest/v10.04/system/interfaces?attributes=admin",
+                                    "resources": [{"uri": "/rest/v10.04/system/interfaces/1%2F1%2F1",
+                                                   "operation": "modified", "values": {"admin": "down"}}]}]})
+    # Drop the connection, e.g. the switch rebooting its REST daemon
+    connection.close()
+
+
+def _second_connection(connection):
+    # 1/1/1 was deleted while the subscriber was disconnected
+    connection.send_json(_snapshot({"1/1/2": {"admin": "up"}}))
+    while connection.recv_json() is not None:
+        pass
+    connection.close()
+
+
+class NotificationSubscriberTest(unittest.TestCase):
+    def test_reconnects_and_resubscribes(self):
+        server = WebSocketStandIn([_first_connection, _second_connection])
+        s = requests.Session()
+        s.cookies.set("id", "cookie-value")
+        changes = []
+        subscriber = notification.NotificationSubscriber(
+            {"interfaces": ["admin"]}, on_change=lambda *change: changes.append(change), reconnect_delay=0.05,
+            s=s, url="http://127.0.0.1:%d/rest/v10.04/" % server.port)
+        subscriber.start()
+        try:
+            deadline = time.time() + 5
+            while subscriber.get("interfaces") != {"1/1/2": {"admin": "up"}} and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            subscriber.stop()
+
+        self.assertEqual(subscriber.get("interfaces"), {"1/1/2": {"admin": "up"}})
+        self.assertIn(("interfaces", "1/1/1", "modified", {"admin": "down"}), changes)
+        self.assertEqual(len(server.subscriptions), 2)
+        self.assertEqual(server.subscriptions[0], server.subscriptions[1])
+        self.assertEqual(server.subscriptions[0], {"type": "subscribe", "topics": [
+            {"name": "/rest/v10.04/system/interfaces?attributes=admin"}]})
+        self.assertEqual(server.cookies, ["id=cookie-value", "id=cookie-value"])
+
+    def test_stop_without_reconnecting(self):
+        server = WebSocketStandIn([_second_connection])
+        subscriber = notification.NotificationSubscriber(
+            {"interfaces": ["admin"]}, reconnect_delay=0.05, s=requests.Session(),
+            url="http://127.0.0.1:%d/rest/v10.04/" % server.port)
+        subscriber.start()
+        subscriber.stop()
+        self.assertEqual(len(server.subscriptions), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
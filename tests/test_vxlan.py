@@ -0,0 +1,41 @@
+import contextlib
+import io
+import unittest
+
+from src import dryrun, vxlan
+
+BASE = "https://switch/rest/v10.04/"
+TABLE_KEY = "system/virtual_network_ids?attributes=id%2Cinterface%2Ctype%2Cvlan&depth=1"
+
+
+def _vni(vlan_id):
+    return {"type": "vxlan_vni", "vlan": "/rest/v10.04/system/vlans/%d" % vlan_id,
+            "interface": "/rest/v10.04/system/interfaces/vxlan1"}
+
+
+class SyncVniMapTest(unittest.TestCase):
+    def _sync(self, current, vni_map, **options):
+        snapshot = dryrun.Snapshot()
+        snapshot.put(TABLE_KEY, 200, {"vxlan_vni,%d" % vni: _vni(vlan_id) for vni, vlan_id in current.items()})
+        s = dryrun.DryRunSession(BASE, snapshot)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = vxlan.sync_vni_map(vni_map, s=s, url=BASE, **options)
+        return results, [op for op in s.plan().operations if op.method != "GET"]
+
+    def test_swapped_vlans_are_deleted_before_created(self):
+        results, writes = self._sync({1010: 10, 1020: 20}, {1010: 20, 1020: 10})
+        self.assertEqual(results, {1010: True, 1020: True})
+        self.assertEqual([op.method for op in writes], ["DELETE", "DELETE", "POST", "POST"])
+        self.assertEqual(sorted(op.path for op in writes[:2]),
+                         ["system/virtual_network_ids/vxlan_vni,1010", "system/virtual_network_ids/vxlan_vni,1020"])
+
+    def test_vlan_held_by_unlisted_vni_is_freed_without_prune(self):
+        results, writes = self._sync({1010: 10, 1099: 99}, {2010: 10})
+        self.assertEqual([(op.method, op.path) for op in writes],
+                         [("DELETE", "system/virtual_network_ids/vxlan_vni,1010"),
+                          ("POST", "system/virtual_network_ids")])
+        self.assertTrue(results[2010])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+This workflow performs the following steps:
+1. Start a fresh Python interpreter repeatedly and time how long it takes to import the 'src' modules a typical
+   workflow imports and make one call, with lazy submodule loading (the default) and with AOSCX_EAGER_IMPORT set.
+   'requests' is imported before the timer starts, since every script needs it to talk to a switch
+2. Print the median and minimum time of both modes
+
+No switch is contacted.
+
+Preconditions:
+None
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+dirpath = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Imports of a workflow script, of which only session and system end up being used
+SNIPPET = ("from src import session, system, vlan, interface, acl, qos, access_security; "
+           "session.login; system.get_system_info")
+
+RUNS = 20
+
+
+def _time_imports(eager):
+    env = dict(os.environ)
+    env.pop("AOSCX_EAGER_IMPORT", None)
+    if eager:
+        env["AOSCX_EAGER_IMPORT"] = "1"
+    code = ("import requests, time; start = time.perf_counter(); %s; print(time.perf_counter() - start)" % SNIPPET)
+    timings = []
+    for _ in range(RUNS):
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=dirpath, env=env)
+        timings.append(float(output))
+    return timings
+
+
+def main():
+    print("Timing '%s' over %d fresh interpreters" % (SNIPPET, RUNS))
+    for label, eager in (("lazy", False), ("eager", True)):
+        timings = _time_imports(eager)
+        print("%-5s median %.1f ms, min %.1f ms" % (label, statistics.median(timings) * 1000, min(timings) * 1000))
+
+
+if __name__ == '__main__':
+    main()
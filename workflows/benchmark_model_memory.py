@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+This workflow performs the following steps:
+1. Build synthetic REST API results the size of a large fleet inventory: interfaces with trunked VLANs
+   and Neighbors (ARP) entries, in the dictionary form returned by the getters in /src
+2. Convert them to the __slots__ models of src/models.py
+3. Print the memory held by each form (measured with tracemalloc) and the time taken to traverse it
+   (find the interfaces trunking a VLAN, the neighbors on a port)
+4. Check that converting the models back with to_rest() gives the same models again
+
+No switch is contacted.
+
+Preconditions:
+None
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+dirpath = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dirpath)
+
+from src import models
+
+SWITCHES = 200
+PORTS_PER_SWITCH = 52
+NEIGHBORS_PER_SWITCH = 400
+VERSION = "v10.04"
+
+
+def _interface_dicts():
+    interfaces = []
+    for switch in range(SWITCHES):
+        for port in range(1, PORTS_PER_SWITCH + 1):
+            name = "1/1/%d" % port
+            trunks = range(10 + port % 8, 40 + port % 8)
+            interfaces.append({
+                "name": name,
+                "type": "system",
+                "admin": "up",
+                "description": "switch %d port %d" % (switch, port),
+                "routing": False,
+                "vrf": {"default": "/rest/%s/system/vrfs/default" % VERSION},
+                "vlan_mode": "native-untagged",
+                "vlan_tag": {str(trunks[0]): "/rest/%s/system/vlans/%d" % (VERSION, trunks[0])},
+                "vlan_trunks": {str(vlan_id): "/rest/%s/system/vlans/%d" % (VERSION, vlan_id) for vlan_id in trunks},
+            })
+    return interfaces
+
+
+def _neighbor_dicts():
+    neighbors = []
+    for switch in range(SWITCHES):
+        for host in range(NEIGHBORS_PER_SWITCH):
+            port = "1%%2F1%%2F%d" % (host % PORTS_PER_SWITCH + 1)
+            neighbors.append({
+                "ip_address": "10.%d.%d.%d" % (switch // 250, switch % 250, host % 250 + 1),
+                "mac": "00:50:56:%02x:%02x:%02x" % (switch % 256, host // 256, host % 256),
+                "port": {"vlan%d" % (10 + host % 30): "/rest/%s/system/interfaces/vlan%d" % (VERSION, 10 + host % 30)},
+                "phy_port": {port.replace("%2F", "/"): "/rest/%s/system/interfaces/%s" % (VERSION, port)},
+                "state": "reachable",
+            })
+    return neighbors
+
+
+def _measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return data, size, elapsed
+
+
+def _time(func, runs=5):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = func()
+    return result, (time.perf_counter() - start) / runs
+
+
+def main():
+    interface_dicts, dict_size, _ = _measure(_interface_dicts)
+    interface_models, model_size, convert_time = _measure(lambda: models.interfaces_from_rest(interface_dicts))
+    print("%d interfaces: dicts %.1f MB, models %.1f MB (%.0f%% less), conversion %.2fs"
+          % (len(interface_dicts), dict_size / 1e6, model_size / 1e6, 100.0 * (1 - model_size / dict_size),
+             convert_time))
+    dict_hits, dict_time = _time(lambda: sum(1 for item in interface_dicts if "45" in item["vlan_trunks"]))
+    model_hits, model_time = _time(lambda: sum(1 for item in interface_models if 45 in item.vlan_trunks))
+    print("  interfaces trunking VLAN 45: %d, dicts %.1f ms, models %.1f ms"
+          % (model_hits, dict_time * 1000, model_time * 1000))
+    assert dict_hits == model_hits
+
+    neighbor_dicts, dict_size, _ = _measure(_neighbor_dicts)
+    neighbor_models, model_size, convert_time = _measure(lambda: models.neighbors_from_rest(neighbor_dicts, "default"))
+    print("%d neighbors: dicts %.1f MB, models %.1f MB (%.0f%% less), conversion %.2fs"
+          % (len(neighbor_dicts), dict_size / 1e6, model_size / 1e6, 100.0 * (1 - model_size / dict_size),
+             convert_time))
+    dict_hits, dict_time = _time(lambda: sum(1 for item in neighbor_dicts if "1/1/7" in item["phy_port"]))
+    model_hits, model_time = _time(lambda: sum(1 for item in neighbor_models if item.phy_port == "1/1/7"))
+    print("  neighbors on port 1/1/7: %d, dicts %.1f ms, models %.1f ms"
+          % (model_hits, dict_time * 1000, model_time * 1000))
+    assert dict_hits == model_hits
+
+    assert models.interfaces_from_rest([item.to_rest(VERSION) for item in interface_models]) == interface_models
+    assert models.neighbors_from_rest([item.to_rest(VERSION) for item in neighbor_models],
+                                      "default") == neighbor_models
+    print("Round trip through to_rest() preserved every entry")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+This workflow performs the following steps:
+1. Build a million synthetic reference URIs of interfaces and MAC entries, in the v1 and v10.04 forms returned by
+   the getters in /src
+2. Decode their keys and encode the interface names back with the chained str.replace() calls previously used in
+   /src, then with common_ops._uri_key(), common_ops._parse_uri() and the cached common_ops codec
+3. Print the time taken by each, and check that both give the same results
+
+No switch is contacted.
+
+Preconditions:
+None
+"""
+
+import os
+import sys
+import time
+
+dirpath = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dirpath)
+
+from src import common_ops
+
+ENTRIES = 1000000
+PORTS = 52
+SWITCH_MEMBERS = 4
+
+
+def _replace_percents_chained(str_percents):
+    return str_percents.replace("%3A", ":").replace("%2F", "/").replace("%2C", ",")
+
+
+def _replace_special_characters_chained(str_special_chars):
+    return str_special_chars.replace(":", "%3A").replace("/", "%2F").replace(",", "%2C")
+
+
+def _interface_names():
+    return ["%d/1/%d" % (index % SWITCH_MEMBERS + 1, index % PORTS + 1) for index in range(ENTRIES)]
+
+
+def _interface_uris(names):
+    return ["/rest/v10.04/system/interfaces/%s" % _replace_special_characters_chained(name) for name in names]
+
+
+def _mac_uris():
+    uris = []
+    for index in range(ENTRIES):
+        mac = "00%%3A50%%3A56%%3A%02x%%3A%02x%%3A%02x" % (index >> 16 & 0xff, index >> 8 & 0xff, index & 0xff)
+        if index % 2:
+            uris.append("/rest/v1/system/vlans/%d/macs/dynamic/%s" % (index % 4094 + 1, mac))
+        else:
+            uris.append("/rest/v10.04/system/vlans/%d/macs/dynamic,%s" % (index % 4094 + 1, mac))
+    return uris
+
+
+def _split_mac_uri(uri):
+    # The ad-hoc split only handles v1 URIs; v10.04 joins type and MAC address with a comma
+    uri_split = uri.split('/')
+    if "," in uri_split[-1]:
+        mac_type, mac_addr = uri_split[-1].split(',', 1)
+        return int(uri_split[-3]), mac_type, _replace_percents_chained(mac_addr)
+    return int(uri_split[-4]), uri_split[-2], _replace_percents_chained(uri_split[-1])
+
+
+def _parse_mac_uri(uri, parse_uri=common_ops._parse_uri):
+    vlan_id, mac_type, mac_addr = parse_uri(uri)[1]
+    return int(vlan_id), mac_type, mac_addr
+
+
+def _time(label, func, runs=3):
+    # Best of several runs, so that allocating the result lists the first time does not skew the comparison
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print("  %-40s %6.2fs" % (label, best))
+    return result
+
+
+def main():
+    # Bind the codec functions once: attributes of the lazily loaded src modules are slower to look up
+    encode = common_ops._replace_special_characters
+    uri_key = common_ops._uri_key
+    names = _interface_names()
+    interface_uris = _interface_uris(names)
+    mac_uris = _mac_uris()
+
+    print("Encoding %d interface names:" % ENTRIES)
+    chained = _time("chained str.replace()", lambda: [_replace_special_characters_chained(name) for name in names])
+    cached = _time("_replace_special_characters()", lambda: [encode(name) for name in names])
+    assert chained == cached
+
+    print("Decoding the keys of %d interface URIs:" % ENTRIES)
+    chained = _time("split('/') + chained str.replace()",
+                    lambda: [_replace_percents_chained(uri.rstrip('/').split('/')[-1]) for uri in interface_uris])
+    cached = _time("_uri_key()", lambda: [uri_key(uri) for uri in interface_uris])
+    assert chained == cached
+
+    print("Parsing %d MAC entry URIs (half v1, half v10.04):" % ENTRIES)
+    chained = _time("split('/') + chained str.replace()", lambda: [_split_mac_uri(uri) for uri in mac_uris])
+    parsed = _time("_parse_uri()", lambda: [_parse_mac_uri(uri) for uri in mac_uris])
+    assert chained == parsed
+
+    print("Results are identical; codec cache: %s" % (common_ops._replace_percents.cache_info(),))
+
+
+if __name__ == '__main__':
+    main()
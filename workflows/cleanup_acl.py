@@ -99,15 +99,12 @@ def main():
         vlan.detach_vlan_acl(data['aclVLANid'], "ipv4", **session_dict)
 
         # Remove and initialize L2 and L3 interfaces
-        interface.initialize_interface(data['L3egressinterface'], **session_dict)
-        interface.initialize_interface(data['ipv4L2ingressinterface'], **session_dict)
-        interface.initialize_interface(data['ipv6L2ingressinterface'], **session_dict)
-        interface.initialize_interface(data['interfaceVLAN'], **session_dict)
+        interface.initialize_interfaces([data['L3egressinterface'], data['ipv4L2ingressinterface'],
+                                         data['ipv6L2ingressinterface'], data['interfaceVLAN']], **session_dict)
 
         # Remove LAG and initialize associated L2 interfaces
         lag.delete_lag_interface(data['LAGname'], data['LAGinterfaces'], **session_dict)
-        for LAGinterface in data['LAGinterfaces']:
-            interface.initialize_interface(LAGinterface, **session_dict)
+        interface.initialize_interfaces(data['LAGinterfaces'], **session_dict)
 
         # Delete VLAN
         vlan.delete_vlan(data['aclVLANid'], **session_dict)
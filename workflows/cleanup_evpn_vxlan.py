@@ -186,8 +186,8 @@ def main():
 
             # Remove OSPF and Interfaces
             # Initialize upstream L2 interfaces
-            for upstream in leaf_data['upstreaminterface']:
-                interface.initialize_interface(upstream['interface'], **session_dict)
+            interface.initialize_interfaces([upstream['interface'] for upstream in leaf_data['upstreaminterface']],
+                                            **session_dict)
 
             # Delete Loopback interface
             interface.delete_interface(leaf_data['loopbackinterface'], **session_dict)
@@ -219,8 +219,8 @@ def main():
             bgp.delete_bgp_asn(spine_data['ospfvrf'], spine_data['bgpasn'], **session_dict)
 
             # Initialize downstream L2 interfaces
-            for downstream in spine_data['downstreaminterface']:
-                interface.initialize_interface(downstream['interface'], **session_dict)
+            interface.initialize_interfaces([downstream['interface']
+                                             for downstream in spine_data['downstreaminterface']], **session_dict)
 
             # Create Loopback interface
             interface.delete_interface(spine_data['loopbackinterface'], **session_dict)
@@ -99,13 +99,10 @@ def main():
         lag.delete_lag_interface(data['mclagport'], data['peer1mclaginterfaces'], **session_dict_1)
 
         # Disable and initialize Interfaces
-        for link in data['peer1isllaginterfaces']:
+        for link in data['peer1isllaginterfaces'] + data['peer1mclaginterfaces']:
             interface.enable_disable_interface(link, state="down", **session_dict_1)
-            interface.initialize_interface(link, **session_dict_1)
-        for mclink in data['peer1mclaginterfaces']:
-            interface.enable_disable_interface(mclink, state="down", **session_dict_1)
-            interface.initialize_interface(mclink, **session_dict_1)
-        interface.initialize_interface(data['primarykeepaliveinterface'], **session_dict_1)
+        interface.initialize_interfaces(data['peer1isllaginterfaces'] + data['peer1mclaginterfaces']
+                                        + [data['primarykeepaliveinterface']], **session_dict_1)
 
     except Exception as error:
         print('Ran into exception: {}. Logging out..'.format(error))
@@ -141,13 +138,10 @@ def main():
         lag.delete_lag_interface(data['mclagport'], data['peer2mclaginterfaces'], **session_dict_2)
 
         # Disable and initialize Interfaces
-        for link in data['peer2isllaginterfaces']:
+        for link in data['peer2isllaginterfaces'] + data['peer2mclaginterfaces']:
             interface.enable_disable_interface(link, state="down", **session_dict_2)
-            interface.initialize_interface(link, **session_dict_2)
-        for mclink in data['peer2mclaginterfaces']:
-            interface.enable_disable_interface(mclink, state="down", **session_dict_2)
-            interface.initialize_interface(mclink, **session_dict_2)
-        interface.initialize_interface(data['secondarykeepaliveinterface'], **session_dict_2)
+        interface.initialize_interfaces(data['peer2isllaginterfaces'] + data['peer2mclaginterfaces']
+                                        + [data['secondarykeepaliveinterface']], **session_dict_2)
 
     except Exception as error:
         print('Ran into exception: {}. Logging out..'.format(error))
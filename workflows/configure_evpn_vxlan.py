@@ -364,15 +364,14 @@ def main():
             vxlan.create_vxlan_interface(leaf_data['vxlanname'], leaf_data['vxlanip'], **session_dict)
 
             # Map VNI to VLAN
-            for vni_list in leaf_data['vnivlans']:
-                vxlan.add_vni_mapping(vni_list, leaf_data['vxlanname'], vni_list, **session_dict)
+            vxlan.sync_vni_map({vlan_id: vlan_id for vlan_id in leaf_data['vnivlans']}, leaf_data['vxlanname'],
+                               **session_dict)
 
             # Create EVPN instance
             evpn.create_evpn_instance(**session_dict)
 
             # Configure EVPN Routes
-            for vlan_id in leaf_data['vnivlans']:
-                evpn.add_evpn_vlan(vlan_id, **session_dict)
+            evpn.sync_evpn_vlans(leaf_data['vnivlans'], **session_dict)
 
         except Exception as error:
             print('Ran into exception: {}. Logging out..'.format(error))
@@ -81,65 +81,94 @@ from src import session, vrf, vlan, interface, dhcp, arp
 requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
 
-def main():
-    data = yaml_ops.read_yaml("vrf_vlan_data.yaml")
-
-    if not data['switchip']:
-        data['switchip'] = input("Switch IP Address: ")
-
-    if data['bypassproxy']:
-        os.environ['no_proxy'] = data['switchip']
-        os.environ['NO_PROXY'] = data['switchip']
+def configuration_steps(data):
+    """
+    Build the configuration steps of this workflow, each step being one unit that can be recorded as completed.
+
+    :param data: Dictionary of sample data read from vrf_vlan_data.yaml
+    :return: List of (step name, callable) tuples; each callable takes the session dictionary as keyword arguments
+    """
+    def print_arp_entries(**session_dict):
+        # Print ARP entries of VRF
+        arp_entries = arp.get_arp_entries(data['vrfname'], **session_dict)
+        print("VRF '%s' ARP entries: %s" % (data['vrfname'], repr(arp_entries)))
 
-    base_url = "https://{0}/rest/{1}/".format(data['switchip'], data['version'])
-    try:
-        session_dict = dict(s=session.login(base_url, data['username'], data['password']), url=base_url)
+    def print_vlans(**session_dict):
+        # Print modified VLANs' data
+        vlan_data1 = vlan.get_vlan(data['vlan1id'], **session_dict)
+        print("VLAN '%d' data: %s" % (data['vlan1id'], repr(vlan_data1)))
+        vlan_data2 = vlan.get_vlan(data['vlan2id'], **session_dict)
+        print("VLAN '%d' data: %s" % (data['vlan2id'], repr(vlan_data2)))
 
+    return [
         # Add new VRF with optional route distinguisher to VRF table
-        vrf.add_vrf(data['vrfname'], data['vrfrd'], **session_dict)
+        ("add_vrf", lambda **session_dict: vrf.add_vrf(data['vrfname'], data['vrfrd'], **session_dict)),
 
-        vlan.create_vlan_and_svi(data['vlan1id'], data['vlan1name'], data['vlan1portname'], data['vlan1interfacename'],
-                                 data['vlan1description'], data['vlan1ip'], data['vrfname'],
-                                 data['vlan1portdescription'], **session_dict)
+        ("create_vlan1_and_svi", lambda **session_dict: vlan.create_vlan_and_svi(
+            data['vlan1id'], data['vlan1name'], data['vlan1portname'], data['vlan1interfacename'],
+            data['vlan1description'], data['vlan1ip'], data['vrfname'], data['vlan1portdescription'],
+            **session_dict)),
 
-        vlan.create_vlan_and_svi(data['vlan2id'], data['vlan2name'], data['vlan2portname'], data['vlan2interfacename'],
-                                 data['vlan2description'], data['vlan2ip'], data['vrfname'],
-                                 data['vlan2portdescription'], **session_dict)
+        ("create_vlan2_and_svi", lambda **session_dict: vlan.create_vlan_and_svi(
+            data['vlan2id'], data['vlan2name'], data['vlan2portname'], data['vlan2interfacename'],
+            data['vlan2description'], data['vlan2ip'], data['vrfname'], data['vlan2portdescription'],
+            **session_dict)),
 
         # Add DHCP helper IPv4 addresses for SVI
-        dhcp.add_dhcp_relays(data['vlan1portname'], data['vrfname'], data['ipv4helperaddresses'], **session_dict)
+        ("add_dhcp_relays", lambda **session_dict: dhcp.add_dhcp_relays(
+            data['vlan1portname'], data['vrfname'], data['ipv4helperaddresses'], **session_dict)),
 
         # Add a new entry to the Port table if it doesn't yet exist
-        interface.add_l2_interface(data['systemportname'], **session_dict)
+        ("add_l2_interface", lambda **session_dict: interface.add_l2_interface(
+            data['systemportname'], **session_dict)),
 
         # Update the Interface table entry with "user-config": {"admin": "up"}
-        interface.enable_disable_interface(data['systeminterfacename'], **session_dict)
+        ("enable_interface", lambda **session_dict: interface.enable_disable_interface(
+            data['systeminterfacename'], **session_dict)),
 
         # Set the L2 port VLAN mode as 'native-tagged'
-        vlan.port_set_vlan_mode(data['systemportname'], "native-tagged", **session_dict)
+        ("set_vlan_mode", lambda **session_dict: vlan.port_set_vlan_mode(
+            data['systemportname'], "native-tagged", **session_dict)),
 
         # Set the native VLAN on the port
-        vlan.port_set_native_vlan(data['systemportname'], data['vlan1id'], True, **session_dict)
+        ("set_native_vlan", lambda **session_dict: vlan.port_set_native_vlan(
+            data['systemportname'], data['vlan1id'], True, **session_dict)),
 
         # Add the VLANs as allowed trunks on port
-        vlan.port_add_vlan_trunks(data['systemportname'], [data['vlan1id'], data['vlan2id']], **session_dict)
+        ("add_vlan_trunks", lambda **session_dict: vlan.port_add_vlan_trunks(
+            data['systemportname'], [data['vlan1id'], data['vlan2id']], **session_dict)),
 
-        # Print ARP entries of VRF
-        arp_entries = arp.get_arp_entries(data['vrfname'], **session_dict)
-        print("VRF '%s' ARP entries: %s" % (data['vrfname'], repr(arp_entries)))
+        ("print_arp_entries", print_arp_entries),
 
         # Modify the created VLANs
-        vlan.modify_vlan(data['vlan1id'], "New Name for VLAN %s" % data['vlan1id'],
-                         "New Description for VLAN %s" % data['vlan1id'], **session_dict)
+        ("modify_vlan1", lambda **session_dict: vlan.modify_vlan(
+            data['vlan1id'], "New Name for VLAN %s" % data['vlan1id'],
+            "New Description for VLAN %s" % data['vlan1id'], **session_dict)),
 
-        vlan.modify_vlan(data['vlan2id'], "New Name for VLAN %s" % data['vlan2id'],
-                         "New Description for VLAN %s" % data['vlan2id'], **session_dict)
+        ("modify_vlan2", lambda **session_dict: vlan.modify_vlan(
+            data['vlan2id'], "New Name for VLAN %s" % data['vlan2id'],
+            "New Description for VLAN %s" % data['vlan2id'], **session_dict)),
 
-        # Print modified VLANs' data
-        vlan_data1 = vlan.get_vlan(data['vlan1id'], **session_dict)
-        print("VLAN '%d' data: %s" % (data['vlan1id'], repr(vlan_data1)))
-        vlan_data2 = vlan.get_vlan(data['vlan2id'], **session_dict)
-        print("VLAN '%d' data: %s" % (data['vlan2id'], repr(vlan_data2)))
+        ("print_vlans", print_vlans),
+    ]
+
+
+def main():
+    data = yaml_ops.read_yaml("vrf_vlan_data.yaml")
+
+    if not data['switchip']:
+        data['switchip'] = input("Switch IP Address: ")
+
+    if data['bypassproxy']:
+        os.environ['no_proxy'] = data['switchip']
+        os.environ['NO_PROXY'] = data['switchip']
+
+    base_url = "https://{0}/rest/{1}/".format(data['switchip'], data['version'])
+    try:
+        session_dict = dict(s=session.login(base_url, data['username'], data['password']), url=base_url)
+
+        for step_name, step_func in configuration_steps(data):
+            step_func(**session_dict)
 
     except Exception as error:
         print('Ran into exception: {}. Logging out..'.format(error))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+This workflow performs the steps of configure_vrf_vlan_trunk.py on every switch listed in fleet_data.yaml,
+using the configuration in vrf_vlan_data.yaml. If fleet_data.yaml names an 'inventory', the switches matching its
+'selector' are taken from that inventory file instead:
+1. Read the progress journal named by 'journalfile' and leave out switches on which every step already completed
+2. Log in to the remaining switches concurrently
+3. Run the configuration steps on every switch concurrently, the steps of one switch running in order.
+   Every completed step is appended to the journal; steps completed in a previous run are skipped, so rerunning
+   this workflow after an interruption resumes exactly where it stopped
+4. Log out of every switch and print a summary of the switches that failed
+
+Preconditions:
+None
+"""
+
+from requests.packages.urllib3.exceptions import InsecureRequestWarning
+import requests
+import os
+import sys
+
+dirpath = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dirpath)
+sys.path.append(os.path.join(dirpath, "src"))
+sys.path.append(os.path.join(dirpath, "cx_utils"))
+sys.path.append(os.path.join(dirpath, "workflows"))
+
+from cx_utils import yaml_ops, inventory
+from src import fleet, journal
+
+import configure_vrf_vlan_trunk
+
+requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+
+
+def main():
+    fleet_data = yaml_ops.read_yaml("fleet_data.yaml")
+    data = yaml_ops.read_yaml("vrf_vlan_data.yaml")
+    if fleet_data.get('inventory'):
+        fleet_inventory = inventory.Inventory(fleet_data['inventory'])
+        fleet_data['switches'] = fleet_inventory.resolve_all(fleet_data.get('selector', "all"),
+                                                             fleet_data['maxworkers'])
+
+    if fleet_data['bypassproxy']:
+        os.environ['no_proxy'] = ",".join(switch['switchip'] for switch in fleet_data['switches'])
+        os.environ['NO_PROXY'] = os.environ['no_proxy']
+
+    steps = configure_vrf_vlan_trunk.configuration_steps(data)
+    errors = {}
+    session_dicts = {}
+    with journal.Journal(fleet_data['journalfile'], job="configure_vrf_vlan_trunk") as job_journal:
+        switches = fleet.pending_switches(fleet_data['switches'], [step_name for step_name, _ in steps], job_journal)
+        print("%d of %d switch(es) have steps left to run" % (len(switches), len(fleet_data['switches'])))
+        try:
+            session_dicts = fleet.login_all(switches, fleet_data['version'], fleet_data['maxworkers'], errors)
+            fleet.run_steps(steps, session_dicts, job_journal, fleet_data['maxworkers'], errors)
+        except Exception as error:
+            print('Ran into exception: {}. Logging out..'.format(error))
+        fleet.logout_all(session_dicts, fleet_data['maxworkers'])
+    fleet.print_summary(session_dicts, errors)
+
+
+if __name__ == '__main__':
+    main()
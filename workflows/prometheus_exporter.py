@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+This workflow performs the following steps:
+1. Log in to every switch listed in the sample data and keep the sessions open
+2. Poll system information, interface statistics, ARP/MAC table sizes and BGP/OSPF routers of every switch
+   concurrently in the background, every 'pollinterval' seconds
+3. Serve the latest polled values in the Prometheus text exposition format on http://<host>:<listenport>/metrics
+   until interrupted with Ctrl+C
+4. Log out of every switch
+
+Preconditions:
+None
+"""
+
+from requests.packages.urllib3.exceptions import InsecureRequestWarning
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+import requests
+import os
+import sys
+
+dirpath = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dirpath)
+sys.path.append(os.path.join(dirpath, "src"))
+sys.path.append(os.path.join(dirpath, "cx_utils"))
+
+from cx_utils import yaml_ops
+from src import fleet
+from src import metrics
+
+requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def _make_handler(cache):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = cache.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes happen every few seconds; keep the console for switch polling output
+            pass
+
+    return MetricsHandler
+
+
+def main():
+    data = yaml_ops.read_yaml("exporter_data.yaml")
+
+    if data['bypassproxy']:
+        os.environ['no_proxy'] = ",".join(switch['switchip'] for switch in data['switches'])
+        os.environ['NO_PROXY'] = os.environ['no_proxy']
+
+    errors = {}
+    session_dicts = fleet.login_all(data['switches'], data['version'], data['maxworkers'], errors)
+    # Switches that failed to log in are exported as down
+    cache = metrics.MetricsCache(session_dicts, data['pollinterval'], data['maxworkers'], errors)
+    server = _ThreadingHTTPServer(("", data['listenport']), _make_handler(cache))
+    try:
+        cache.start()
+        print("Serving metrics on port %d" % data['listenport'])
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Interrupted. Logging out..")
+    except Exception as error:
+        print('Ran into exception: {}. Logging out..'.format(error))
+    server.server_close()
+    cache.stop()
+    fleet.logout_all(session_dicts, data['maxworkers'])
+
+
+if __name__ == '__main__':
+    main()